@@ -0,0 +1,272 @@
+import csv
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from log_io import LogSource, game_id, log_name, open_log
+
+# Chip ledger: who bought in for how much and who left with how much, from the seat
+# and stack lines of a log. Every such line mentions "stack", so the pass only
+# CSV-parses those (a few per hand) and skips actions:
+#
+#   buy-in:   "The admin approved the player "P" participation with a stack of X."
+#             "The admin updated the player "P" stack from A to B." (adds B - A)
+#   cash-out: "The player "P" quits the game with a stack of X."
+#   stack:    "joined the game with"/"stand up with"/"sit back with the stack of X" and
+#             the "Player stacks:" line of every hand
+#
+# A player id's first stack also counts as a buy-in when it isn't an approval, as
+# exports may start after players sat down. The first stack played after an approval
+# replaces the approved one, as an update right after approving 100 may go "from 1 to
+# 100". A player "changed the ID from A to B" keeps A's account. Stacks of players still at the table
+# when the log ends come from the last hand's "Player stacks:" line plus that hand's
+# result, from its blinds, bets, returned bets and "collected" lines: the newest rows
+# of the file, so only that one hand is replayed. Net = cash-out + stack - buy-in.
+#
+# Amounts are kept in hundredths of a chip, so sums are exact.
+
+LEDGER_FIELDS = ('buy_in', 'cash_out', 'stack')
+LEDGER_STORE_VERSION = 1
+CENTS = 100
+
+LEDGER_CSV_HEADERS = ['Name', 'Buy In', 'Cash Out', 'Stack', 'Net']
+
+SEATS_PREFIX = 'Player stacks:'
+APPROVED = 'participation with a stack of'
+QUITS = 'quits the game with a stack of'
+AMOUNT = r'(\d+(?:\.\d+)?)'
+UPDATED_PATTERN = re.compile(rf'stack from {AMOUNT} to {AMOUNT}')
+STACK_PATTERN = re.compile(rf'with (?:a|the) stack of {AMOUNT}')
+PLAYER_ID_PATTERN = re.compile(r'"(.+?) @ ([\w-]+)"')
+ID_CHANGED = 'changed the ID from'
+ID_CHANGED_PATTERN = re.compile(r'^The player "(.+?) @ [\w-]+" changed the ID from ([\w-]+) to ([\w-]+)')
+SEAT_PATTERN = re.compile(rf'"(.+?) @ ([\w-]+)" \({AMOUNT}\)')
+# Actions of the last hand; calls, bets and raises give the player's total on the street
+ACTION_PATTERN = re.compile(rf'^"(.+?) @ ([\w-]+)" (posts a .*? of|bets|calls|raises to) {AMOUNT}')
+RETURNED_PATTERN = re.compile(rf'^Uncalled bet of {AMOUNT} returned to "(.+?) @ ([\w-]+)"')
+COLLECTED_PATTERN = re.compile(rf'^"(.+?) @ ([\w-]+)" collected {AMOUNT}')
+BOARD_PREFIXES = ('Flop', 'Turn', 'River')
+
+Ledger = Dict[str, List[int]]  # Player -> [buy_in, cash_out, stack] in hundredths of a chip
+
+
+def to_cents(amount: str) -> int:
+    return round(float(amount) * CENTS)
+
+
+def read_ledger(source: LogSource) -> Ledger:
+    """Ledger of one log (path or open text stream), by player name as in get_stats."""
+    with open_log(source) as f:
+        next(f, None)  # Header
+        # The newest rows, down to the last "Player stacks:" line, are all kept
+        last_hand = []
+        for line in f:
+            last_hand.append(line)
+            if SEATS_PREFIX in line:
+                break
+        rows = list(csv.reader(last_hand)) + list(csv.reader(
+            line for line in f if 'stack' in line or ID_CHANGED in line
+        ))
+    rows.reverse()  # Logs are newest first
+
+    accounts: Dict[Tuple[str, str], List[Optional[int]]] = {}  # (name, id) -> [buy_in, cash_out, stack]
+    street: Dict[Tuple[str, str], int] = {}  # Chips put in on the current street of the last hand
+    approved: Dict[Tuple[str, str], int] = {}  # Approved stacks not yet seen at the table
+
+    def account(name: str, player_id: str) -> List[Optional[int]]:
+        return accounts.setdefault((name.strip().lower(), player_id), [0, 0, None])
+
+    def snapshot(name: str, player_id: str, stack: int, played: bool = True) -> List[Optional[int]]:
+        entry = account(name, player_id)
+        if entry[2] is None:
+            entry[0] += stack  # Seated before the log starts
+        if played:
+            # The first stack played after an approval is what was bought in, whatever was approved
+            entry[0] += stack - approved.pop((name, player_id), stack)
+        entry[2] = stack
+        return entry
+
+    def adjust(name: str, player_id: str, chips: int) -> None:
+        entry = account(name, player_id)
+        if entry[2] is not None:
+            entry[2] += chips
+
+    for row in rows:
+        text = row[0] if row else ''
+        if text.startswith(SEATS_PREFIX):
+            for name, player_id, stack in SEAT_PATTERN.findall(text):
+                snapshot(name, player_id, to_cents(stack))
+            street.clear()
+            continue
+        if text.startswith(BOARD_PREFIXES):
+            street.clear()
+            continue
+
+        action = ACTION_PATTERN.match(text)
+        if action:
+            name, player_id, verb, amount = action.groups()
+            key = (name, player_id)
+            total = street.get(key, 0) + to_cents(amount) if verb.startswith('posts') else to_cents(amount)
+            adjust(name, player_id, street.get(key, 0) - total)
+            street[key] = total
+            continue
+        returned = RETURNED_PATTERN.match(text) or COLLECTED_PATTERN.match(text)
+        if returned:
+            groups = returned.groups()
+            amount, name, player_id = groups if returned.re is RETURNED_PATTERN else (groups[2], *groups[:2])
+            adjust(name, player_id, to_cents(amount))
+            continue
+
+        changed = ID_CHANGED_PATTERN.match(text)
+        if changed:
+            name, old_id, new_id = changed.groups()
+            old = accounts.pop((name.strip().lower(), old_id), None)
+            if old is not None:
+                accounts[(name.strip().lower(), new_id)] = old
+            if (name, old_id) in approved:
+                approved[(name, new_id)] = approved.pop((name, old_id))
+            continue
+
+        player = PLAYER_ID_PATTERN.search(text)
+        if not player:
+            continue
+        updated = UPDATED_PATTERN.search(text)
+        stack = STACK_PATTERN.search(text)
+        if updated:
+            before = approved.get(player.groups(), to_cents(updated.group(1)))
+            after = to_cents(updated.group(2))
+            entry = snapshot(*player.groups(), before)
+            entry[0] += after - before
+            entry[2] = after
+        elif stack and APPROVED in text:
+            entry = account(*player.groups())
+            entry[0] += to_cents(stack.group(1))
+            entry[2] = approved[player.groups()] = to_cents(stack.group(1))
+        elif stack and QUITS in text:
+            entry = snapshot(*player.groups(), to_cents(stack.group(1)))
+            entry[1] += entry[2]
+            entry[2] = 0
+        elif stack:
+            # Joining or standing up may show the stack in other units
+            snapshot(*player.groups(), to_cents(stack.group(1)), played=False)
+
+    ledger: Ledger = {}
+    for (name, _), (buy_in, cash_out, stack) in sorted(accounts.items()):
+        totals = ledger.setdefault(name, [0, 0, 0])
+        totals[0] += buy_in
+        totals[1] += cash_out
+        totals[2] += stack or 0
+    return ledger
+
+
+def merge_ledgers(ledgers: Iterable[Ledger]) -> Ledger:
+    """Sum the ledgers of several sessions per player."""
+    merged: Ledger = {}
+    for ledger in ledgers:
+        for player, amounts in ledger.items():
+            totals = merged.setdefault(player, [0] * len(LEDGER_FIELDS))
+            for i, amount in enumerate(amounts):
+                totals[i] += amount
+    return merged
+
+
+def net(amounts: List[int]) -> int:
+    buy_in, cash_out, stack = amounts
+    return cash_out + stack - buy_in
+
+
+def settle(ledger: Ledger) -> List[Tuple[str, str, int]]:
+    """
+    Transfers (from, to, amount) that settle a ledger: the biggest loser pays the
+    biggest winner until one of them is even, so there are fewer transfers than players.
+    Any imbalance, from chips still in the pot of an unfinished last hand, is left unpaid.
+    """
+    losers = sorted((net(amounts), player) for player, amounts in ledger.items() if net(amounts) < 0)
+    winners = sorted(((-net(amounts), player) for player, amounts in ledger.items() if net(amounts) > 0))
+    transfers = []
+    while losers and winners:
+        (owed, loser), (due, winner) = losers[0], winners[0]
+        amount = min(-owed, -due)
+        transfers.append((loser, winner, amount))
+        losers[0] = (owed + amount, loser)
+        winners[0] = (due + amount, winner)
+        if losers[0][0] == 0:
+            losers.pop(0)
+        if winners[0][0] == 0:
+            winners.pop(0)
+    return transfers
+
+
+def ledger_summary(ledger: Ledger) -> Dict:
+    """A ledger in chips with each player's net and the settling transfers, for JSON responses."""
+    return {
+        'players': {
+            player: {
+                **{field: amount / CENTS for field, amount in zip(LEDGER_FIELDS, amounts)},
+                'net': net(amounts) / CENTS
+            }
+            for player, amounts in sorted(ledger.items())
+        },
+        'transfers': [
+            {'from': loser, 'to': winner, 'amount': amount / CENTS}
+            for loser, winner, amount in settle(ledger)
+        ]
+    }
+
+
+def write_ledger_csv(ledger: Ledger, output_file: str) -> None:
+    """Write a ledger as a CSV with one row per player, biggest winner first."""
+    rows = sorted(ledger.items(), key=lambda item: (-net(item[1]), item[0]))
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(LEDGER_CSV_HEADERS)
+        for player, amounts in rows:
+            writer.writerow([player, *(amount / CENTS for amount in amounts), net(amounts) / CENTS])
+
+
+# Season ledgers are kept in a JSON store with the ledger of each game, so adding a
+# session only reads that session's log. A later export of a game replaces the
+# stored one; exports that aren't newer (by their newest `order`) aren't read past
+# their first row.
+
+def newest_order(source: LogSource) -> int:
+    """Order of the newest row of a log, its first data row."""
+    with open_log(source) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        row = next(reader, None)
+    return int(row[2]) if row and len(row) == 3 and row[2].isdigit() else 0
+
+
+def load_store(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {'version': LEDGER_STORE_VERSION, 'sessions': {}}
+    with open(path, encoding='utf-8') as f:
+        store = json.load(f)
+    if store.get('version') != LEDGER_STORE_VERSION:
+        raise ValueError(f"Unsupported ledger store version {store.get('version')} in {path}")
+    return store
+
+
+def save_store(store: Dict, path: str) -> None:
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(store, f, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def update_store(store: Dict, sources: Iterable[str]) -> List[str]:
+    """Read the ledgers of new or newer exports into the store. Returns the games updated."""
+    updated = []
+    for source in sources:
+        game = game_id(source)
+        order = newest_order(source)
+        session = store['sessions'].get(game)
+        if session and session['order'] >= order:
+            continue
+        store['sessions'][game] = {'file': log_name(source), 'order': order, 'players': read_ledger(source)}
+        updated.append(game)
+    return updated
+
+
+def season_ledger(store: Dict) -> Ledger:
+    return merge_ledgers(session['players'] for _, session in sorted(store['sessions'].items()))
@@ -0,0 +1,310 @@
+import csv
+import io
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from log_io import detect_compression, open_binary
+from poker_analyzer import (
+    DEFAULT_SAMPLE_FRACTION, HandDelta, PlayerStats, PokerAnalyzer, detect_game_type, hand_error, hand_results
+)
+from stat_plugins import stat_counters
+
+# Approximate stats from a stratified random sample of hands, for quick answers over
+# large archives. A first pass over the raw bytes of each log finds every complete
+# hand's byte range (numpy over the line starts, looking for "starting hand" and
+# "ending hand" rows, no CSV parsing) with its game type and table size. Hands are
+# stratified by (log, game type, table size), a share of each stratum is drawn at
+# random, and only the drawn hands are read, by seeking to their byte range, and processed.
+#
+# Each sampled hand stands for N_h / n_h hands of its stratum, so counters are
+# estimated by weighted sums and rates by the ratio of two such sums. Standard
+# errors use the linearized variance of a ratio under stratified sampling without
+# replacement:
+#
+#   var(Y/X) = sum over strata of N_h^2 (1 - n_h/N_h) s_h^2 / n_h / X^2
+#
+# with s_h^2 the sample variance of y - (Y/X) x over the stratum's sampled hands,
+# hands a player wasn't dealt in counting as zeros.
+
+MIN_STRATUM_SAMPLE = 2  # Hands drawn from every stratum with at least as many, so it has a variance
+
+# Rows of PokerNow logs start with their quoted entry
+STARTING_PREFIX = b'"-- starting hand #'
+ENDING_PREFIX = b'"-- ending hand #'
+STACKS_PREFIX = b'"Player stacks:'
+
+# Rates with standard errors: (numerator counters, denominator counters, scale), as in stat_plugins
+SAMPLED_RATES = {
+    'VPIP': (('hands_played',), ('total_hands',), 100),
+    'PFR': (('preflop_raise_hands',), ('total_hands',), 100),
+    'AF': (('total_bets', 'total_raises'), ('total_calls',), 1),
+    'WTSD': (('showdown_hands',), ('flop_hands',), 100)
+}
+SAMPLED_COUNTS = {'Hands': 'total_hands'}  # Counters with standard errors, by get_stats label
+
+
+@dataclass
+class HandOffsets:
+    """Byte range, game type and table size of every complete hand of a log, in play order."""
+    path: str
+    starts: np.ndarray  # First byte of the hand's rows (its "ending hand" row, logs are newest first)
+    ends: np.ndarray  # Byte after its "starting hand" row
+    game_types: List[str]
+    table_sizes: np.ndarray  # Seats in its "Player stacks" row, 0 without one
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def read_bytes(path: str) -> bytes:
+    """Decompressed content of a log."""
+    with open_binary(path) as f:
+        return f.read()
+
+
+def _rows_starting_with(data: np.ndarray, heads: np.ndarray, prefix: bytes) -> np.ndarray:
+    """The line starts among heads where the line begins with prefix."""
+    pattern = np.frombuffer(prefix, dtype=np.uint8)
+    heads = heads[heads + len(pattern) <= len(data)]
+    heads = heads[(data[heads + 1] == pattern[1]) & (data[heads + len(pattern) - 1] == pattern[-1])]
+    window = data[heads[:, None] + np.arange(len(pattern))]
+    return heads[(window == pattern).all(axis=1)]
+
+
+def index_hands(path: str, content: Optional[bytes] = None) -> HandOffsets:
+    """
+    Find the hands of a log like read_log does, from its raw bytes: a hand runs from a
+    "starting hand" row up to the next "ending hand" row, and hands that never end are left out.
+    """
+    if content is None:
+        content = read_bytes(path)
+    data = np.frombuffer(content, dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord('\n'))
+    heads = np.concatenate([[0], newlines + 1])  # First byte of every line
+
+    def line_ends(positions: np.ndarray) -> np.ndarray:
+        after = np.searchsorted(newlines, positions)
+        return np.where(after < len(newlines), newlines[np.minimum(after, len(newlines) - 1)] + 1, len(content))
+
+    # In play order (bottom up) a hand is a "starting hand" row directly followed by an
+    # "ending hand" row; a start followed by another start never ended
+    starting = _rows_starting_with(data, heads, STARTING_PREFIX)
+    ending = _rows_starting_with(data, heads, ENDING_PREFIX)
+    rows = np.concatenate([starting, ending])
+    is_start = np.concatenate([np.ones(len(starting), dtype=bool), np.zeros(len(ending), dtype=bool)])
+    order = np.argsort(-rows, kind='stable')
+    rows, is_start = rows[order], is_start[order]
+    opens = np.flatnonzero(is_start[:-1] & ~is_start[1:])
+    starts = rows[opens + 1]
+    ends = line_ends(rows[opens])
+
+    # Seats: "|" separators in the hand's "Player stacks" row, plus one
+    stacks = _rows_starting_with(data, heads, STACKS_PREFIX)
+    seats = np.zeros(len(starts), dtype=np.int64)
+    if len(stacks):
+        stacks_at = stacks[np.minimum(np.searchsorted(stacks, starts), len(stacks) - 1)]
+        pipes = np.flatnonzero(data == ord('|'))
+        counts = np.searchsorted(pipes, line_ends(stacks_at)) - np.searchsorted(pipes, stacks_at) + 1
+        seats = np.where((stacks_at >= starts) & (stacks_at < ends), counts, 0)
+
+    # Game type by the "starting hand" entry after the hand number and id, which repeats
+    # within a game. Only used to stratify, sampled hands are analyzed from their full lines.
+    variants: Dict[bytes, str] = {}
+    game_types = []
+    for line_start, line_end in zip(rows[opens].tolist(), ends.tolist()):
+        variant = content[content.find(b')', line_start, line_end) + 1:content.rfind(b'",', line_start, line_end)]
+        if variant not in variants:
+            variants[variant] = detect_game_type(content[line_start:line_end].decode('utf-8'))
+        game_types.append(variants[variant])
+    return HandOffsets(path, starts.astype(np.int64), ends.astype(np.int64), game_types, seats.astype(np.int64))
+
+
+def read_hand(data: bytes) -> List[List[str]]:
+    """Rows of one hand, from its byte range, in play order and shaped like the hands of read_log."""
+    rows = list(csv.reader(io.StringIO(data.decode('utf-8'))))
+    rows.reverse()
+    return [rows[0]] + rows  # read_log keeps the "starting hand" row twice
+
+
+def allocate(population: np.ndarray, fraction: float, minimum: int = MIN_STRATUM_SAMPLE) -> np.ndarray:
+    """Hands to draw from each stratum: the fraction rounded up, at least minimum, at most all."""
+    wanted = np.maximum(np.ceil(population * fraction).astype(np.int64), minimum)
+    return np.minimum(wanted, population)
+
+
+@dataclass
+class SampleReport:
+    """Volumes, standard errors and throughput of a sampled parse."""
+    files: int = 0
+    hands: int = 0  # Complete hands in the logs
+    sampled: int = 0
+    strata: int = 0
+    rejected: Dict[str, int] = field(default_factory=dict)  # Sampled hands rejected, per reason
+    # Player -> {'overall': {stat: standard error}, 'by_combined': {context: {...}}}, like get_intervals
+    standard_errors: Dict[str, Dict] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        share = self.sampled / self.hands if self.hands else 0.0
+        text = (
+            f"Sampled {self.sampled} of {self.hands} hands ({share:.1%}) in {self.strata} strata "
+            f"of {self.files} logs in {self.seconds:.2f}s"
+        )
+        if self.rejected:
+            text += ', rejected ' + ', '.join(f"{reason} {count}" for reason, count in sorted(self.rejected.items()))
+        return text
+
+
+def sample_logs(
+    analyzer: PokerAnalyzer,
+    log_files: List[str],
+    fraction: float = DEFAULT_SAMPLE_FRACTION,
+    seed: int = 0,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> SampleReport:
+    """
+    Add estimated counters of the given logs to an analyzer, from a stratified sample of
+    about `fraction` of their hands. Counters are rounded to whole hands; their standard
+    errors, and those of the rates in SAMPLED_RATES, are in the report.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Sample fraction must be in (0, 1], got {fraction}")
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+
+    # Index every log, then draw each stratum's hands
+    indexes = []
+    strata: Dict[Tuple[int, str, int], List[int]] = {}
+    for file_index, path in enumerate(log_files):
+        content = read_bytes(path) if detect_compression(path) else None
+        offsets = index_hands(path, content)
+        indexes.append((offsets, content))
+        for hand, (game_type, table_size) in enumerate(zip(offsets.game_types, offsets.table_sizes.tolist())):
+            strata.setdefault((file_index, game_type, table_size), []).append(hand)
+
+    population = np.array([len(hands) for hands in strata.values()], dtype=np.int64)
+    drawn = allocate(population, fraction)
+    chosen: List[List[int]] = [[] for _ in indexes]  # Sampled hands per log
+    chosen_strata: List[List[int]] = [[] for _ in indexes]
+    for stratum, ((file_index, _, _), hands) in enumerate(strata.items()):
+        picks = np.sort(rng.choice(len(hands), size=drawn[stratum], replace=False))
+        chosen[file_index].extend(hands[pick] for pick in picks.tolist())
+        chosen_strata[file_index].extend([stratum] * len(picks))
+
+    # Read and process only the sampled hands, seeking in plain logs
+    report = SampleReport(files=len(log_files), hands=int(population.sum()), sampled=int(drawn.sum()),
+                          strata=len(strata))
+    deltas: List[Tuple[int, HandDelta]] = []
+    processed = 0
+    for (offsets, content), hands, hand_strata in zip(indexes, chosen, chosen_strata):
+        order = np.argsort(np.array(hands, dtype=np.int64), kind='stable')
+        rows = []
+        with (open(offsets.path, 'rb') if content is None else io.BytesIO(content)) as f:
+            for i in order.tolist():
+                start, end = int(offsets.starts[hands[i]]), int(offsets.ends[hands[i]])
+                f.seek(start)
+                rows.append(read_hand(f.read(end - start)))
+        errors = [hand_error(hand) for hand in rows]
+        results = hand_results(
+            [[row[0] for row in hand] for hand, error in zip(rows, errors) if error is None], analyzer.dispatch
+        )
+        for i, error in zip(order.tolist(), errors):
+            result = next(results) if error is None else error
+            if isinstance(result, str):
+                report.rejected[result] = report.rejected.get(result, 0) + 1
+            else:
+                deltas.append((hand_strata[i], result))
+        processed += len(rows)
+        if progress:
+            progress(processed, report.sampled)
+
+    weights = population / np.maximum(drawn, 1)
+    _add_estimates(analyzer, deltas, weights)
+    report.standard_errors = standard_errors(deltas, population, drawn)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _add_estimates(analyzer: PokerAnalyzer, deltas: List[Tuple[int, HandDelta]], weights: np.ndarray) -> None:
+    """Add the weighted counters of the sampled hands to the analyzer, rounded to whole hands."""
+    counters = list(stat_counters())
+    totals: Dict[Tuple[str, str, int], np.ndarray] = {}
+    hands: Dict[str, float] = {}
+    for stratum, delta in deltas:
+        weight = weights[stratum]
+        if delta.seats:
+            context = f"{delta.game_type}_{delta.table_size}h"
+            hands[context] = hands.get(context, 0) + weight
+        for player, counts in delta.counts.items():
+            key = (player, delta.game_type, delta.table_size)
+            if key not in totals:
+                totals[key] = np.zeros(len(counters))
+            totals[key] += weight * np.array([counts.get(name, 0) for name in counters])
+
+    for (player, game_type, table_size), total in totals.items():
+        data = analyzer.players.setdefault(player, PlayerStats())
+        data.add_context_counts(game_type, table_size, dict(zip(counters, np.rint(total).astype(int).tolist())))
+    for context, count in hands.items():
+        analyzer.context_hands[context] = analyzer.context_hands.get(context, 0) + int(round(count))
+
+
+def standard_errors(deltas: List[Tuple[int, HandDelta]], population: np.ndarray, drawn: np.ndarray) -> Dict[str, Dict]:
+    """Standard errors of SAMPLED_RATES and SAMPLED_COUNTS per player, overall and per combined context."""
+    fields = sorted({name for numerator, denominator, _ in SAMPLED_RATES.values() for name in numerator + denominator}
+                    | set(SAMPLED_COUNTS.values()))
+    column = {name: i for i, name in enumerate(fields)}
+
+    # One entry per (sampled hand, player) and grouping: the player's combined context and overall
+    keys: Dict[Tuple[str, Optional[str]], int] = {}
+    entry_keys, entry_strata, entry_counts = [], [], []
+    for stratum, delta in deltas:
+        context = f"{delta.game_type}_{delta.table_size}h"
+        for player, counts in delta.counts.items():
+            row = [counts.get(name, 0) for name in fields]
+            for group in ((player, context), (player, None)):
+                entry_keys.append(keys.setdefault(group, len(keys)))
+                entry_strata.append(stratum)
+                entry_counts.append(row)
+    if not keys:
+        return {}
+    entry_keys = np.array(entry_keys, dtype=np.int64)
+    entry_strata = np.array(entry_strata, dtype=np.int64)
+    counts = np.array(entry_counts, dtype=np.float64).reshape(-1, len(fields))
+    weights = (population / np.maximum(drawn, 1))[entry_strata]
+    # Finite population correction and 1 / n_h per stratum; strata of one sampled hand add no variance
+    stratum_factor = np.where(drawn > 1, population ** 2 * (1 - drawn / np.maximum(population, 1)) / np.maximum(drawn, 1), 0)
+    pairs, pair_index = np.unique(entry_keys * len(population) + entry_strata, return_inverse=True)
+    pair_keys, pair_strata = np.divmod(pairs, len(population))
+    pair_index = pair_index.reshape(-1)
+
+    def variance(values: np.ndarray) -> np.ndarray:
+        """Variance of the weighted total of values per key; hands without an entry are zeros."""
+        sums = np.bincount(pair_index, weights=values, minlength=len(pairs))
+        squares = np.bincount(pair_index, weights=values * values, minlength=len(pairs))
+        n = drawn[pair_strata]
+        spread = np.where(n > 1, (squares - sums * sums / np.maximum(n, 1)) / np.maximum(n - 1, 1), 0)
+        return np.bincount(pair_keys, weights=stratum_factor[pair_strata] * np.maximum(spread, 0), minlength=len(keys))
+
+    def total(names: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        values = counts[:, [column[name] for name in names]].sum(axis=1)
+        return values, np.bincount(entry_keys, weights=weights * values, minlength=len(keys))
+
+    errors: Dict[str, np.ndarray] = {}
+    for metric, (numerator, denominator, scale) in SAMPLED_RATES.items():
+        y, y_total = total(numerator)
+        x, x_total = total(denominator)
+        ratio = np.where(x_total > 0, y_total / np.maximum(x_total, 1e-12), 0)
+        residuals = np.where(x_total[entry_keys] > 0, y - ratio[entry_keys] * x, y)
+        # AF divides by calls or 1 like stat_plugins, other rates are 0 without a denominator
+        divisor = np.where(x_total > 0, x_total, 1 if metric == 'AF' else np.inf)
+        errors[metric] = np.sqrt(variance(residuals)) / divisor * scale
+    for label, name in SAMPLED_COUNTS.items():
+        errors[label] = np.sqrt(variance(total((name,))[0]))
+
+    results: Dict[str, Dict] = {}
+    for (player, context), key in keys.items():
+        player_errors = results.setdefault(player, {'overall': {}, 'by_combined': {}})
+        target = player_errors['overall'] if context is None else player_errors['by_combined'].setdefault(context, {})
+        target.update({metric: float(values[key]) for metric, values in errors.items()})
+    return results
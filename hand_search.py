@@ -0,0 +1,347 @@
+import base64
+import operator
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from poker_analyzer import HAND_ID_PATTERN, PLAYER_PATTERN, detect_game_type, read_hands
+from poker_partials import write_npz
+
+# Inverted index of hands for searches such as "all hands where A and B were both in,
+# went to the river and the pot was over 500", without grepping logs:
+#
+#   player:a player:b street:river pot>500
+#
+# Every search term maps to a posting list of the hands it occurs in, kept as a numpy
+# bitset (one bit per hand, packed MSB-first), so AND, OR and NOT are bitwise ops over
+# (hands / 8) bytes. Terms are lowercase:
+#
+#   player:<name>      dealt into the hand (seated in its "Player stacks" row)
+#   <action>:<name>    the player made the action: check, call, bet, raise, fold,
+#                      allin, show or win (collected chips)
+#   action:<action>    any player made the action
+#   street:<street>    the hand reached the flop, turn, river or showdown (two or more
+#                      players left at the end)
+#   game:<type>        game type, e.g. game:nlhe or game:plo
+#
+# Pots (chips collected) are bucketed by powers of two, each bucket with its own bitset.
+# A range such as pot>500 is the union of the buckets above 500's bucket, plus the hands
+# of that bucket whose exact pot is over 500.
+#
+# Session rollups store their postings for the API (see posting_lists), sparse lists as
+# positions and dense ones as base64 bitsets, like roaring's array and bitmap containers.
+
+INDEX_VERSION = 1
+
+ACTIONS = ('check', 'call', 'bet', 'raise', 'fold', 'allin', 'show', 'win')
+TERM_KEYS = ('player', 'action', 'street', 'game') + ACTIONS
+POT_EDGES = np.concatenate([[0.0], 2.0 ** np.arange(25)])  # Bucket i holds pots in [edge i, edge i + 1)
+SPARSE_POSTING = 32  # Postings with fewer than 1 in this many hands are stored as positions
+
+ACTION_PATTERN = re.compile(r'^"(.+?) @ [\w-]+" (checks|calls|bets|raises|folds|shows|collected)\b')
+ACTION_VERBS = {
+    'checks': 'check',
+    'calls': 'call',
+    'bets': 'bet',
+    'raises': 'raise',
+    'folds': 'fold',
+    'shows': 'show',
+    'collected': 'win'
+}
+COLLECTED_PATTERN = re.compile(r' collected ([\d.]+) from pot')
+STREET_PREFIXES = (('flop', 'Flop'), ('turn', 'Turn'), ('river', 'River'))
+RANGE_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '=': operator.eq}
+TOKEN_PATTERN = re.compile(
+    r'\s*(?:(?P<paren>[()])'
+    r'|(?P<range>pot\s*(?:>=|<=|>|<|=)\s*\d+(?:\.\d+)?)'
+    r'|(?P<term>[a-z]+:(?:"[^"]*"|[^\s()]+))'
+    r'|(?P<word>[^\s()]+))',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class HandFacts:
+    hand_number: int
+    hand_id: str
+    game_type: str
+    pot: float
+    terms: Set[str] = field(default_factory=set)
+
+
+def extract_facts(hand: List[List[str]]) -> Optional[HandFacts]:
+    """Search terms and pot of one hand, given its (entry, at, order) rows from read_hands."""
+    entries = [row[0] for row in hand]
+    match = HAND_ID_PATTERN.search(entries[0])
+    if not match:
+        return None
+    facts = HandFacts(int(match.group(1)), match.group(2), detect_game_type(entries[0]), 0.0)
+    terms = facts.terms
+    terms.add(f"game:{facts.game_type.lower()}")
+
+    dealt: Set[str] = set()
+    folded: Set[str] = set()
+    for entry in entries:
+        if entry.startswith('Player stacks:'):
+            dealt.update(name.strip() for name in PLAYER_PATTERN.findall(entry.lower()))
+            continue
+        for street, prefix in STREET_PREFIXES:
+            if entry.startswith(prefix):
+                terms.add(f"street:{street}")
+        action = ACTION_PATTERN.match(entry.lower())
+        if not action:
+            continue
+        player, verb = action.group(1).strip(), ACTION_VERBS[action.group(2)]
+        terms.update((f"{verb}:{player}", f"action:{verb}"))
+        if verb == 'fold':
+            folded.add(player)
+        elif verb == 'win':
+            amount = COLLECTED_PATTERN.search(entry)
+            facts.pot += float(amount.group(1)) if amount else 0.0
+        if 'all in' in entry.lower():
+            terms.update((f"allin:{player}", 'action:allin'))
+
+    terms.update(f"player:{player}" for player in dealt)
+    if len(dealt - folded) >= 2:
+        terms.add('street:showdown')
+    return facts
+
+
+def bitsets(rows: np.ndarray, positions: np.ndarray, count: int, size: int) -> np.ndarray:
+    """(count x bytes) bitsets with the bit of each (row, position) pair set."""
+    width = (size + 7) // 8
+    bits = np.zeros(count * width, dtype=np.uint8)
+    rows, positions = np.asarray(rows, dtype=np.int64), np.asarray(positions, dtype=np.int64)
+    np.bitwise_or.at(bits, rows * width + (positions >> 3), (128 >> (positions & 7)).astype(np.uint8))
+    return bits.reshape(count, width)
+
+
+def bitset(hand_positions: np.ndarray, size: int) -> np.ndarray:
+    return bitsets(np.zeros(len(hand_positions)), hand_positions, 1, size)[0]
+
+
+def positions(bits: np.ndarray, size: int) -> np.ndarray:
+    """Set positions of a bitset."""
+    return np.flatnonzero(np.unpackbits(bits, count=size))
+
+
+class HandIndex:
+    """Posting bitsets of search terms over hands, built from logs or session rollups and saved as a .npz file."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.terms = {str(term): i for i, term in enumerate(arrays['terms'].tolist())}
+        self.everything = np.packbits(np.ones(len(self), dtype=bool))  # Also clears the padding bits after NOT
+
+    def __len__(self) -> int:
+        return len(self.arrays['hand_numbers'])
+
+    @classmethod
+    def from_postings(cls, hands: List[Tuple[str, int, str, str, float]], postings: Dict[str, List[np.ndarray]]) -> 'HandIndex':
+        """From (log, hand number, hand id, game type, pot) per hand and the hand positions of each term."""
+        logs = sorted({hand[0] for hand in hands})
+        game_types = sorted({hand[3] for hand in hands})
+        log_index = {log: i for i, log in enumerate(logs)}
+        game_type_index = {game_type: i for i, game_type in enumerate(game_types)}
+        terms = sorted(postings)
+        term_positions = [np.concatenate(postings[term]) if postings[term] else np.zeros(0, dtype=np.int64) for term in terms]
+
+        pots = np.array([hand[4] for hand in hands], dtype=np.float64)
+        buckets = np.searchsorted(POT_EDGES, pots, side='right') - 1
+        return cls({
+            'version': np.array(INDEX_VERSION, dtype=np.int64),
+            'terms': np.array(terms, dtype=str),
+            'bitsets': bitsets(
+                np.repeat(np.arange(len(terms)), [len(found) for found in term_positions]),
+                np.concatenate(term_positions) if terms else np.zeros(0, dtype=np.int64),
+                len(terms),
+                len(hands)
+            ),
+            'pot_bitsets': bitsets(buckets, np.arange(len(hands)), len(POT_EDGES), len(hands)),
+            'logs': np.array(logs, dtype=str),
+            'log_idx': np.array([log_index[hand[0]] for hand in hands], dtype=np.int32),
+            'game_types': np.array(game_types, dtype=str),
+            'game_type_idx': np.array([game_type_index[hand[3]] for hand in hands], dtype=np.uint8),
+            'hand_numbers': np.array([hand[1] for hand in hands], dtype=np.int32),
+            'hand_ids': np.array([hand[2] for hand in hands], dtype=str),
+            'pots': pots
+        })
+
+    @classmethod
+    def from_logs(cls, log_files: Iterable[str]) -> 'HandIndex':
+        hands: List[tuple] = []
+        found: Dict[str, List[int]] = {}
+        for log_file in log_files:
+            log = os.path.basename(log_file)
+            for facts in filter(None, map(extract_facts, read_hands(log_file))):
+                for term in facts.terms:
+                    found.setdefault(term, []).append(len(hands))
+                hands.append((log, facts.hand_number, facts.hand_id, facts.game_type, facts.pot))
+        return cls.from_postings(hands, {term: [np.array(hand_positions)] for term, hand_positions in found.items()})
+
+    @classmethod
+    def from_posting_lists(cls, sessions: Iterable[Dict]) -> 'HandIndex':
+        """Concatenate the posting_lists output of several sessions, labeled by their 'log'."""
+        hands: List[tuple] = []
+        postings: Dict[str, List[np.ndarray]] = {}
+        for session in sessions:
+            offset = len(hands)
+            size = len(session['hand_numbers'])
+            hands.extend(zip(
+                [session.get('log', '')] * size,
+                session['hand_numbers'],
+                session['hand_ids'].split(),
+                [session['game_types'][i] for i in session['game_type_idx']],
+                session['pots']
+            ))
+            for term, posting in session['postings'].items():
+                found = (
+                    positions(np.frombuffer(base64.b64decode(posting), dtype=np.uint8), size)
+                    if isinstance(posting, str) else np.asarray(posting, dtype=np.int64)
+                )
+                postings.setdefault(term, []).append(found + offset)
+        return cls.from_postings(hands, postings)
+
+    @classmethod
+    def load(cls, path: str) -> 'HandIndex':
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        if int(arrays['version']) != INDEX_VERSION:
+            raise ValueError(f"Unsupported hand index version {int(arrays['version'])} in {path}")
+        return cls(arrays)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_npz(self.arrays, path)
+
+    def posting(self, term: str) -> np.ndarray:
+        """Bitset of a term, empty for terms that never occur."""
+        key, _, value = term.partition(':')
+        if key not in TERM_KEYS:
+            raise ValueError(f"Unknown search term {term!r}, expected one of {', '.join(f'{key}:' for key in TERM_KEYS)}")
+        value = value.strip('"').strip()
+        row = self.terms.get(f"{key}:{value}")
+        return self.arrays['bitsets'][row] if row is not None else np.zeros_like(self.everything)
+
+    def pot_range(self, comparison: str, value: float) -> np.ndarray:
+        """Bitset of the hands whose pot compares to value: whole buckets, then the value's bucket hand by hand."""
+        compare = RANGE_OPERATORS[comparison]
+        bucket = max(int(np.searchsorted(POT_EDGES, value, side='right')) - 1, 0)
+        pot_bitsets = self.arrays['pot_bitsets']
+        whole = range(bucket + 1, len(POT_EDGES)) if comparison in ('>', '>=') else \
+            range(0, bucket) if comparison in ('<', '<=') else range(0)
+        bits = np.bitwise_or.reduce(pot_bitsets[list(whole)], axis=0) if len(whole) else np.zeros_like(self.everything)
+        edge = positions(pot_bitsets[bucket], len(self))
+        return bits | bitset(edge[compare(self.arrays['pots'][edge], value)], len(self))
+
+    def evaluate(self, query: str) -> np.ndarray:
+        """
+        Bitset of the hands matching a query: terms and pot ranges (pot>500, pot<=40)
+        combined with AND, OR, NOT and parentheses. Adjacent terms are ANDed.
+        """
+        tokens = []
+        for match in TOKEN_PATTERN.finditer(query):
+            kind = match.lastgroup
+            text = match.group(kind)
+            if kind == 'word' and text.upper() not in ('AND', 'OR', 'NOT'):
+                raise ValueError(f"Unexpected {text!r} in query, expected key:value, a pot range or AND, OR, NOT")
+            tokens.append((kind, text.upper() if kind == 'word' else text))
+        if not tokens:
+            raise ValueError("Empty query")
+        at = 0
+
+        def peek() -> Optional[Tuple[str, str]]:
+            return tokens[at] if at < len(tokens) else None
+
+        def either() -> np.ndarray:
+            nonlocal at
+            bits = both()
+            while peek() == ('word', 'OR'):
+                at += 1
+                bits = bits | both()
+            return bits
+
+        def both() -> np.ndarray:
+            nonlocal at
+            bits = single()
+            while peek() is not None and peek() not in (('word', 'OR'), ('paren', ')')):
+                if peek() == ('word', 'AND'):
+                    at += 1
+                bits = bits & single()
+            return bits
+
+        def single() -> np.ndarray:
+            nonlocal at
+            token = peek()
+            if token is None:
+                raise ValueError("Query ends early")
+            at += 1
+            kind, text = token
+            if token == ('word', 'NOT'):
+                return ~single() & self.everything
+            if token == ('paren', '('):
+                bits = either()
+                if peek() != ('paren', ')'):
+                    raise ValueError("Missing ) in query")
+                at += 1
+                return bits
+            if kind == 'term':
+                return self.posting(text.lower())
+            if kind == 'range':
+                comparison, value = re.fullmatch(r'pot\s*(>=|<=|>|<|=)\s*([\d.]+)', text, re.IGNORECASE).groups()
+                return self.pot_range(comparison, float(value))
+            raise ValueError(f"Unexpected {text!r} in query")
+
+        bits = either()
+        if at < len(tokens):
+            raise ValueError(f"Unexpected {tokens[at][1]!r} in query")
+        return bits
+
+    def search(self, query: str) -> np.ndarray:
+        """Positions of the hands matching a query, in index order."""
+        return positions(self.evaluate(query), len(self))
+
+    def row(self, i: int) -> Dict:
+        return {
+            'log': str(self.arrays['logs'][self.arrays['log_idx'][i]]),
+            'hand_number': int(self.arrays['hand_numbers'][i]),
+            'hand_id': str(self.arrays['hand_ids'][i]),
+            'game_type': str(self.arrays['game_types'][self.arrays['game_type_idx'][i]]),
+            'pot': float(self.arrays['pots'][i])
+        }
+
+
+def posting_lists(hands: Iterable[List[List[str]]]) -> Dict:
+    """
+    JSON-friendly postings of one session's hands (read_hands output), stored with its
+    rollup. Hands are columns like the .npz arrays, with the hand ids space-separated,
+    and each term's posting is a list of hand positions, or a base64 bitset once that
+    is smaller.
+    """
+    facts = [found for found in map(extract_facts, hands) if found]
+    game_types = sorted({hand.game_type for hand in facts})
+    found: Dict[str, List[int]] = {}
+    for position, hand in enumerate(facts):
+        for term in hand.terms:
+            found.setdefault(term, []).append(position)
+
+    postings: Dict[str, object] = {}
+    for term, hand_positions in sorted(found.items()):
+        if len(hand_positions) * SPARSE_POSTING < len(facts):
+            postings[term] = hand_positions
+        else:
+            postings[term] = base64.b64encode(bitset(hand_positions, len(facts)).tobytes()).decode('ascii')
+    return {
+        'version': INDEX_VERSION,
+        'hand_numbers': [hand.hand_number for hand in facts],
+        'hand_ids': ' '.join(hand.hand_id for hand in facts),
+        'game_types': game_types,
+        'game_type_idx': [game_types.index(hand.game_type) for hand in facts],
+        'pots': [int(hand.pot) if hand.pot.is_integer() else hand.pot for hand in facts],
+        'postings': postings
+    }
+
+
+def format_row(row: Dict) -> Tuple[str, ...]:
+    return (row['log'], f"#{row['hand_number']} ({row['hand_id']})", row['game_type'], f"{row['pot']:g}")
@@ -0,0 +1,316 @@
+import io
+import os
+import queue
+import re
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+# A log source is either a path or an already open text stream, such as a member
+# of an uploaded archive decoded in memory.
+LogSource = Union[str, TextIO]
+
+# Logs may be stored compressed. The format is detected from the file's magic bytes, so
+# uploads saved to suffix-less temp files are recognised too. Decompression runs on a
+# background thread a few chunks ahead of the parser; the gzip, lzma and zstandard
+# decoders release the GIL, so decoding overlaps with parsing.
+MAGIC_GZIP = b'\x1f\x8b'
+MAGIC_XZ = b'\xfd7zXZ\x00'
+MAGIC_ZSTD = b'\x28\xb5\x2f\xfd'
+FRAME_HEADER_SIZE_MAX = 18  # Largest zstd frame header, which holds the dictionary id
+COMPRESSED_SUFFIXES = ('.gz', '.xz', '.zst')
+LOG_SUFFIXES = ('.csv',) + tuple('.csv' + suffix for suffix in COMPRESSED_SUFFIXES)
+
+# Zstandard dictionaries written by `compact` are stored next to the logs as
+# pokernow-<dictionary id>.zdict. Every frame records the id of its dictionary, so
+# logs compacted at different times can share a directory.
+DICTIONARY_PATTERN = 'pokernow-{}.zdict'
+DICTIONARY_SUFFIX = '.zdict'
+DICTIONARY_SIZE = 112 * 1024
+DICTIONARY_SAMPLE_SIZE = 16 * 1024  # Logs are split into samples of about this size for training
+# Logs compress about 8x on their own, so below this much input the compressed logs are
+# smaller than the dictionary and it can't pay for itself
+DICTIONARY_MIN_INPUT = 8 * DICTIONARY_SIZE
+COMPACT_LEVEL = 19
+
+READ_CHUNK_SIZE = 1024 * 1024
+READ_AHEAD_CHUNKS = 4
+
+LOG_PREFIX = 'poker_now_log_'
+# Browsers suffix repeat downloads, and players save exports under their name: "... (Alwin)"
+COPY_SUFFIX_PATTERN = re.compile(r'\s*\([^)]*\)$')
+
+
+class ThreadedReader(io.RawIOBase):
+    """Read a binary stream on a background thread, up to `depth` chunks ahead of the consumer."""
+
+    def __init__(self, raw: BinaryIO, chunk_size: int = READ_CHUNK_SIZE, depth: int = READ_AHEAD_CHUNKS):
+        self._queue: queue.Queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._chunk = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._fill, args=(raw, chunk_size), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self, raw: BinaryIO, chunk_size: int) -> None:
+        try:
+            while True:
+                chunk = raw.read(chunk_size)
+                if not self._put(chunk) or not chunk:
+                    break
+        except Exception as e:
+            self._put(e)
+        finally:
+            raw.close()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._chunk:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._chunk = memoryview(item)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+    def close(self) -> None:
+        self._stop.set()
+        super().close()
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """'gzip', 'xz' or 'zstd' from a file's magic bytes, or None for plain text."""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    if head.startswith(MAGIC_GZIP):
+        return 'gzip'
+    if head.startswith(MAGIC_XZ):
+        return 'xz'
+    if head.startswith(MAGIC_ZSTD):
+        return 'zstd'
+    return None
+
+
+# Dictionary path -> loaded dictionary. The dictionary keeps its prepared
+# decompression tables, which cost more to build than a small log takes to decode.
+_dictionaries: Dict[str, object] = {}
+
+
+def dictionary_path(directory: str, dict_id: int) -> str:
+    return os.path.join(directory, DICTIONARY_PATTERN.format(dict_id))
+
+
+def load_dictionary(path: str):
+    """The zstd dictionary a .zst log was compressed with, or None if it used none."""
+    import zstandard
+
+    with open(path, 'rb') as f:
+        dict_id = zstandard.get_frame_parameters(f.read(FRAME_HEADER_SIZE_MAX)).dict_id
+    if not dict_id:
+        return None
+    dict_path = dictionary_path(os.path.dirname(os.path.abspath(path)), dict_id)
+    if dict_path not in _dictionaries:
+        if not os.path.exists(dict_path):
+            raise FileNotFoundError(f"Dictionary {dict_path} needed by {path} not found")
+        with open(dict_path, 'rb') as f:
+            _dictionaries[dict_path] = zstandard.ZstdCompressionDict(f.read())
+    return _dictionaries[dict_path]
+
+
+def open_binary(path: str) -> BinaryIO:
+    """Open a log file as a decompressed binary stream, whatever its compression."""
+    compression = detect_compression(path)
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'rb')
+    if compression == 'xz':
+        import lzma
+        return lzma.open(path, 'rb')
+    if compression == 'zstd':
+        import zstandard
+        dictionary = load_dictionary(path)
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary) if dictionary else zstandard.ZstdDecompressor()
+        return decompressor.stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+@contextmanager
+def open_log(source: LogSource) -> Iterator[TextIO]:
+    """
+    Open a log source for reading from its start. Paths are opened and closed here,
+    decompressing .gz, .xz and .zst logs on a background thread; streams are rewound,
+    so the same stream can be read more than once, and left open.
+    """
+    if isinstance(source, str):
+        if detect_compression(source) is None:
+            with open(source, 'r', encoding='utf-8') as f:
+                yield f
+        else:
+            reader = io.BufferedReader(ThreadedReader(open_binary(source)), buffer_size=READ_CHUNK_SIZE)
+            with io.TextIOWrapper(reader, encoding='utf-8') as f:
+                yield f
+    else:
+        source.seek(0)
+        yield source
+
+
+def log_name(source: LogSource) -> str:
+    """Name of a log source for reports: its path, or the stream's name if it has one."""
+    if isinstance(source, str):
+        return source
+    return getattr(source, 'name', None) or '<stream>'
+
+
+def log_stem(path: str) -> str:
+    """File name of a log without its .csv and compression suffixes."""
+    name = os.path.basename(path)
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return name[:-len('.csv')] if name.endswith('.csv') else os.path.splitext(name)[0]
+
+
+def game_id(path: str) -> str:
+    """PokerNow game id of an export, from its file name. Repeat exports share it."""
+    stem = COPY_SUFFIX_PATTERN.sub('', log_stem(path))
+    return stem[len(LOG_PREFIX):] if stem.startswith(LOG_PREFIX) else stem
+
+
+def find_logs(paths: Iterable[str]) -> List[str]:
+    """Expand directories into the plain and compressed logs they contain, sorted by path."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path) if name.endswith(LOG_SUFFIXES))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def _read_all(path: str) -> bytes:
+    with open_binary(path) as f:
+        return f.read()
+
+
+def _samples(content: bytes, size: int = DICTIONARY_SAMPLE_SIZE) -> List[bytes]:
+    """Split a log into samples of about `size` bytes, cut at line ends."""
+    samples = []
+    start = 0
+    while start < len(content):
+        end = content.find(b'\n', start + size)
+        end = len(content) if end == -1 else end + 1
+        samples.append(content[start:end])
+        start = end
+    return samples
+
+
+def train_dictionary(paths: Iterable[str], dict_size: int = DICTIONARY_SIZE):
+    """Train a zstd dictionary on samples of the given logs."""
+    return _train(map(_read_all, paths), dict_size)
+
+
+def _train(contents: Iterable[bytes], dict_size: int = DICTIONARY_SIZE):
+    import zstandard
+
+    samples = [sample for content in contents for sample in _samples(content)]
+    return zstandard.train_dictionary(dict_size, samples)
+
+
+def _compress_all(contents: Dict[str, bytes], level: int, dictionary=None) -> Dict[str, bytes]:
+    """Compress each log and check that it round-trips."""
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+    compressed = {}
+    for source, content in contents.items():
+        compressed[source] = compressor.compress(content)
+        if decompressor.decompress(compressed[source]) != content:
+            raise ValueError(f"Compressing {source} did not round-trip")
+    return compressed
+
+
+def compact(
+    paths: Iterable[str],
+    output_dir: Optional[str] = None,
+    level: int = COMPACT_LEVEL,
+    replace: bool = False,
+    progress: Optional[Callable[[str, int, int], None]] = None
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Recompress logs (plain or compressed) as .csv.zst in the output directory (default:
+    next to each log). A dictionary is trained on the logs of a directory, given at least
+    DICTIONARY_MIN_INPUT bytes of them, and kept as pokernow-<id>.zdict if the logs and
+    the dictionary together are smaller than the logs compressed without one.
+    Every output is decompressed and compared with its source before any file is
+    replaced, and sources are only removed with replace=True.
+    Returns {output path: (source bytes, compressed bytes)}, including a written
+    dictionary as (0, dictionary bytes); progress, if given, is called as
+    progress(output path, source bytes, compressed bytes) for each of them.
+    """
+    paths = [path for path in paths if not path.endswith(DICTIONARY_SUFFIX)]
+    by_dir: Dict[str, List[str]] = {}
+    for path in paths:
+        directory = output_dir or os.path.dirname(os.path.abspath(path))
+        by_dir.setdefault(directory, []).append(path)
+
+    results = {}
+    for directory, sources in by_dir.items():
+        os.makedirs(directory, exist_ok=True)
+        contents = {source: _read_all(source) for source in sources}
+        compressed = _compress_all(contents, level)
+        dictionary = None
+        if sum(map(len, contents.values())) >= DICTIONARY_MIN_INPUT:
+            dictionary = _train(contents.values())
+            with_dictionary = _compress_all(contents, level, dictionary)
+            if sum(map(len, with_dictionary.values())) + len(dictionary.as_bytes()) < \
+                    sum(map(len, compressed.values())):
+                compressed = with_dictionary
+            else:
+                dictionary = None
+
+        pending = []
+        for source, content in contents.items():
+            output = os.path.join(directory, log_stem(source) + '.csv.zst')
+            with open(output + '.tmp', 'wb') as f:
+                f.write(compressed[source])
+            pending.append((source, output, len(content), len(compressed[source])))
+
+        if dictionary is not None:
+            # The dictionary is in place before any log that needs it
+            dict_path = dictionary_path(directory, dictionary.dict_id())
+            with open(dict_path + '.tmp', 'wb') as f:
+                f.write(dictionary.as_bytes())
+            os.replace(dict_path + '.tmp', dict_path)
+            results[dict_path] = (0, len(dictionary.as_bytes()))
+            if progress:
+                progress(dict_path, 0, len(dictionary.as_bytes()))
+
+        for source, output, source_size, compressed_size in pending:
+            os.replace(output + '.tmp', output)
+            if replace and os.path.abspath(source) != os.path.abspath(output):
+                os.unlink(source)
+            results[output] = (source_size, compressed_size)
+            if progress:
+                progress(output, source_size, compressed_size)
+    return results
@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from log_io import LOG_PREFIX, LOG_SUFFIXES, game_id, open_log
+from poker_analyzer import ParseReport, PokerAnalyzer, hand_id, write_stats_csv
+from poker_partials import (
+    PARTIAL_SUFFIX, build_partial, merge_partials, partial_to_analyzer, read_partial, write_npz
+)
+
+# Ingest daemon: watches a directory that PokerNow exports are dropped into and keeps
+# one partial aggregate per game plus a stats CSV up to date.
+#
+#   events:   inotify through watchdog when it is installed, otherwise polling the directory
+#   debounce: a log is only parsed once its size and mtime have been stable for `settle` seconds
+#   dedupe:   every export of a game repeats its earlier hands, so each game's partial also
+#             records the ids of the hands it holds and later exports only add the new ones;
+#             at startup, logs whose newest hand is in their game's partial aren't parsed again
+#   workers:  logs are parsed on a bounded process pool; at most one log per game is in
+#             flight, and logs that are ready wait their turn while the pool is busy
+#
+# Game partials are written to the state directory as <game id>.npz, so
+# `poker_analyzer.py reduce <state dir>` rebuilds the same stats.
+
+STATE_DIR_NAME = '.ingest'
+SETTLE_SECONDS = 2.0
+POLL_SECONDS = 1.0
+MAX_QUEUED_PER_WORKER = 2  # Logs submitted to the pool per worker before new ones have to wait
+
+Signature = Tuple[int, int]  # (size, mtime in ns)
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def is_log(path: str) -> bool:
+    return os.path.basename(path).startswith(LOG_PREFIX) and path.endswith(LOG_SUFFIXES)
+
+
+def newest_hand_id(path: str) -> Optional[str]:
+    """Id of the newest hand of a log, from its first "starting hand" row (logs are newest first)."""
+    with open_log(path) as f:
+        for line in f:
+            if 'starting hand' in line:
+                return hand_id(line)
+    return None
+
+
+def ingest_log(path: str, seen_hands: Set[str]) -> Tuple[Dict[str, np.ndarray], List[str], ParseReport]:
+    """
+    Parse the hands of a log that aren't in seen_hands. Returns their partial aggregate,
+    the ids of the hands found and the parse report. Runs in the daemon's worker pool.
+    """
+    analyzer = PokerAnalyzer()
+    seen = set(seen_hands)
+    report = analyzer.parse_log(path, seen_hands=seen)
+    return build_partial(analyzer), sorted(seen - seen_hands), report
+
+
+class IngestDaemon:
+    """
+    Keep per-game partials and a stats CSV in sync with the logs in a directory.
+    Call run() to watch until stop() is called, or poll()/wait() to drive it by hand.
+    """
+
+    def __init__(
+        self,
+        watch_dir: str,
+        stats_file: str = 'stats.csv',
+        state_dir: Optional[str] = None,
+        workers: int = 2,
+        settle: float = SETTLE_SECONDS,
+        interval: float = POLL_SECONDS,
+        log: Callable[[str], None] = print
+    ):
+        self.watch_dir = watch_dir
+        self.stats_file = stats_file
+        self.state_dir = state_dir or os.path.join(watch_dir, STATE_DIR_NAME)
+        self.workers = workers
+        self.settle = settle
+        self.interval = interval
+        self.log = log
+
+        self.partials: Dict[str, Dict[str, np.ndarray]] = {}  # Game id -> partial with its 'hand_ids'
+        self.changed: Dict[str, Tuple[Signature, float]] = {}  # Path -> (signature, monotonic time it was seen)
+        self.ingested: Dict[str, Signature] = {}  # Path -> signature it was parsed at
+        self.running: Dict[str, Tuple[str, Signature, Future]] = {}  # Game id -> (path, signature, job)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        for name in sorted(os.listdir(self.state_dir)):
+            if name.endswith(PARTIAL_SUFFIX):
+                self.partials[name[:-len(PARTIAL_SUFFIX)]] = read_partial(os.path.join(self.state_dir, name))
+        self._restore_ingested()
+
+    def _restore_ingested(self) -> None:
+        """
+        Mark the logs ingested before a restart: those whose newest hand is in their game's
+        partial. A newest hand that hadn't ended isn't recorded, so those logs are parsed again.
+        """
+        hand_ids: Dict[str, Set[str]] = {}
+        for name in os.listdir(self.watch_dir):
+            path = os.path.join(self.watch_dir, name)
+            game = game_id(path)
+            if not is_log(path) or game not in self.partials:
+                continue
+            if game not in hand_ids:
+                hand_ids[game] = self._hand_ids(game)
+            signature = file_signature(path)
+            if signature is not None and newest_hand_id(path) in hand_ids[game]:
+                self.ingested[path] = signature
+
+    # Change detection
+
+    def notify(self, path: str) -> None:
+        """Note that a file may have changed, restarting its settle time if it did."""
+        if not is_log(path):
+            return
+        signature = file_signature(path)
+        with self._lock:
+            if signature is None or signature == self.ingested.get(path):
+                self.changed.pop(path, None)
+            elif path not in self.changed or self.changed[path][0] != signature:
+                self.changed[path] = (signature, time.monotonic())
+
+    def scan(self) -> None:
+        """Notify every log in the watched directory, for polling and for logs present at startup."""
+        for name in os.listdir(self.watch_dir):
+            self.notify(os.path.join(self.watch_dir, name))
+
+    def ready(self, now: float) -> List[str]:
+        """Changed logs that have settled and whose game has no log in flight, oldest first."""
+        with self._lock:
+            changed = sorted(self.changed.items(), key=lambda item: item[1][1])
+        paths = []
+        games = set(self.running)
+        for path, (signature, seen_at) in changed:
+            if now - seen_at < self.settle or game_id(path) in games:
+                continue
+            if file_signature(path) != signature:
+                self.notify(path)  # Still being written, events aren't guaranteed on every filesystem
+                continue
+            paths.append(path)
+            games.add(game_id(path))
+        return paths
+
+    # Ingestion
+
+    def _hand_ids(self, game: str) -> Set[str]:
+        partial = self.partials.get(game)
+        return set(partial['hand_ids'].tolist()) if partial is not None else set()
+
+    def submit(self, now: Optional[float] = None) -> int:
+        """Start parsing settled logs while the pool has room. Returns the number started."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        started = 0
+        for path in self.ready(time.monotonic() if now is None else now):
+            if len(self.running) >= self.workers * MAX_QUEUED_PER_WORKER:
+                break  # Backpressure: the rest stay pending until jobs finish
+            with self._lock:
+                signature, _ = self.changed.pop(path, (None, None))
+            if signature is None:
+                continue  # Removed meanwhile
+            game = game_id(path)
+            self.running[game] = (path, signature, self._executor.submit(ingest_log, path, self._hand_ids(game)))
+            started += 1
+        return started
+
+    def collect(self, block: bool = False) -> int:
+        """Merge finished jobs into their game partials and rewrite the stats. Returns the number merged."""
+        merged = 0
+        for game, (path, signature, job) in list(self.running.items()):
+            if not block and not job.done():
+                continue
+            del self.running[game]
+            try:
+                delta, hand_ids, report = job.result()
+            except Exception as e:
+                self.log(f"{os.path.basename(path)}: failed, {type(e).__name__}: {e}")
+                self.ingested[path] = signature  # Retried once the file changes again
+                continue
+            self.ingested[path] = signature
+            self.log(report.summary())
+            if hand_ids:
+                self._merge(game, delta, hand_ids)
+                merged += 1
+        if merged:
+            self.write_stats()
+        return merged
+
+    def _merge(self, game: str, delta: Dict[str, np.ndarray], hand_ids: List[str]) -> None:
+        hand_ids = sorted(self._hand_ids(game).union(hand_ids))
+        previous = self.partials.get(game)
+        partial = merge_partials([previous, delta]) if previous is not None else delta
+        partial['hand_ids'] = np.array(hand_ids, dtype=str)
+        write_npz(partial, os.path.join(self.state_dir, game + PARTIAL_SUFFIX))
+        self.partials[game] = partial
+
+    def write_stats(self) -> None:
+        """Write the stats of all games, replacing the stats file in one step."""
+        analyzer = partial_to_analyzer(merge_partials(
+            self.partials[game] for game in sorted(self.partials)
+        ))
+        tmp_path = self.stats_file + '.tmp'
+        write_stats_csv(analyzer.get_stats(), tmp_path)
+        os.replace(tmp_path, self.stats_file)
+
+    def poll(self, now: Optional[float] = None) -> None:
+        """One step of the daemon: merge finished jobs and start settled ones."""
+        self.collect()
+        self.submit(now)
+
+    def wait(self) -> None:
+        """Parse every changed log now, ignoring the settle time, merge the results and write the stats."""
+        self.scan()
+        merged = 0
+        while True:
+            self.submit(float('inf'))
+            if not self.running:
+                break
+            merged += self.collect(block=True)
+        if not merged:
+            self.write_stats()  # Already up to date, but the stats file may not exist yet
+
+    # Watching
+
+    def _start_observer(self):
+        """A watchdog observer feeding notify, or None to fall back to polling."""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+
+        daemon = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    daemon.notify(getattr(event, 'dest_path', None) or event.src_path)
+
+        observer = Observer()
+        observer.schedule(Handler(), self.watch_dir, recursive=False)
+        observer.start()
+        return observer
+
+    def run(self) -> None:
+        """Watch the directory until stop() is called."""
+        observer = self._start_observer()
+        self.log(f"Watching {self.watch_dir} ({'inotify' if observer else 'polling'}), stats in {self.stats_file}")
+        self.write_stats()  # From the stored partials, later writes only follow new hands
+        self.scan()
+        try:
+            while not self._stop.wait(self.interval):
+                if observer is None:
+                    self.scan()
+                self.poll()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        """Wait for running jobs, merge them and shut the pool down."""
+        self.collect(block=True)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def ingest(watch_dir: str, **kwargs) -> IngestDaemon:
+    """Ingest the logs currently in a directory once, without watching."""
+    daemon = IngestDaemon(watch_dir, **kwargs)
+    try:
+        daemon.wait()
+    finally:
+        daemon.close()
+    return daemon
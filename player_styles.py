@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Playing styles as points: one feature vector per player from get_stats, each feature
+# standardized over the players (z-scores) so rates in percent and AF weigh alike.
+# Similar players are the nearest points by Euclidean distance, computed for a block
+# of players at a time as |a|^2 + |b|^2 - 2ab against the whole matrix, and styles are
+# grouped with k-means. PokerNow ids change between games, so near-identical styles
+# under different names are candidate alternate accounts.
+#
+# Rates are only meaningful over enough hands, so players with fewer than
+# `min_hands` hands in the chosen context are left out.
+
+STYLE_FEATURES = ('VPIP', 'PFR', 'AF', 'WTSD', '3Bets', '4Bets', '5Bets')
+PER_100_FEATURES = ('3Bets', '4Bets', '5Bets')  # Counters, taken per 100 hands
+MIN_STYLE_HANDS = 50
+DISTANCE_BLOCK = 1024  # Rows of the distance matrix computed at once
+KMEANS_ITERATIONS = 100
+ALT_DISTANCE = 0.75  # Closest pairs under this distance (in standard deviations) are reported as alts
+
+
+def style_vector(context_stats: Dict[str, float]) -> List[float]:
+    hands = context_stats['Hands']
+    return [
+        context_stats[name] / hands * 100 if name in PER_100_FEATURES else context_stats[name]
+        for name in STYLE_FEATURES
+    ]
+
+
+@dataclass
+class StyleSpace:
+    """Standardized style vectors of the players with enough hands in one context."""
+    players: List[str]
+    features: np.ndarray  # (players x STYLE_FEATURES), in stat units
+    hands: np.ndarray
+    center: np.ndarray  # Mean of each feature
+    scale: np.ndarray  # Standard deviation of each feature, 1 where it doesn't vary
+
+    @classmethod
+    def from_stats(
+        cls,
+        stats: Dict[str, Dict[str, Dict[str, float]]],
+        context: Optional[str] = None,
+        min_hands: int = MIN_STYLE_HANDS
+    ) -> 'StyleSpace':
+        """From get_stats output, overall or in one combined context such as "PLO_6h"."""
+        players, rows, hands = [], [], []
+        for player, contexts in sorted(stats.items()):
+            context_stats = contexts['overall'] if context is None else contexts['by_combined'].get(context)
+            if context_stats and context_stats['Hands'] >= min_hands:
+                players.append(player)
+                rows.append(style_vector(context_stats))
+                hands.append(context_stats['Hands'])
+        features = np.array(rows, dtype=np.float64).reshape(-1, len(STYLE_FEATURES))
+        center = features.mean(axis=0) if len(players) else np.zeros(len(STYLE_FEATURES))
+        scale = features.std(axis=0) if len(players) else np.ones(len(STYLE_FEATURES))
+        scale[scale == 0] = 1
+        return cls(players, features, np.array(hands, dtype=np.int64), center, scale)
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    @property
+    def points(self) -> np.ndarray:
+        return (self.features - self.center) / self.scale
+
+    def distances(self, rows: np.ndarray) -> np.ndarray:
+        """Distances from the given points (rows x features) to every player."""
+        points = self.points
+        squared = (rows * rows).sum(axis=1)[:, None] + (points * points).sum(axis=1)[None, :] - 2 * rows @ points.T
+        return np.sqrt(np.maximum(squared, 0))
+
+    def similar(self, player: str, count: int = 5) -> List[Tuple[str, float]]:
+        """The count players with the closest style to a player, closest first."""
+        i = self.players.index(player)
+        distances = self.distances(self.points[i:i + 1])[0]
+        distances[i] = np.inf
+        count = min(count, len(self) - 1)
+        if count <= 0:
+            return []
+        nearest = np.argpartition(distances, count - 1)[:count]
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return [(self.players[j], float(distances[j])) for j in nearest.tolist()]
+
+    def nearest(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of and distance to every player's nearest other player, one block of rows at a time."""
+        points = self.points
+        nearest = np.zeros(len(self), dtype=np.int64)
+        distances = np.full(len(self), np.inf)
+        for start in range(0, len(self), DISTANCE_BLOCK):
+            block = self.distances(points[start:start + DISTANCE_BLOCK])
+            rows = np.arange(len(block))
+            block[rows, rows + start] = np.inf
+            nearest[start:start + len(block)] = block.argmin(axis=1)
+            distances[start:start + len(block)] = block[rows, nearest[start:start + len(block)]]
+        return nearest, distances
+
+    def alt_candidates(self, max_distance: float = ALT_DISTANCE) -> List[Tuple[str, str, float]]:
+        """
+        Pairs of players that are each other's nearest style within max_distance,
+        closest first: candidates for one person playing under two names.
+        """
+        if len(self) < 2:
+            return []
+        nearest, distances = self.nearest()
+        mutual = np.flatnonzero((nearest[nearest] == np.arange(len(self))) & (nearest > np.arange(len(self))))
+        mutual = mutual[distances[mutual] <= max_distance]
+        mutual = mutual[np.argsort(distances[mutual], kind='stable')]
+        return [(self.players[i], self.players[nearest[i]], float(distances[i])) for i in mutual.tolist()]
+
+    def kmeans(self, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cluster the players into k styles with k-means++ seeding. Returns each
+        player's cluster and the cluster centers in stat units.
+        """
+        points = self.points
+        k = min(k, len(self))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, len(STYLE_FEATURES)))
+        rng = np.random.default_rng(seed)
+
+        centers = points[[rng.integers(len(self))]]
+        while len(centers) < k:
+            closest = self.distances(centers).min(axis=0) ** 2
+            weights = closest / closest.sum() if closest.sum() > 0 else None
+            centers = np.vstack([centers, points[rng.choice(len(self), p=weights)]])
+
+        labels = np.full(len(self), -1, dtype=np.int64)
+        for _ in range(iterations):
+            distances = self.distances(centers)  # (k x players)
+            updated = distances.argmin(axis=0)
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+            sizes = np.bincount(labels, minlength=k)
+            sums = np.zeros_like(centers)
+            np.add.at(sums, labels, points)
+            # Restart each empty cluster at another of the points farthest from their center,
+            # moved out of a cluster that keeps others (there is one while any cluster is empty)
+            farthest_first = iter(np.argsort(-distances[labels, np.arange(len(self))], kind='stable').tolist())
+            for empty in np.flatnonzero(sizes == 0).tolist():
+                farthest = next(i for i in farthest_first if sizes[labels[i]] > 1)
+                sums[labels[farthest]] -= points[farthest]
+                sizes[labels[farthest]] -= 1
+                sums[empty], sizes[empty] = points[farthest], 1
+                labels[farthest] = empty
+            centers = sums / sizes[:, None]
+        return labels, centers * self.scale + self.center
+
+    def clusters(self, k: int, seed: int = 0) -> List[Dict]:
+        """k-means clusters with their center and members (most hands first), largest first."""
+        labels, centers = self.kmeans(k, seed=seed)
+        clusters = []
+        for label, center in enumerate(centers.tolist()):
+            members = np.flatnonzero(labels == label)
+            members = members[np.argsort(-self.hands[members], kind='stable')]
+            clusters.append({
+                'center': dict(zip(STYLE_FEATURES, center)),
+                'players': [self.players[i] for i in members.tolist()]
+            })
+        return sorted(clusters, key=lambda cluster: -len(cluster['players']))
@@ -1,7 +1,76 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Optional, Tuple, Union
 import csv
+import os
 import re
+import sys
+import time
+from datetime import datetime
+from log_io import COMPACT_LEVEL, LogSource, log_name, open_log
+from stat_plugins import END_EVENT, PROFILE_FIELDS, STAT_FIELDS, STAT_PLUGINS, STREET_EVENTS, HandState, classify_action, compile_dispatch, stat_counters
+from timestamps import row_timestamp
+
+PROGRESS_INTERVAL = 50  # Hands between progress callbacks in parse_log
+
+# Bootstrap confidence intervals, see get_intervals
+DEFAULT_RESAMPLES = 2000
+DEFAULT_LEVEL = 0.95
+
+# Share of hands processed by parse_sample, see hand_sampling.py
+DEFAULT_SAMPLE_FRACTION = 0.1
+
+# Parsing engines: 'loop' runs process_hand line by line, 'vectorized' classifies the
+# whole log at once with numpy (see vectorized_engine.py) for large batch jobs
+ENGINES = ('loop', 'vectorized')
+
+CHUNKS_PER_WORKER = 4  # Hands of a log are split into this many chunks per worker
+
+QUARANTINE_HEADERS = ['File', 'First Line', 'Last Line', 'Reason', 'Hand']
+
+PLAYER_PATTERN = re.compile(r'"(.+?) @ [\w-]+"')
+HAND_ID_PATTERN = re.compile(r'starting hand #(\d+) \(id: ([^)]+)\)')
+
+
+@dataclass(frozen=True)
+class GameVariant:
+    name: str  # Short name used in context keys, must not contain '_'
+    markers: Tuple[str, ...] = ()  # Lowercase substrings that must all appear in the "starting hand" line
+
+# Registered game variants, in display order. A hand is filed under the matching
+# variant with the most markers, or under the first variant (NLHE) if none match.
+GAME_VARIANTS: List[GameVariant] = [
+    GameVariant('NLHE'),
+    GameVariant('PLO', ('omaha',)),
+    GameVariant('PLO8', ('omaha', 'hi/lo')),
+    GameVariant('PLO5', ('omaha', '5 card')),
+    GameVariant('PLO5-8', ('omaha', '5 card', 'hi/lo')),
+    GameVariant('SDHE', ('short deck',)),
+]
+
+def register_game_variant(name: str, *markers: str) -> GameVariant:
+    """Register a new game variant detected by the given substrings of the "starting hand" line."""
+    if '_' in name:
+        raise ValueError(f"Game variant name cannot contain '_': {name}")
+    variant = GameVariant(name, tuple(marker.lower() for marker in markers))
+    GAME_VARIANTS.append(variant)
+    return variant
+
+def detect_game_type(starting_line: str) -> str:
+    """Detect the game variant of a hand from its "starting hand" line."""
+    text = starting_line.lower()
+    best = GAME_VARIANTS[0]
+    for variant in GAME_VARIANTS:
+        if len(variant.markers) > len(best.markers) and all(marker in text for marker in variant.markers):
+            best = variant
+    return best.name
+
+def game_type_order(game_type: str) -> int:
+    """Display position of a game type in the registry, unknown types sort last."""
+    for index, variant in enumerate(GAME_VARIANTS):
+        if variant.name == game_type:
+            return index
+    return len(GAME_VARIANTS)
 
 @dataclass
 class PlayerStats:
@@ -20,73 +89,313 @@ class PlayerStats:
     game_type_stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
     table_size_stats: Dict[int, Dict[str, int]] = field(default_factory=dict)
     combined_stats: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    extra_stats: Dict[str, int] = field(default_factory=dict)  # Overall counters of registered stat plugins
+    hand_profiles: Dict[str, Dict[Tuple[int, ...], int]] = field(default_factory=dict)  # Combined context -> PROFILE_FIELDS of a hand -> hands
 
-    def __post_init__(self):
-        """Initialize the nested stats after the object is created"""
-        self.game_type_stats = {
-            'NLHE': self._create_empty_stats(),
-            'PLO': self._create_empty_stats()
-        }
-        
-        self.table_size_stats = {
-            size: self._create_empty_stats()
-            for size in range(2, 11)
-        }
-        
-        self.combined_stats = {
-            f"{game_type}_{size}h": self._create_empty_stats()
-            for game_type in ['NLHE', 'PLO']
-            for size in range(2, 11)
-        }
+    def overall_stats(self) -> Dict[str, int]:
+        """Overall counters of all stats, keyed like the per-context stats."""
+        stats = self._create_empty_stats()
+        stats.update({name: getattr(self, name) for name in STAT_FIELDS}, **self.extra_stats)
+        return stats
+
+    def ensure_context(self, game_type: str, table_size: int) -> None:
+        """Create the nested stats for a game type and table size the first time they are seen."""
+        if game_type not in self.game_type_stats:
+            self.game_type_stats[game_type] = self._create_empty_stats()
+        if table_size not in self.table_size_stats:
+            self.table_size_stats[table_size] = self._create_empty_stats()
+        combined_key = f"{game_type}_{table_size}h"
+        if combined_key not in self.combined_stats:
+            self.combined_stats[combined_key] = self._create_empty_stats()
+
+    def add_context_counts(self, game_type: str, table_size: int, counts: Dict[str, int]) -> None:
+        """
+        Add counters recorded for one game type and table size, updating the
+        overall, game type, table size and combined stats together.
+        """
+        self.ensure_context(game_type, table_size)
+        targets = (
+            self.game_type_stats[game_type],
+            self.table_size_stats[table_size],
+            self.combined_stats[f"{game_type}_{table_size}h"]
+        )
+        for name, value in counts.items():
+            if name in STAT_FIELDS:
+                setattr(self, name, getattr(self, name) + value)
+            else:
+                self.extra_stats[name] = self.extra_stats.get(name, 0) + value
+            for stats in targets:
+                stats[name] = stats.get(name, 0) + value
+
+    def add_hand_profiles(self, game_type: str, table_size: int, profiles: Dict[Tuple[int, ...], int]) -> None:
+        """Count hands by their PROFILE_FIELDS counters, for one game type and table size."""
+        target = self.hand_profiles.setdefault(f"{game_type}_{table_size}h", {})
+        for profile, hands in profiles.items():
+            target[profile] = target.get(profile, 0) + hands
+
+    def profiles(self, context: Optional[str] = None) -> Dict[Tuple[int, ...], int]:
+        """Hands per profile in one combined context, or in all of them."""
+        if context is not None:
+            return dict(self.hand_profiles.get(context, {}))
+        merged: Dict[Tuple[int, ...], int] = {}
+        for profiles in self.hand_profiles.values():
+            for profile, hands in profiles.items():
+                merged[profile] = merged.get(profile, 0) + hands
+        return merged
 
     def _create_empty_stats(self) -> Dict[str, int]:
         """Helper method to create empty stats dictionary."""
-        return {
-            'total_hands': 0,
-            'hands_played': 0,
-            'preflop_raise_hands': 0,
-            'showdown_hands': 0,
-            'three_bet_hands': 0,
-            'four_bet_hands': 0,
-            'five_bet_hands': 0,
-            'flop_hands': 0,
-            'total_bets': 0,
-            'total_raises': 0,
-            'total_calls': 0
-        }
+        return dict.fromkeys(stat_counters(), 0)
+
+def context_order(context: str) -> Tuple[int, int]:
+    """Sort key for combined context keys such as "NLHE_6h": game type, then table size."""
+    game_type, table_info = context.rsplit('_', 1)
+    return game_type_order(game_type), int(table_info[:-1])
+
+@dataclass
+class ParseReport:
+    """Volumes, rejected hands and throughput of parsing one log."""
+    file: str
+    rows: int = 0
+    hands: int = 0  # Hands found, including rejected ones
+    rejected: Dict[str, int] = field(default_factory=dict)  # Rejected hands per reason
+    skipped: int = 0  # Hands already analyzed, see parse_log's seen_hands
+    seconds: float = 0.0
+    
+    @property
+    def rejected_hands(self) -> int:
+        return sum(self.rejected.values())
+    
+    @property
+    def rejection_rate(self) -> float:
+        return self.rejected_hands / self.hands if self.hands else 0.0
+    
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.seconds if self.seconds else 0.0
+    
+    def summary(self) -> str:
+        text = (
+            f"{os.path.basename(self.file)}: {self.hands} hands ({self.rows} rows) in {self.seconds:.2f}s, "
+            f"{self.hands_per_second:.0f} hands/s, {self.rejected_hands} rejected ({self.rejection_rate:.1%})"
+        )
+        if self.rejected:
+            text += ': ' + ', '.join(f"{reason} {count}" for reason, count in sorted(self.rejected.items()))
+        if self.skipped:
+            text += f", {self.skipped} already analyzed"
+        return text
+
+def read_log(filename: LogSource) -> Tuple[List[List[List[str]]], List[Tuple[int, int]], List[Tuple[Tuple[int, int], str]], int]:
+    """
+    Read a PokerNow log (newest entry first) in a single csv pass.
+    
+    Returns (hands, spans, incomplete, rows): the complete hands in play order,
+    each as the list of (entry, at, order) rows from its "starting hand" row to
+    its "ending hand" row; the (first, last) data row index of each hand in file
+    order; the span and "starting hand" entry of each hand that never reached its
+    "ending hand" row; and the number of data rows.
+    filename may also be an open text stream, see log_io.
+    """
+    with open_log(filename) as f:
+        all_lines = list(csv.reader(f))
+    
+    # Skip header
+    all_lines = all_lines[1:]
+    
+    hands = []
+    spans = []
+    incomplete = []
+    current_hand = []
+    hand_start = 0
+    
+    # Collect hands based on "starting hand #" and "ending hand #"
+    for index in range(len(all_lines) - 1, -1, -1):
+        row = all_lines[index]
+        line = row[0] if row else ''
+        
+        if "starting hand #" in line:
+            if current_hand:
+                # The previous hand never ended, don't merge it into this one
+                incomplete.append(((index + 1, hand_start), current_hand[0][0]))
+                current_hand = []
+            hand_start = index
+            current_hand.append(row)
+        
+        if current_hand:
+            current_hand.append(row)  # Add the current line to the ongoing hand
+        
+            if "ending hand #" in line:  # Check for the end of the hand
+                hands.append(current_hand)
+                spans.append((index, hand_start))
+                current_hand = []  # Reset for the next hand
+    
+    if current_hand:
+        incomplete.append(((0, hand_start), current_hand[0][0]))
+    
+    return hands, spans, incomplete, len(all_lines)
+
+def read_hands(filename: LogSource) -> List[List[List[str]]]:
+    """Complete hands of a log in play order, see read_log."""
+    return read_log(filename)[0]
+
+def hand_id(starting_entry: str) -> Optional[str]:
+    """PokerNow's id of a hand, from its "starting hand" entry."""
+    match = HAND_ID_PATTERN.search(starting_entry)
+    return match.group(2) if match else None
+
+def hand_error(hand: List[List[str]]) -> Optional[str]:
+    """Reason a hand (rows from read_log) can't be analyzed, or None if it is well formed."""
+    for row in hand:
+        if len(row) != 3:
+            return 'malformed row'
+    for row in hand:
+        if row[0].startswith('Player stacks:'):
+            return None
+    return 'missing player stacks'
+
+def row_lines(filename: LogSource) -> List[Tuple[int, int]]:
+    """
+    First and last physical line of each data row. Only needed to locate rejected
+    hands, so this is a second pass over the file rather than a cost on every parse.
+    """
+    with open_log(filename) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        lines = []
+        last_line = reader.line_num
+        for _ in reader:
+            lines.append((last_line + 1, reader.line_num))
+            last_line = reader.line_num
+    return lines
+
+def write_quarantine(filename: LogSource, rejected: List[Tuple[Tuple[int, int], str, str]], quarantine: str) -> None:
+    """Append rejected hands, given as ((first row, last row), reason, first entry), to a quarantine CSV."""
+    lines = row_lines(filename)
+    write_header = not os.path.exists(quarantine) or os.path.getsize(quarantine) == 0
+    with open(quarantine, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(QUARANTINE_HEADERS)
+        for (first, last), reason, entry in sorted(rejected):
+            writer.writerow([log_name(filename), lines[first][0], lines[last][1], reason, entry])
+
+def extract_player_name(text: str) -> Optional[str]:
+    """Extract player name from text with error handling."""
+    # Try to match the full "name @ id" pattern first, names may contain quotes
+    match = PLAYER_PATTERN.search(text)
+    if not match:
+        match = re.search(r'"([^"]+)(?:\s*@\s*[^"]+)"', text)
+    if not match:
+        # Try simpler pattern as fallback
+        match = re.search(r'"([^"]+)"', text)
+    
+    if match:
+        name = match.group(1).strip()
+        # Remove any trailing numbers in parentheses and the @ part
+        name = re.sub(r'\s*\(\d+\)\s*$', '', name)
+        name = re.sub(r'\s*@.*$', '', name)
+        return name.strip()
+    return None
+
+@dataclass
+class HandDelta:
+    """What one hand adds to a PokerAnalyzer, computed without touching it."""
+    game_type: str
+    table_size: int
+    seats: List[Tuple[str, int]] = field(default_factory=list)  # (player, table size) per seating, in order
+    counts: Dict[str, Dict[str, int]] = field(default_factory=dict)  # Player -> counter increments
+
+def hand_deltas(hand_lines: List[str], dispatch: Dict[str, Tuple[Callable, ...]]) -> HandDelta:
+    """
+    Process a single hand, given the `entry` column of its rows, into the counter
+    increments of its players. Pure: the result only depends on the lines and the
+    stat handlers in dispatch, so hands can be processed in any order or concurrently
+    and applied with PokerAnalyzer.apply_hand.
+    """
+    # The first line of a hand is its "starting hand" line, which names the game
+    hand = HandState(detect_game_type(hand_lines[0]) if hand_lines else GAME_VARIANTS[0].name)
+    seats = []
+    
+    for line in hand_lines:
+        text = line.strip().lower()
+        
+        if "player stacks:" in text:
+            stack_info = text.split("player stacks:")[1]
+            players = [extract_player_name(stack) for stack in stack_info.split('|')]
+            hand.table_size = len([p for p in players if p])  # Count valid players
+            
+            for player in players:
+                if player:
+                    seats.append((player, hand.table_size))
+                    hand.seated.add(player)
+            continue
+        
+        event = classify_action(text)
+        if event is None:
+            continue
+        
+        # Track street changes
+        if event in STREET_EVENTS:
+            hand.street = event
+            for handler in dispatch.get(event, ()):
+                handler(hand, None)
+            continue
+        
+        # Extract player and action
+        player = extract_player_name(text)
+        if not player or player not in hand.seated:
+            continue
+        
+        # Track preflop actions to determine who sees the flop
+        preflop = hand.street == 'preflop'
+        if preflop:
+            if event == 'fold':
+                hand.folded.add(player)
+                hand.played.discard(player)
+            elif event != 'shows':
+                hand.played.add(player)
+        
+        for handler in dispatch.get(event, ()):
+            handler(hand, player)
+        
+        if preflop and event == 'raise':
+            hand.preflop_raises += 1
+    
+    for handler in dispatch.get(END_EVENT, ()):
+        handler(hand, None)
+    
+    return HandDelta(hand.game_type, hand.table_size, seats, hand.deltas())
+
+def hand_results(hands: Iterable[List[str]], dispatch: Dict[str, Tuple[Callable, ...]]) -> Iterator[Union[HandDelta, str]]:
+    """hand_deltas of each hand, or the error that hand raised as "Type: message"."""
+    for hand_lines in hands:
+        try:
+            yield hand_deltas(hand_lines, dispatch)
+        except Exception as e:
+            yield f"{type(e).__name__}: {e}"
+
+def chunk_results(hands: List[List[str]], plugins: list) -> List[Union[HandDelta, str]]:
+    """hand_results of a chunk of hands, run in a worker of hand_executor."""
+    return list(hand_results(hands, compile_dispatch(plugins)))
+
+def hand_executor(workers: int) -> Executor:
+    """
+    Pool for processing chunks of hands: threads on free-threaded CPython, where they
+    run in parallel, processes otherwise. Stat plugins must be picklable for processes.
+    """
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    if is_gil_enabled is not None and not is_gil_enabled():
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers)
 
 class PokerAnalyzer:
     def __init__(self):
         self.players: Dict[str, PlayerStats] = {}
-        self.current_hand_players: Set[str] = set()
-        self.current_hand_played: Set[str] = set()
-        self.current_hand_raised_preflop: Set[str] = set()
-        self.current_hand_showdown: Set[str] = set()
-        self.current_hand_3bet_preflop: Set[str] = set()
-        self.current_hand_4bet_preflop: Set[str] = set()
-        self.current_hand_5bet_preflop: Set[str] = set()
-
-    def split_text_by_commas(self, text: str) -> tuple[str, str, str]:
-        """
-        Split text into three parts based on the last two commas.
-        Returns (first_part, middle_part, last_part)
-        """
-        # Find the last comma
-        last_comma = text.rfind(',')
-        if last_comma == -1:
-            return text, "", ""
-            
-        # Find the second to last comma
-        second_last_comma = text.rfind(',', 0, last_comma)
-        if second_last_comma == -1:
-            return "", text[:last_comma], text[last_comma + 1:]
-            
-        # Split into three parts
-        first_part = text[:second_last_comma]
-        middle_part = text[second_last_comma + 1:last_comma]
-        last_part = text[last_comma + 1:]
-        
-        return first_part.strip(), middle_part.strip(), last_part.strip()
+        self.context_hands: Dict[str, int] = {}  # Hands dealt per combined context, e.g. "NLHE_6h"
+        self.start_time: Optional[datetime] = None  # Start of the first hand parsed
+        self.end_time: Optional[datetime] = None  # End of the last hand parsed
+        self.plugins = list(STAT_PLUGINS)
+        self.dispatch = compile_dispatch(self.plugins)  # Event type -> stat handlers
 
     def clean_player_name(self, name: str) -> str:
         """Remove the @ identifier from player names."""
@@ -94,284 +403,153 @@ class PokerAnalyzer:
 
     def extract_player_name(self, text: str) -> Optional[str]:
         """Extract player name from text with error handling."""
-        # Try to match the full pattern first
-        match = re.search(r'"([^"]+)(?:\s*@\s*[^"]+)"', text)
-        if not match:
-            # Try simpler pattern as fallback
-            match = re.search(r'"([^"]+)"', text)
-        
-        if match:
-            name = match.group(1).strip()
-            # Remove any trailing numbers in parentheses and the @ part
-            name = re.sub(r'\s*\(\d+\)\s*$', '', name)
-            name = re.sub(r'\s*@.*$', '', name)
-            return name.strip()
-        return None
+        return extract_player_name(text)
 
     def process_hand(self, hand_lines: List[str]) -> None:
-        """Process a single hand of poker."""
-        self.current_hand_players.clear()
-        self.current_hand_played.clear()
-        self.current_hand_raised_preflop.clear()
-        self.current_hand_showdown.clear()
-        self.current_hand_3bet_preflop.clear()
-        self.current_hand_4bet_preflop.clear()
-        self.current_hand_5bet_preflop.clear()
-        
-        game_type = 'NLHE'  # Default to NLHE
-        table_size = 0
-        current_street = 'preflop'
-        flop_players = set()
-        folded_players = set()  # Track folded players
-        
-        current_preflop = 1
-        
-        # First pass: get hand ID, players, and context
-        for line in hand_lines:
-            split_text = self.split_text_by_commas(line)
-            text = split_text[0].lower()
-            
-            # Detect PLO
-            if "omaha" in text.lower():
-                game_type = 'PLO'
-            
-            if "player stacks:" in text:
-                stack_info = text.split("player stacks:")[1]
-                players = [self.extract_player_name(stack) for stack in stack_info.split('|')]
-                table_size = len([p for p in players if p])  # Count valid players
-                
-                for player in players:
-                    if player:
-                        if player not in self.players:
-                            self.players[player] = PlayerStats()
-                        self.current_hand_players.add(player)
-        
-            # Track street changes
-            if "flop:" in text.lower():
-                current_street = 'flop'
-                # Add all players who haven't folded to flop_players
-                flop_players = self.current_hand_played - folded_players
-                print(f"DEBUG: Players who see flop: {flop_players}")  # Debug print
-                continue
-            elif "turn:" in text.lower():
-                current_street = 'turn'
-                continue
-            elif "river:" in text.lower():
-                current_street = 'river'
-                continue
-            
-            # Extract player and action
-            player = self.extract_player_name(text)
-            if not player:
-                continue
+        """
+        Process a single hand of poker, given the `entry` column of its rows.
+        Actions of players who aren't seated in the hand's player stacks are ignored.
+        """
+        self.apply_hand(hand_deltas(hand_lines, self.dispatch))
 
-            # Track preflop actions to determine who sees the flop
-            if current_street == 'preflop':
-                if "calls" in text or "raises" in text or "bets" in text or "posts" in text:  # Added "posts"
-                    self.current_hand_played.add(player)
-                elif "folds" in text:
-                    folded_players.add(player)
-                    if player in self.current_hand_played:
-                        self.current_hand_played.remove(player)
-
-            # Track actions
-            if "shows" in text:
-                self.current_hand_showdown.add(player)
-                self.players[player].showdown_hands += 1
-                self.players[player].game_type_stats[game_type]['showdown_hands'] += 1
-                self.players[player].table_size_stats[table_size]['showdown_hands'] += 1
-                self.players[player].combined_stats[f"{game_type}_{table_size}h"]['showdown_hands'] += 1
-                
-            elif "raises to" in text or "raises" in text:
-                if "posts" not in text:  # Don't count blind posts
-                    self.players[player].total_raises += 1
-                    self.players[player].game_type_stats[game_type]['total_raises'] += 1
-                    self.players[player].table_size_stats[table_size]['total_raises'] += 1
-                    self.players[player].combined_stats[f"{game_type}_{table_size}h"]['total_raises'] += 1
-                    
-                    if current_street == 'preflop':
-                        self.current_hand_raised_preflop.add(player)
-                        self.current_hand_played.add(player)
-
-                        if current_preflop == 2:
-                            self.current_hand_3bet_preflop.add(player)
-                        elif current_preflop == 3:
-                            self.current_hand_4bet_preflop.add(player)
-                        elif current_preflop >= 4:
-                            self.current_hand_5bet_preflop.add(player)
-
-                        current_preflop += 1
-            
-            elif "calls" in text:
-                if not any(x in text.lower() for x in ["small blind", "big blind", "posts"]):
-                    self.players[player].total_calls += 1
-                    self.players[player].game_type_stats[game_type]['total_calls'] += 1
-                    self.players[player].table_size_stats[table_size]['total_calls'] += 1
-                    self.players[player].combined_stats[f"{game_type}_{table_size}h"]['total_calls'] += 1
-                    
-                    if current_street == 'preflop':
-                        self.current_hand_played.add(player)
-            
-            elif "bets" in text:
-                self.players[player].total_bets += 1
-                self.players[player].game_type_stats[game_type]['total_bets'] += 1
-                self.players[player].table_size_stats[table_size]['total_bets'] += 1
-                self.players[player].combined_stats[f"{game_type}_{table_size}h"]['total_bets'] += 1
-                
-                if current_street == 'preflop':
-                    self.current_hand_played.add(player)
-
-        # Define combined_key before using it
-        combined_key = f"{game_type}_{table_size}h"
+    def apply_hand(self, delta: HandDelta) -> None:
+        """Add the counters of one processed hand, see hand_deltas."""
+        for player, table_size in delta.seats:
+            if player not in self.players:
+                self.players[player] = PlayerStats()
+            self.players[player].ensure_context(delta.game_type, table_size)
         
-        # Update stats for all contexts
-        for player in self.current_hand_players:
-            # Update main stats
-            self.players[player].total_hands += 1
-            
-            # Update game type stats
-            self.players[player].game_type_stats[game_type]['total_hands'] += 1
-            
-            # Update table size stats
-            self.players[player].table_size_stats[table_size]['total_hands'] += 1
-            
-            # Update combined stats
-            self.players[player].combined_stats[combined_key]['total_hands'] += 1
-        
-        for player in self.current_hand_played:
-            # Update main stats
-            self.players[player].hands_played += 1
-            
-            # Update game type stats
-            self.players[player].game_type_stats[game_type]['hands_played'] += 1
-            
-            # Update table size stats
-            self.players[player].table_size_stats[table_size]['hands_played'] += 1
-            
-            # Update combined stats
-            self.players[player].combined_stats[combined_key]['hands_played'] += 1
+        if delta.seats:
+            combined_key = f"{delta.game_type}_{delta.table_size}h"
+            self.context_hands[combined_key] = self.context_hands.get(combined_key, 0) + 1
         
-        for player in self.current_hand_raised_preflop:
-            # Update main stats
-            self.players[player].preflop_raise_hands += 1
-            
-            # Update game type stats
-            self.players[player].game_type_stats[game_type]['preflop_raise_hands'] += 1
-            
-            # Update table size stats
-            self.players[player].table_size_stats[table_size]['preflop_raise_hands'] += 1
-            
-            # Update combined stats
-            self.players[player].combined_stats[combined_key]['preflop_raise_hands'] += 1
+        for player, counts in delta.counts.items():
+            data = self.players[player]
+            data.add_context_counts(delta.game_type, delta.table_size, counts)
+            data.add_hand_profiles(delta.game_type, delta.table_size, {tuple(counts.get(name, 0) for name in PROFILE_FIELDS): 1})
 
-        # Add updates for 3bets, 4bets, and 5bets
-        for player in self.current_hand_3bet_preflop:
-            # Update main stats
-            self.players[player].three_bet_hands += 1
-            
-            # Update game type stats
-            self.players[player].game_type_stats[game_type]['three_bet_hands'] += 1
-            
-            # Update table size stats
-            self.players[player].table_size_stats[table_size]['three_bet_hands'] += 1
-            
-            # Update combined stats
-            self.players[player].combined_stats[combined_key]['three_bet_hands'] += 1
+    def iter_hand_deltas(self, hands: List[List[str]], workers: int = 1) -> Iterator[Union[HandDelta, str]]:
+        """
+        hand_results for the given hands, in order. With several workers the hands are
+        split into chunks processed concurrently, see hand_executor.
+        """
+        if workers <= 1 or len(hands) < 2:
+            yield from hand_results(hands, self.dispatch)
+            return
+        
+        size = -(-len(hands) // (workers * CHUNKS_PER_WORKER))
+        chunks = [hands[start:start + size] for start in range(0, len(hands), size)]
+        with hand_executor(workers) as executor:
+            for results in executor.map(chunk_results, chunks, [self.plugins] * len(chunks)):
+                yield from results
 
-        for player in self.current_hand_4bet_preflop:
-            # Update main stats
-            self.players[player].four_bet_hands += 1
-            
-            # Update game type stats
-            self.players[player].game_type_stats[game_type]['four_bet_hands'] += 1
-            
-            # Update table size stats
-            self.players[player].table_size_stats[table_size]['four_bet_hands'] += 1
-            
-            # Update combined stats
-            self.players[player].combined_stats[combined_key]['four_bet_hands'] += 1
+    def parse_log(
+        self,
+        filename: LogSource,
+        progress: Optional[Callable[[int, int], None]] = None,
+        quarantine: Optional[str] = None,
+        engine: str = 'loop',
+        workers: int = 1,
+        seen_hands: Optional[Set[str]] = None,
+        read: Optional[tuple] = None
+    ) -> ParseReport:
+        """
+        Parse the entire log file.
+        progress, if given, is called as progress(hands_processed, hands_total) while hands are processed.
+        Malformed or incomplete hands are skipped and counted in the returned report; if a
+        quarantine path is given they are appended to that CSV with their line numbers.
+        engine is one of ENGINES; both give the same results. The loop engine processes
+        hands on `workers` workers and applies them in log order, so results don't
+        depend on the number of workers.
+        seen_hands, if given, holds the ids of hands analyzed before, for instance from an
+        earlier export of the same game: those hands are skipped, and the ids of the complete
+        hands found now are added to it. Only the loop engine supports it.
+        read, if given, is read_log(filename) already done by the caller, so the loop
+        engine doesn't read the file again.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+        if engine == 'vectorized' and seen_hands is not None:
+            raise ValueError("seen_hands is only supported by the loop engine")
+        if engine == 'vectorized':
+            from vectorized_engine import parse_log_vectorized
+            
+            return parse_log_vectorized(self, filename, progress, quarantine)
+        
+        started = time.perf_counter()
+        hands, spans, incomplete, rows = read if read is not None else read_log(filename)
+        rejected = [(span, 'incomplete hand', entry) for span, entry in incomplete]
+        
+        ids = [hand_id(hand[0][0]) for hand in hands] if seen_hands is not None else [None] * len(hands)
+        skipped = [seen_hands is not None and key in seen_hands for key in ids]
+        errors = [None if skip else hand_error(hand) for hand, skip in zip(hands, skipped)]
+        results = self.iter_hand_deltas(
+            [[row[0] for row in hand] for hand, error, skip in zip(hands, errors, skipped) if error is None and not skip],
+            workers
+        )
+        
+        first_hand = last_hand = None
+        for processed, (hand, span, error, skip) in enumerate(zip(hands, spans, errors, skipped), 1):
+            if skip:
+                pass
+            elif error is None:
+                result = next(results)
+                if isinstance(result, str):
+                    error = result
+                else:
+                    self.apply_hand(result)
+                    first_hand = first_hand or hand
+                    last_hand = hand
+            if error is not None:
+                rejected.append((span, error, hand[0][0]))
+            
+            if progress and (processed % PROGRESS_INTERVAL == 0 or processed == len(hands)):
+                progress(processed, len(hands))
+        
+        if first_hand:
+            self.start_time = row_timestamp(first_hand[0])
+            self.end_time = row_timestamp(last_hand[-1])
+        
+        report = ParseReport(log_name(filename), rows, len(hands) + len(incomplete), skipped=sum(skipped))
+        if seen_hands is not None:
+            # Rejected hands too, a later export won't fix them; incomplete ones may still end
+            seen_hands.update(key for key in ids if key is not None)
+        for _, reason, _ in rejected:
+            report.rejected[reason] = report.rejected.get(reason, 0) + 1
+        if rejected and quarantine:
+            write_quarantine(filename, rejected, quarantine)
+        report.seconds = time.perf_counter() - started
+        return report
 
-        for player in self.current_hand_5bet_preflop:
-            # Update main stats
-            self.players[player].five_bet_hands += 1
-            
-            # Update game type stats
-            self.players[player].game_type_stats[game_type]['five_bet_hands'] += 1
-            
-            # Update table size stats
-            self.players[player].table_size_stats[table_size]['five_bet_hands'] += 1
-            
-            # Update combined stats
-            self.players[player].combined_stats[combined_key]['five_bet_hands'] += 1
-
-        # After the loop, update flop hands stats
-        print(f"DEBUG: Final flop players: {flop_players}")  # Debug print
-        for player in flop_players:
-            print(f"DEBUG: Updating flop hands for {player}")  # Debug print
-            # Update main stats
-            self.players[player].flop_hands += 1
-            
-            # Update game type stats
-            self.players[player].game_type_stats[game_type]['flop_hands'] += 1
-            
-            # Update table size stats
-            self.players[player].table_size_stats[table_size]['flop_hands'] += 1
-            
-            # Update combined stats
-            self.players[player].combined_stats[combined_key]['flop_hands'] += 1
-
-    def parse_log(self, filename: str) -> None:
-        """Parse the entire log file."""
-        with open(filename, 'r', encoding='utf-8') as f:
-            all_lines = list(csv.reader(f))
-            hands = []
-            current_hand = []
-            
-            # Skip header
-            all_lines = all_lines[1:]
-            
-            # Collect hands based on "starting hand #" and "ending hand #"
-            for row in reversed(all_lines):
-                line = row[0]
-                
-                if "starting hand #" in line:
-                    current_hand.append(row)
-                
-                if current_hand:
-                    current_hand.append(row)  # Add the current line to the ongoing hand
-                
-                    if "ending hand #" in line:  # Check for the end of the hand
-                        hands.append(current_hand)
-                        current_hand = []  # Reset for the next hand
-            
-            # Process each hand
-            for hand in hands:
-                # Convert hand lines to proper format
-                hand_lines = [','.join(row) for row in hand]
-                self.process_hand(hand_lines)
+    def parse_sample(
+        self,
+        filenames: List[str],
+        fraction: float = DEFAULT_SAMPLE_FRACTION,
+        seed: int = 0,
+        progress: Optional[Callable[[int, int], None]] = None
+    ):
+        """
+        Estimate the stats of several logs from a random sample of about `fraction` of
+        their hands, stratified per log, game type and table size. Only the sampled hands
+        are read and processed. Returns a hand_sampling.SampleReport with the standard
+        error of each player's VPIP, PFR, AF, WTSD and hand count.
+        """
+        from hand_sampling import sample_logs
+        
+        return sample_logs(self, filenames, fraction, seed, progress)
 
     def calculate_context_stats(self, stats: Dict[str, int]) -> Dict[str, float]:
         """Calculate stats for a specific context (game type or table size)."""
         if stats['total_hands'] == 0:
             return {}
         
-        return {
-            'PFR': (stats['preflop_raise_hands'] / stats['total_hands']) * 100,
-            'VPIP': (stats['hands_played'] / stats['total_hands']) * 100,
-            'AF': (stats['total_bets'] + stats['total_raises']) / (stats['total_calls'] or 1),
-            'WTSD': (stats['showdown_hands'] / stats['flop_hands'] * 100) if stats['flop_hands'] > 0 else 0,
-            'Hands': stats['total_hands'],
-            'Hands Played': stats['hands_played'],
-            'Preflop Raises': stats['preflop_raise_hands'],
-            'Showdowns': stats['showdown_hands'],
-            'Flop Hands': stats['flop_hands'],
-            'Bets': stats['total_bets'],
-            'Raises': stats['total_raises'],
-            'Calls': stats['total_calls'],
-            '3Bets': stats['three_bet_hands'],
-            '4Bets': stats['four_bet_hands'],
-            '5Bets': stats['five_bet_hands']
-        }
+        result = {}
+        for plugin in self.plugins:
+            result.update(plugin.metrics(stats))
+        for plugin in self.plugins:
+            for counter, label in plugin.labels.items():
+                result[label] = stats.get(counter, 0)
+        return result
 
     def get_stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
         """Calculate and return stats for all players and contexts."""
@@ -386,21 +564,21 @@ class PokerAnalyzer:
             # Calculate game type stats
             game_type_stats = {
                 game_type: self.calculate_context_stats(stats)
-                for game_type, stats in data.game_type_stats.items()
+                for game_type, stats in sorted(data.game_type_stats.items(), key=lambda item: game_type_order(item[0]))
                 if stats['total_hands'] > 0
             }
             
             # Calculate table size stats
             table_size_stats = {
                 f"{size}-handed": self.calculate_context_stats(stats)
-                for size, stats in data.table_size_stats.items()
+                for size, stats in sorted(data.table_size_stats.items())
                 if stats['total_hands'] > 0
             }
             
             # Calculate combined stats
             combined_stats = {
                 context: self.calculate_context_stats(stats)
-                for context, stats in data.combined_stats.items()
+                for context, stats in sorted(data.combined_stats.items(), key=lambda item: context_order(item[0]))
                 if stats['total_hands'] > 0
             }
             
@@ -415,65 +593,72 @@ class PokerAnalyzer:
 
     def calculate_player_stats(self, data: PlayerStats) -> Dict[str, float]:
         """Calculate stats for a single PlayerStats object."""
-        if data.total_hands == 0:
-            return {}
-            
-        return {
-            'PFR': (data.preflop_raise_hands / data.total_hands) * 100,
-            'VPIP': (data.hands_played / data.total_hands) * 100,
-            'AF': (data.total_bets + data.total_raises) / (data.total_calls or 1),
-            'WTSD': (data.showdown_hands / data.flop_hands * 100) if data.flop_hands > 0 else 0,
-            'Hands': data.total_hands,
-            'Hands Played': data.hands_played,
-            'Preflop Raises': data.preflop_raise_hands,
-            'Showdowns': data.showdown_hands,
-            'Flop Hands': data.flop_hands,
-            'Bets': data.total_bets,
-            'Raises': data.total_raises,
-            'Calls': data.total_calls,
-            '3Bets': data.three_bet_hands,
-            '4Bets': data.four_bet_hands,
-            '5Bets': data.five_bet_hands
-        }
+        return self.calculate_context_stats(data.overall_stats())
 
-if __name__ == "__main__":
-    import sys
-    import csv
-    from typing import List, Dict
-    
-    if len(sys.argv) != 2:
-        print("Usage: python poker_analyzer.py <pokernow_log_file>")
-        sys.exit(1)
+    def get_intervals(
+        self,
+        resamples: int = DEFAULT_RESAMPLES,
+        level: float = DEFAULT_LEVEL,
+        seed: int = 0
+    ) -> Dict[str, Dict[str, Dict]]:
+        """
+        Bootstrap confidence intervals of VPIP, PFR, AF and WTSD for every player, overall
+        and per combined context like get_stats, as {metric: (low, high)}. The same seed
+        gives the same intervals.
+        """
+        from stat_intervals import bootstrap_intervals
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        intervals = {}
+        for player, data in self.players.items():
+            if data.total_hands == 0:
+                continue
+            intervals[player] = {
+                'overall': bootstrap_intervals(data.profiles(), resamples, level, rng),
+                'by_combined': {
+                    context: bootstrap_intervals(data.profiles(context), resamples, level, rng)
+                    for context in sorted(data.hand_profiles, key=context_order)
+                }
+            }
+        return intervals
+
+STATS_CSV_HEADERS = [
+    'Name',
+    'Game Type',
+    'Table Size',
+    'Hands',
+    'Hands Played',
+    'Hands PFR',
+    'Hands Flop',
+    'Hands Showdown',
+    'Bets',
+    'Raises',
+    'Calls',
+    '3Bets',
+    '4Bets',
+    '5Bets'
+]
+
+INTERVAL_METRICS = ('VPIP', 'PFR', 'AF', 'WTSD')
+INTERVAL_CSV_HEADERS = [f'{metric} {bound}' for metric in INTERVAL_METRICS for bound in ('Low', 'High')]
+ERROR_CSV_HEADERS = [f'{metric} SE' for metric in INTERVAL_METRICS]
 
-    analyzer = PokerAnalyzer()
-    analyzer.parse_log(sys.argv[1])
-    
-    stats = analyzer.get_stats()
-    
-    # Define CSV headers
-    headers = [
-        'Name',
-        'Game Type',
-        'Table Size',
-        'Hands',
-        'Hands Played',
-        'Hands PFR',
-        'Hands Flop',
-        'Hands Showdown',
-        'Bets',
-        'Raises',
-        'Calls',
-        '3Bets',
-        '4Bets',
-        '5Bets'
-    ]
-    
-    # Prepare rows for CSV
+def stats_csv_rows(
+    stats: Dict[str, Dict[str, Dict[str, float]]],
+    intervals: Optional[Dict] = None,
+    errors: Optional[Dict] = None
+) -> List[list]:
+    """
+    Build one CSV row per player and combined context from get_stats output, followed
+    by the INTERVAL_CSV_HEADERS columns if get_intervals output is given and the
+    ERROR_CSV_HEADERS columns if standard errors from parse_sample are.
+    """
     rows = []
     for player, contexts in sorted(stats.items()):
         for context, combined_stats in contexts['by_combined'].items():
             # Parse game type and table size from context (e.g., "NLHE_9h")
-            game_type, table_info = context.split('_')
+            game_type, table_info = context.rsplit('_', 1)
             table_size = table_info[:-1]  # Remove the 'h' suffix
             
             # Only add row if there are hands played
@@ -494,13 +679,271 @@ if __name__ == "__main__":
                     int(combined_stats['4Bets']),
                     int(combined_stats['5Bets'])
                 ]
+                if intervals is not None:
+                    bounds = intervals[player]['by_combined'][context]
+                    row += [round(bound, 2) for metric in INTERVAL_METRICS for bound in bounds[metric]]
+                if errors is not None:
+                    row += [round(errors[player]['by_combined'][context][metric], 2) for metric in INTERVAL_METRICS]
                 rows.append(row)
-    
-    # Write to CSV
-    output_file = 'stats.csv'
+    return rows
+
+def write_stats_csv(
+    stats: Dict[str, Dict[str, Dict[str, float]]],
+    output_file: str = 'stats.csv',
+    intervals: Optional[Dict] = None,
+    errors: Optional[Dict] = None
+) -> None:
+    """Write get_stats output as a CSV with one row per player and combined context."""
+    headers = STATS_CSV_HEADERS + (INTERVAL_CSV_HEADERS if intervals is not None else [])
     with open(output_file, 'w', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(headers)
-        writer.writerows(rows)
+        writer.writerow(headers + (ERROR_CSV_HEADERS if errors is not None else []))
+        writer.writerows(stats_csv_rows(stats, intervals, errors))
+
+CLI_COMMANDS = ('analyze', 'map', 'reduce', 'index', 'showdowns', 'compact', 'watch', 'ledger', 'styles', 'sample', 'search-index', 'search')
+
+def main(argv: List[str]) -> None:
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='poker_analyzer.py', description='Analyze PokerNow logs.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    analyze_parser = subparsers.add_parser('analyze', help='Analyze a log and write per-player stats to CSV')
+    analyze_parser.add_argument('log_file')
+    analyze_parser.add_argument('-o', '--output', default='stats.csv')
+    analyze_parser.add_argument('--quarantine', help='Append rejected hands to this CSV')
+    analyze_parser.add_argument('--engine', choices=ENGINES, default='loop', help='Parsing engine, vectorized is faster on large logs')
+    analyze_parser.add_argument('--workers', type=int, default=1, help='Processes for the loop engine to split hands across')
+    analyze_parser.add_argument('--ci', action='store_true', help='Add bootstrap confidence intervals of VPIP, PFR, AF and WTSD')
+    analyze_parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES)
+    analyze_parser.add_argument('--level', type=float, default=DEFAULT_LEVEL, help='Confidence level of the intervals')
+    
+    sample_parser = subparsers.add_parser('sample', help='Estimate stats from a stratified sample of hands, with standard errors')
+    sample_parser.add_argument('logs', nargs='+', help='Log files or directories containing them')
+    sample_parser.add_argument('-o', '--output', default='stats.csv')
+    sample_parser.add_argument('--fraction', type=float, default=DEFAULT_SAMPLE_FRACTION, help='Share of each stratum\'s hands to process')
+    sample_parser.add_argument('--seed', type=int, default=0)
+    
+    map_parser = subparsers.add_parser('map', help='Write a partial aggregate (.npz) for each log')
+    map_parser.add_argument('output_dir')
+    map_parser.add_argument('log_files', nargs='+')
+    map_parser.add_argument('--engine', choices=ENGINES, default='loop')
+    
+    reduce_parser = subparsers.add_parser('reduce', help='Merge partial aggregates and write stats to CSV')
+    reduce_parser.add_argument('partials', nargs='+', help='Partial .npz files or directories containing them')
+    reduce_parser.add_argument('-o', '--output', default='stats.csv')
+    
+    index_parser = subparsers.add_parser('index', help='Build the showdown card index of the given logs')
+    index_parser.add_argument('index_file')
+    index_parser.add_argument('log_files', nargs='+')
+    
+    showdowns_parser = subparsers.add_parser('showdowns', help='Query the showdown card index')
+    showdowns_parser.add_argument('index_file')
+    showdowns_parser.add_argument('--player')
+    showdowns_parser.add_argument('--game-type')
+    showdowns_parser.add_argument('--hand', help='Hand category shown, e.g. "flush"')
+    showdowns_parser.add_argument('--min-hand', help='Weakest hand category shown, e.g. "straight"')
+    showdowns_parser.add_argument('--board', action='append', default=[], help='Board texture: paired, trips or flush-possible')
+    showdowns_parser.add_argument('--won', action='store_true', default=None, help='Only hands where the player collected chips')
+    
+    search_index_parser = subparsers.add_parser('search-index', help='Build the hand search index of the given logs')
+    search_index_parser.add_argument('index_file')
+    search_index_parser.add_argument('logs', nargs='+', help='Log files or directories containing them')
+    
+    search_parser = subparsers.add_parser('search', help='Search the hand search index')
+    search_parser.add_argument('index_file')
+    search_parser.add_argument('query', help='e.g. \'player:a player:b street:river pot>500\', with AND, OR, NOT and parentheses')
+    search_parser.add_argument('-n', '--limit', type=int, help='List at most this many hands')
+    
+    compact_parser = subparsers.add_parser('compact', help='Recompress logs as .csv.zst with a dictionary trained on them')
+    compact_parser.add_argument('logs', nargs='+', help='Log files or directories containing them')
+    compact_parser.add_argument('-o', '--output-dir', help='Write compressed logs here instead of next to each log')
+    compact_parser.add_argument('--level', type=int, default=COMPACT_LEVEL)
+    compact_parser.add_argument('--replace', action='store_true', help='Remove each log once its compressed copy is verified')
+    
+    watch_parser = subparsers.add_parser('watch', help='Ingest new exports dropped into a directory and keep stats up to date')
+    watch_parser.add_argument('watch_dir')
+    watch_parser.add_argument('-o', '--output', default='stats.csv')
+    watch_parser.add_argument('--state-dir', help='Where per-game partials are kept (default: <watch_dir>/.ingest)')
+    watch_parser.add_argument('--workers', type=int, default=2, help='Logs parsed at once')
+    watch_parser.add_argument('--settle', type=float, default=2.0, help='Seconds a log must stay unchanged before it is parsed')
+    watch_parser.add_argument('--once', action='store_true', help='Ingest the logs present now and exit')
+    
+    ledger_parser = subparsers.add_parser('ledger', help='Buy-ins, cash-outs and net chips per player, and who pays whom')
+    ledger_parser.add_argument('logs', nargs='+', help='Log files or directories containing them')
+    ledger_parser.add_argument('-o', '--output', default='ledger.csv')
+    ledger_parser.add_argument('--store', help='JSON file keeping each game\'s ledger, so later runs only read new logs')
+    
+    styles_parser = subparsers.add_parser('styles', help='Cluster players by style, or find players with a similar style')
+    styles_parser.add_argument('logs', nargs='+', help='Log files or directories containing them')
+    styles_parser.add_argument('-k', '--clusters', type=int, default=5)
+    styles_parser.add_argument('--similar', metavar='PLAYER', help='List the players closest in style to this one')
+    styles_parser.add_argument('--alts', type=float, metavar='DISTANCE', help='List mutual closest pairs within this distance')
+    styles_parser.add_argument('-n', '--count', type=int, default=5)
+    styles_parser.add_argument('--context', help='Combined context such as PLO_6h, overall by default')
+    styles_parser.add_argument('--min-hands', type=int, default=50)
+    
+    # "poker_analyzer.py <pokernow_log_file>" is short for the analyze command
+    if argv and argv[0] not in CLI_COMMANDS and not argv[0].startswith('-'):
+        argv = ['analyze', *argv]
+    args = parser.parse_args(argv)
+    
+    if args.command == 'analyze':
+        analyzer = PokerAnalyzer()
+        report = analyzer.parse_log(args.log_file, quarantine=args.quarantine, engine=args.engine, workers=args.workers)
+        intervals = analyzer.get_intervals(args.resamples, args.level) if args.ci else None
+        write_stats_csv(analyzer.get_stats(), args.output, intervals)
+        print(report.summary(), file=sys.stderr)
+        print(f"Stats written to {args.output}")
+    
+    elif args.command == 'sample':
+        from log_io import find_logs
+        
+        analyzer = PokerAnalyzer()
+        report = analyzer.parse_sample(find_logs(args.logs), args.fraction, args.seed)
+        write_stats_csv(analyzer.get_stats(), args.output, errors=report.standard_errors)
+        print(report.summary(), file=sys.stderr)
+        print(f"Estimated stats written to {args.output}")
+    
+    elif args.command == 'map':
+        from poker_partials import map_log
+        
+        for log_file in args.log_files:
+            print(f"Partial written to {map_log(log_file, args.output_dir, args.engine)}")
+    
+    elif args.command == 'reduce':
+        from poker_partials import find_partials, reduce_partials
+        
+        partial_files = find_partials(args.partials)
+        write_stats_csv(reduce_partials(partial_files).get_stats(), args.output)
+        print(f"Merged {len(partial_files)} partials, stats written to {args.output}")
+    
+    elif args.command == 'index':
+        from showdown_index import ShowdownIndex
+        
+        index = ShowdownIndex.from_logs(args.log_files)
+        index.save(args.index_file)
+        print(f"Indexed {len(index)} shown hands to {args.index_file}")
+    
+    elif args.command == 'showdowns':
+        from showdown_index import ShowdownIndex, format_row
+        
+        rows = ShowdownIndex.load(args.index_file).query(
+            player=args.player,
+            game_type=args.game_type,
+            category=args.hand,
+            min_category=args.min_hand,
+            board=args.board,
+            won=args.won
+        )
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['Name', 'Hand', 'Game Type', 'Hole Cards', 'Board', 'Shown', 'Collected'])
+        writer.writerows(format_row(row) for row in rows)
+    
+    elif args.command == 'search-index':
+        from hand_search import HandIndex
+        from log_io import find_logs
+        
+        index = HandIndex.from_logs(find_logs(args.logs))
+        index.save(args.index_file)
+        print(f"Indexed {len(index)} hands and {len(index.terms)} search terms to {args.index_file}")
+    
+    elif args.command == 'search':
+        from hand_search import HandIndex, format_row
+        
+        index = HandIndex.load(args.index_file)
+        started = time.perf_counter()
+        try:
+            found = index.search(args.query)
+        except ValueError as e:
+            sys.exit(f"Invalid query: {e}")
+        elapsed = time.perf_counter() - started
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['Log', 'Hand', 'Game Type', 'Pot'])
+        writer.writerows(format_row(index.row(i)) for i in found[:args.limit].tolist())
+        print(f"{len(found)} of {len(index)} hands match ({elapsed * 1000:.2f} ms)", file=sys.stderr)
+    
+    elif args.command == 'compact':
+        from log_io import DICTIONARY_SUFFIX, compact, find_logs
+        
+        def progress(output: str, source_size: int, compressed_size: int) -> None:
+            print(f"{output}: {source_size} -> {compressed_size} bytes")
+        
+        results = compact(find_logs(args.logs), args.output_dir, args.level, args.replace, progress)
+        source_total = sum(source_size for source_size, _ in results.values())
+        compressed_total = sum(compressed_size for _, compressed_size in results.values())
+        logs = sum(1 for output in results if not output.endswith(DICTIONARY_SUFFIX))
+        # The compressed total includes the dictionaries written
+        print(f"Compacted {logs} logs: {source_total} -> {compressed_total} bytes")
+    
+    elif args.command == 'ledger':
+        from chip_ledger import (
+            CENTS, load_store, merge_ledgers, read_ledger, save_store, season_ledger, settle, update_store,
+            write_ledger_csv
+        )
+        from log_io import find_logs
+        
+        if args.store:
+            store = load_store(args.store)
+            updated = update_store(store, find_logs(args.logs))
+            save_store(store, args.store)
+            ledger = season_ledger(store)
+            print(f"Updated {len(updated)} of {len(store['sessions'])} sessions in {args.store}")
+        else:
+            ledger = merge_ledgers(read_ledger(log_file) for log_file in find_logs(args.logs))
+        write_ledger_csv(ledger, args.output)
+        for loser, winner, amount in settle(ledger):
+            print(f"{loser} pays {winner} {amount / CENTS:.2f}")
+        print(f"Ledger written to {args.output}")
+    
+    elif args.command == 'styles':
+        from log_io import find_logs
+        from player_styles import STYLE_FEATURES, StyleSpace
+        
+        analyzer = PokerAnalyzer()
+        for log_file in find_logs(args.logs):
+            analyzer.parse_log(log_file)
+        space = StyleSpace.from_stats(analyzer.get_stats(), args.context, args.min_hands)
+        if args.similar:
+            if args.similar.lower() not in space.players:
+                sys.exit(f"No style for {args.similar}, players need {args.min_hands} hands")
+            for player, distance in space.similar(args.similar.lower(), args.count):
+                print(f"{player}: {distance:.2f}")
+        elif args.alts is not None:
+            for player, other, distance in space.alt_candidates(args.alts):
+                print(f"{player} ~ {other}: {distance:.2f}")
+        else:
+            for cluster in space.clusters(args.clusters):
+                center = ', '.join(f"{name} {cluster['center'][name]:.1f}" for name in STYLE_FEATURES)
+                print(f"{len(cluster['players'])} players ({center}): {', '.join(cluster['players'])}")
+    
+    elif args.command == 'watch':
+        from log_watcher import IngestDaemon, ingest
+        
+        options = dict(stats_file=args.output, state_dir=args.state_dir, workers=args.workers, settle=args.settle)
+        if args.once:
+            daemon = ingest(args.watch_dir, **options)
+            print(f"Ingested {len(daemon.partials)} games, stats written to {args.output}")
+        else:
+            try:
+                IngestDaemon(args.watch_dir, **options).run()
+            except KeyboardInterrupt:
+                pass
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python poker_analyzer.py <pokernow_log_file> [--engine vectorized] [--workers N]")
+        print("       python poker_analyzer.py sample <logs_dir_or_file>... [-o stats.csv] [--fraction 0.1] [--seed N]")
+        print("       python poker_analyzer.py map <output_dir> <pokernow_log_file>...")
+        print("       python poker_analyzer.py reduce <partials_dir_or_file>... [-o stats.csv]")
+        print("       python poker_analyzer.py index <index.npz> <pokernow_log_file>...")
+        print("       python poker_analyzer.py showdowns <index.npz> [--player NAME] [--hand flush] [--board paired]")
+        print("       python poker_analyzer.py search-index <index.npz> <logs_dir_or_file>...")
+        print("       python poker_analyzer.py search <index.npz> '<query>' [-n 50]")
+        print("       python poker_analyzer.py compact <logs_dir_or_file>... [-o output_dir] [--replace]")
+        print("       python poker_analyzer.py watch <logs_dir> [-o stats.csv] [--workers N] [--once]")
+        print("       python poker_analyzer.py ledger <logs_dir_or_file>... [-o ledger.csv] [--store ledger.json]")
+        print("       python poker_analyzer.py styles <logs_dir_or_file>... [-k 5] [--similar NAME] [--alts DISTANCE]")
+        sys.exit(1)
     
-    print(f"Stats written to {output_file}")
\ No newline at end of file
+    main(sys.argv[1:])
@@ -0,0 +1,168 @@
+import io
+import os
+import tempfile
+import zipfile
+from typing import Dict, Iterable, List
+import numpy as np
+from log_io import log_stem
+from poker_analyzer import STAT_FIELDS, PokerAnalyzer, PlayerStats
+
+# Map/reduce over log archives:
+#   map:    one log file -> one partial aggregate (.npz) with the combined context counters
+#   reduce: any number of partials, in any order -> one merged PokerAnalyzer
+# Partials only hold sums, so merging is associative and commutative, and the map stage
+# writes byte-identical files for identical input so reruns and retries are safe.
+
+PARTIAL_VERSION = 1
+PARTIAL_SUFFIX = '.npz'
+
+# Fixed member timestamp so archives don't depend on when they were written
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def build_partial(analyzer: PokerAnalyzer) -> Dict[str, np.ndarray]:
+    """
+    Convert a parsed analyzer into partial aggregate arrays.
+
+    Counters are stored sparsely: one row of `counters` per (player, context) pair
+    with hands, indexed into the sorted `players` and `contexts` arrays.
+    """
+    entries = sorted(
+        (player, context, [stats[name] for name in STAT_FIELDS])
+        for player, data in analyzer.players.items()
+        for context, stats in data.combined_stats.items()
+        if stats['total_hands'] > 0
+    )
+    players = sorted({player for player, _, _ in entries})
+    contexts = sorted({context for _, context, _ in entries} | set(analyzer.context_hands))
+    player_index = {player: i for i, player in enumerate(players)}
+    context_index = {context: i for i, context in enumerate(contexts)}
+
+    return {
+        'version': np.array(PARTIAL_VERSION, dtype=np.int64),
+        'fields': np.array(STAT_FIELDS, dtype=str),
+        'players': np.array(players, dtype=str),
+        'contexts': np.array(contexts, dtype=str),
+        'player_idx': np.array([player_index[player] for player, _, _ in entries], dtype=np.int64),
+        'context_idx': np.array([context_index[context] for _, context, _ in entries], dtype=np.int64),
+        'counters': np.array([counts for _, _, counts in entries], dtype=np.int64).reshape(-1, len(STAT_FIELDS)),
+        'context_hands': np.array([analyzer.context_hands.get(context, 0) for context in contexts], dtype=np.int64)
+    }
+
+
+def write_npz(arrays: Dict[str, np.ndarray], path: str) -> None:
+    """
+    Write arrays as a deterministic .npz. The file is written next to its
+    destination and renamed into place, so readers never see a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name in sorted(arrays):
+                buffer = io.BytesIO()
+                np.lib.format.write_array(buffer, np.asarray(arrays[name]), allow_pickle=False)
+                info = zipfile.ZipInfo(f'{name}.npy', date_time=ZIP_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, buffer.getvalue())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_partial(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        partial = {name: data[name] for name in data.files}
+    if int(partial['version']) != PARTIAL_VERSION:
+        raise ValueError(f"Unsupported partial version {int(partial['version'])} in {path}")
+    if tuple(partial['fields']) != STAT_FIELDS:
+        raise ValueError(f"Partial {path} has counters {tuple(partial['fields'])}, expected {STAT_FIELDS}")
+    return partial
+
+
+def partial_path(log_file: str, output_dir: str) -> str:
+    return os.path.join(output_dir, log_stem(log_file) + PARTIAL_SUFFIX)
+
+
+def map_log(log_file: str, output_dir: str, engine: str = 'loop') -> str:
+    """Parse one log and write its partial aggregate into output_dir. Returns the partial's path."""
+    os.makedirs(output_dir, exist_ok=True)
+    analyzer = PokerAnalyzer()
+    analyzer.parse_log(log_file, engine=engine)
+    path = partial_path(log_file, output_dir)
+    write_npz(build_partial(analyzer), path)
+    return path
+
+
+def merge_partials(partials: Iterable[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Merge partial aggregates by summing counters over the union of their players
+    and contexts. The result does not depend on the order of the inputs.
+    """
+    partials = list(partials)
+    if not partials:
+        return build_partial(PokerAnalyzer())
+
+    players, player_inverse = np.unique(
+        np.concatenate([p['players'][p['player_idx']] for p in partials]), return_inverse=True
+    )
+    contexts = np.unique(np.concatenate([p['contexts'] for p in partials]))
+    context_idx = np.concatenate([
+        np.searchsorted(contexts, p['contexts'][p['context_idx']]) for p in partials
+    ])
+
+    # Sum rows that share a (player, context) pair
+    keys, key_inverse = np.unique(player_inverse * len(contexts) + context_idx, return_inverse=True)
+    counters = np.zeros((len(keys), len(STAT_FIELDS)), dtype=np.int64)
+    np.add.at(counters, key_inverse, np.concatenate([p['counters'] for p in partials]))
+
+    context_hands = np.zeros(len(contexts), dtype=np.int64)
+    for p in partials:
+        np.add.at(context_hands, np.searchsorted(contexts, p['contexts']), p['context_hands'])
+
+    return {
+        'version': np.array(PARTIAL_VERSION, dtype=np.int64),
+        'fields': np.array(STAT_FIELDS, dtype=str),
+        'players': players,
+        'contexts': contexts,
+        'player_idx': keys // len(contexts),
+        'context_idx': keys % len(contexts),
+        'counters': counters,
+        'context_hands': context_hands
+    }
+
+
+def partial_to_analyzer(partial: Dict[str, np.ndarray]) -> PokerAnalyzer:
+    """Rebuild a PokerAnalyzer from partial arrays so get_stats and the CSV writer can be reused."""
+    analyzer = PokerAnalyzer()
+    players = partial['players'].tolist()
+    contexts = partial['contexts'].tolist()
+    for player_idx, context_idx, counts in zip(
+        partial['player_idx'].tolist(), partial['context_idx'].tolist(), partial['counters'].tolist()
+    ):
+        game_type, table_info = contexts[context_idx].rsplit('_', 1)
+        data = analyzer.players.setdefault(players[player_idx], PlayerStats())
+        data.add_context_counts(game_type, int(table_info[:-1]), dict(zip(STAT_FIELDS, counts)))
+    analyzer.context_hands = {
+        context: hands for context, hands in zip(contexts, partial['context_hands'].tolist()) if hands
+    }
+    return analyzer
+
+
+def find_partials(paths: Iterable[str]) -> List[str]:
+    """Expand directories into the partial files they contain, sorted by path."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(PARTIAL_SUFFIX)
+            )
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def reduce_partials(paths: Iterable[str]) -> PokerAnalyzer:
+    """Merge the partial files at the given paths into one analyzer."""
+    return partial_to_analyzer(merge_partials(read_partial(path) for path in paths))
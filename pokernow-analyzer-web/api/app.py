@@ -1,15 +1,24 @@
 from fastapi import FastAPI, UploadFile, File, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import hashlib
+import io
 import os
+import time
 from tempfile import NamedTemporaryFile
-from typing import List, Union
-from services.file_processor import FileProcessor
-from services.supabase_service import SupabaseService
+from typing import List, Optional, Union
+from services.storage import get_storage_service
+from services.serialization import StatsJSONResponse, stats_response
+from services.stats_cache import StatsCache, select_sessions
 from pydantic import BaseModel, validator
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
+from functools import lru_cache
 
-app = FastAPI()
+# Storage clients, parse and upload modules are loaded on first use rather than at import,
+# keeping serverless cold starts short. See benchmarks/bench_cold_start.py.
+
+app = FastAPI(default_response_class=StatsJSONResponse)
 
 # Update CORS configuration
 app.add_middleware(
@@ -21,8 +30,22 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-file_processor = FileProcessor()
-supabase_service = SupabaseService()
+stats_cache = StatsCache()
+
+@lru_cache(maxsize=None)
+def get_file_processor():
+    # Loads log_io, timestamps and the archive formats, only needed by /upload
+    from services.file_processor import FileProcessor
+    return FileProcessor()
+
+@lru_cache(maxsize=None)
+def get_job_queue():
+    from services.job_queue import JobQueue
+    return JobQueue(
+        get_storage_service(),
+        jobs_database=os.getenv('JOBS_DB_PATH', 'jobs.db'),
+        workers=int(os.getenv('JOB_WORKERS', '2'))
+    )
 
 class ActiveUpdate(BaseModel):
     active: bool
@@ -50,56 +73,302 @@ class BulkTagUpdate(BaseModel):
 async def test_endpoint():
     return {"message": "Backend is working!"}
 
+def parse_source(source) -> dict:
+    # Session times and rollup of a log; a full parse, so run off the event loop
+    from services.session_rollup import rollup_file
+    file_data = get_file_processor().process_file(source)
+    file_data['rollup'] = rollup_file(source)
+    return file_data
+
+async def ingest_log(name: str, file_id: str, content_hash: str, source, background: bool, results: dict,
+                     content: Optional[bytes] = None) -> bool:
+    """
+    Store one uploaded log unless it is already known, recording the outcome in results.
+    source is a temp file path or, for archive members, a text stream over content.
+    Returns True if the log was queued for a background job.
+    """
+    # Skip known files (same content or same game id) before any parsing
+    if await get_storage_service().check_file_exists(file_id, content_hash):
+        results["skipped"].append(name)
+        return False
+
+    if background:
+        job_id = await get_job_queue().submit(name, source if content is None else None, {
+            'file_id': file_id,
+            'content_hash': content_hash
+        }, content)
+        results["queued"].append({"filename": name, "job_id": job_id})
+        return True
+
+    file_data = await asyncio.to_thread(parse_source, source)
+    file_data['file_id'] = file_id
+    file_data['content_hash'] = content_hash
+    if await get_storage_service().create_session_once(file_data) is None:
+        # Stored by a concurrent upload or job since the check above
+        results["skipped"].append(name)
+        return False
+    results["processed"].append(name)
+    return False
+
+async def ingest_archive(file: UploadFile, background: bool, results: dict) -> None:
+    """Ingest each log in an uploaded .zip or .tar.zst, streaming members from the upload."""
+    from services.archives import MAX_MEMBER_BYTES, iter_archive
+
+    for member_name, content in iter_archive(file.file, file.filename):
+        name = f"{file.filename}/{member_name}"
+        try:
+            if content is None:
+                raise Exception(f"Member is larger than {MAX_MEMBER_BYTES} bytes")
+            file_id = get_file_processor().extract_file_id(os.path.basename(member_name))
+            content_hash = hashlib.sha256(content).hexdigest()
+            source = io.StringIO(content.decode('utf-8'))
+            source.name = name
+            await ingest_log(name, file_id, content_hash, source, background, results, content)
+        except Exception as e:
+            results["failed"].append({
+                "filename": name,
+                "error": str(e)
+            })
+
 @app.post("/upload")
-async def upload_files(files: List[UploadFile] = File(...)):
+async def upload_files(files: List[UploadFile] = File(...), background: bool = False):
+    # With background=true files are parsed by the job queue and the response lists job ids.
+    # A .zip or .tar.zst upload is expanded and reported per member, as "<archive>/<member>".
+    from services.archives import is_archive
+
     results = {
         "processed": [],
         "failed": [],
-        "skipped": []
+        "skipped": [],
+        "queued": []
     }
 
     for file in files:
+        temp_path = None
         try:
-            with NamedTemporaryFile(delete=False) as temp_file:
-                content = await file.read()
-                temp_file.write(content)
-                temp_file.flush()
+            if is_archive(file.filename):
+                await ingest_archive(file, background, results)
+                continue
 
-                file_data = file_processor.process_file(temp_file.name)
-                file_data['file_id'] = file_processor.extract_file_id(file.filename)
-
-                # Check if file already exists
-                if await supabase_service.check_file_exists(file_data['file_id']):
-                    results["skipped"].append(file.filename)
-                    continue
-
-                await supabase_service.create_session(file_data)
-                results["processed"].append(file.filename)
+            with NamedTemporaryFile(delete=False) as temp_file:
+                temp_path = temp_file.name
+                content_hash = await get_file_processor().save_upload(file, temp_file)
 
-            os.unlink(temp_file.name)
+            file_id = get_file_processor().extract_file_id(file.filename)
+            if await ingest_log(file.filename, file_id, content_hash, temp_path, background, results):
+                temp_path = None  # Removed by the job once parsed
 
         except Exception as e:
             results["failed"].append({
                 "filename": file.filename,
                 "error": str(e)
             })
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
 
     return {
-        "status": "success" if results["processed"] else "error",
+        "status": "success" if results["processed"] or results["queued"] else "error",
         **results
     }
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return {"status": "error", "message": "Job not found"}
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    return StreamingResponse(get_job_queue().events(job_id), media_type="text/event-stream")
+
+@app.on_event("shutdown")
+async def shutdown():
+    if get_job_queue.cache_info().currsize:
+        get_job_queue().shutdown()
+
 @app.get("/sessions")
 async def get_sessions():
     try:
         print("Received request for sessions")
-        sessions = await supabase_service.get_sessions()
+        sessions = await get_storage_service().get_sessions()
         print(f"Successfully fetched {len(sessions)} sessions")
         return sessions
     except Exception as e:
         print(f"Error in get_sessions: {str(e)}")
         return {"status": "error", "message": str(e)}
 
+@app.get("/stats")
+async def get_stats(request: Request, tags: Optional[str] = None, active: Optional[bool] = None,
+                    shape: str = 'nested'):
+    # tags is a comma separated list, sessions matching any of them are merged
+    try:
+        stats = await stats_cache.get_stats(
+            await selected_session_ids(tags, active),
+            get_storage_service().get_session_rollups
+        )
+        return stats_response(stats, request.headers.get('accept'), shape)
+    except Exception as e:
+        print(f"Error in get_stats: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+@app.get("/stats/population")
+async def get_population(tags: Optional[str] = None, active: Optional[bool] = None, min_hands: int = 20):
+    # Quantiles and histogram of every stat per combined context, over the players with
+    # at least min_hands hands there in the selected sessions (same selection as /stats)
+    try:
+        stats, tables = await population_for(tags, active, min_hands)
+        return {context: table.summary() for context, table in tables.items()}
+    except Exception as e:
+        print(f"Error in get_population: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+@app.get("/stats/population/{player}")
+async def get_player_percentiles(player: str, tags: Optional[str] = None, active: Optional[bool] = None,
+                                 min_hands: int = 20):
+    # Percentile rank of each of a player's stats within each context's population
+    try:
+        stats, tables = await population_for(tags, active, min_hands)
+        if player not in stats:
+            return {"status": "error", "message": f"No stats for player {player}"}
+        from stat_percentiles import percentile_ranks
+        return percentile_ranks(tables, stats, player)
+    except Exception as e:
+        print(f"Error in get_player_percentiles: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+@app.get("/stats/styles")
+async def get_styles(tags: Optional[str] = None, active: Optional[bool] = None, k: int = 5,
+                     context: Optional[str] = None, min_hands: int = 50, alt_distance: float = 0.75):
+    # k-means style clusters of the players with min_hands hands, overall or in one
+    # combined context, and mutual closest pairs within alt_distance (possible alts)
+    try:
+        stats = await selected_stats(tags, active)
+        from player_styles import StyleSpace
+        space = StyleSpace.from_stats(stats, context, min_hands)
+        return {
+            'players': len(space),
+            'clusters': space.clusters(k),
+            'alts': [
+                {'players': [player, other], 'distance': distance}
+                for player, other, distance in space.alt_candidates(alt_distance)
+            ]
+        }
+    except Exception as e:
+        print(f"Error in get_styles: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+@app.get("/stats/styles/{player}")
+async def get_similar_players(player: str, tags: Optional[str] = None, active: Optional[bool] = None,
+                              n: int = 5, context: Optional[str] = None, min_hands: int = 50):
+    # The n players closest in style to a player
+    try:
+        stats = await selected_stats(tags, active)
+        from player_styles import StyleSpace
+        space = StyleSpace.from_stats(stats, context, min_hands)
+        if player not in space.players:
+            return {"status": "error", "message": f"No style for player {player}, players need {min_hands} hands"}
+        return [{'player': other, 'distance': distance} for other, distance in space.similar(player, n)]
+    except Exception as e:
+        print(f"Error in get_similar_players: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+async def selected_session_ids(tags: Optional[str], active: Optional[bool]) -> List[int]:
+    # tags is a comma separated list, sessions matching any of them are selected
+    sessions = await get_storage_service().get_session_index()
+    tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()] if tags else None
+    return [session['id'] for session in select_sessions(sessions, tag_list, active)]
+
+async def selected_stats(tags: Optional[str], active: Optional[bool]):
+    return await stats_cache.get_stats(
+        await selected_session_ids(tags, active),
+        get_storage_service().get_session_rollups
+    )
+
+async def population_for(tags: Optional[str], active: Optional[bool], min_hands: int):
+    return await stats_cache.get_population(
+        await selected_session_ids(tags, active),
+        get_storage_service().get_session_rollups,
+        min_hands
+    )
+
+@app.get("/stats/intervals")
+async def get_stat_intervals(tags: Optional[str] = None, active: Optional[bool] = None,
+                             resamples: int = 2000, level: float = 0.95, seed: int = 0):
+    # Same session selection as /stats. Bootstrap intervals of VPIP, PFR, AF and WTSD from
+    # the hand profiles stored with each session's rollup; sessions uploaded before
+    # profiles were stored are counted as missing.
+    try:
+        session_ids = await selected_session_ids(tags, active)
+        from services.session_rollup import INTERVAL_KEYS, merge_rollups, rollup_to_analyzer
+        rollups = await get_storage_service().get_session_rollups(session_ids, INTERVAL_KEYS) if session_ids else []
+        rollups = [rollup for rollup in rollups if rollup and 'profiles' in rollup]
+
+        analyzer = rollup_to_analyzer(merge_rollups(rollups))
+        return {
+            'players': analyzer.get_intervals(resamples, level, seed),
+            'resamples': resamples,
+            'level': level,
+            'sessions': len(rollups),
+            'missing': len(session_ids) - len(rollups)
+        }
+    except Exception as e:
+        print(f"Error in get_stat_intervals: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+@app.get("/ledger")
+async def get_ledger(tags: Optional[str] = None, active: Optional[bool] = None):
+    # Same session selection as /stats. Sums the ledgers stored with each session's
+    # rollup; sessions uploaded before ledgers were stored are counted as missing.
+    try:
+        session_ids = await selected_session_ids(tags, active)
+        from services.session_rollup import LEDGER_KEYS
+        rollups = await get_storage_service().get_session_rollups(session_ids, LEDGER_KEYS) if session_ids else []
+        ledgers = [rollup['ledger'] for rollup in rollups if rollup and 'ledger' in rollup]
+
+        from chip_ledger import ledger_summary, merge_ledgers
+        summary = ledger_summary(merge_ledgers(ledgers))
+        summary['sessions'] = len(ledgers)
+        summary['missing'] = len(session_ids) - len(ledgers)
+        return summary
+    except Exception as e:
+        print(f"Error in get_ledger: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+@app.get("/hands/search")
+async def search_hands(q: str, tags: Optional[str] = None, active: Optional[bool] = None, limit: int = 100):
+    # Same session selection as /stats. Boolean hand search such as
+    # "player:a player:b street:river pot>500" (see hand_search) over the postings stored
+    # with each session's rollup; sessions uploaded before postings were stored are
+    # counted as missing. Lists the first `limit` matching hands.
+    try:
+        session_ids = await selected_session_ids(tags, active)
+        index, missing = await stats_cache.get_hand_index(
+            session_ids,
+            get_storage_service().get_session_rollups
+        )
+        started = time.perf_counter()
+        found = index.search(q)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        hands = []
+        for i in found[:max(limit, 0)].tolist():
+            row = index.row(i)
+            del row['log']  # Rollups don't know their session, hand ids are unique
+            hands.append(row)
+        return {
+            'query': q,
+            'matches': len(found),
+            'hands': hands,
+            'searched': len(index),
+            'milliseconds': elapsed_ms,
+            'sessions': len(session_ids) - missing,
+            'missing': missing
+        }
+    except Exception as e:
+        print(f"Error in search_hands: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
 @app.post("/sessions/bulk/tags")
 async def bulk_add_tag(update: BulkTagUpdate):
     try:
@@ -108,7 +377,8 @@ async def bulk_add_tag(update: BulkTagUpdate):
         print(f"Session IDs (type: {type(update.session_ids)}): {update.session_ids}")
         print(f"Tag (type: {type(update.tag)}): {update.tag}")
         
-        results = await supabase_service.bulk_add_tag(update.session_ids, update.tag)
+        results = await get_storage_service().bulk_add_tag(update.session_ids, update.tag)
+        stats_cache.invalidate()
         print("Operation successful")
         print(f"Results: {results}")
         return {"status": "success", "data": results}
@@ -121,7 +391,8 @@ async def bulk_add_tag(update: BulkTagUpdate):
 @app.post("/sessions/{session_id}/tags")
 async def add_tag(session_id: int, update: TagUpdate):
     try:
-        result = await supabase_service.add_tag(session_id, update.tag)
+        result = await get_storage_service().add_tag(session_id, update.tag)
+        stats_cache.invalidate()
         return {"status": "success", "data": result}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -129,7 +400,8 @@ async def add_tag(session_id: int, update: TagUpdate):
 @app.delete("/sessions/{session_id}/tags/{tag}")
 async def remove_tag(session_id: int, tag: str):
     try:
-        result = await supabase_service.remove_tag(session_id, tag)
+        result = await get_storage_service().remove_tag(session_id, tag)
+        stats_cache.invalidate()
         return {"status": "success", "data": result}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -138,7 +410,8 @@ async def remove_tag(session_id: int, tag: str):
 async def toggle_session_active(session_id: int, update: ActiveUpdate):
     try:
         print(f"Backend received toggle request for session {session_id} to active={update.active}")
-        result = await supabase_service.toggle_session_active(session_id, update.active)
+        result = await get_storage_service().toggle_session_active(session_id, update.active)
+        stats_cache.invalidate()
         print(f"Toggle result: {result}")
         return {"status": "success", "data": result}
     except Exception as e:
@@ -146,14 +419,15 @@ async def toggle_session_active(session_id: int, update: ActiveUpdate):
         return {"status": "error", "message": str(e)}
 
 @app.get("/healthcheck")
-async def healthcheck():
+async def healthcheck(deep: bool = False):
     try:
-        # Test Supabase connection
-        await supabase_service.get_sessions()
+        # Only test the storage connection when asked, so the check never initializes a client
+        if deep:
+            await get_storage_service().get_session_index()
         return JSONResponse(
             content={
                 "status": "ok",
-                "message": "Backend is running and Supabase connection is working",
+                "message": "Backend is running and storage connection is working" if deep else "Backend is running",
                 "timestamp": str(datetime.now()),
                 "environment": os.getenv('VERCEL_ENV', 'development')
             },
@@ -168,7 +442,7 @@ async def healthcheck():
             status_code=500,
             content={
                 "status": "error",
-                "message": "Backend is running but Supabase connection failed",
+                "message": "Backend is running but storage connection failed",
                 "error": str(e),
                 "timestamp": str(datetime.now()),
                 "environment": os.getenv('VERCEL_ENV', 'development')
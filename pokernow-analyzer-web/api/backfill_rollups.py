@@ -0,0 +1,38 @@
+import asyncio
+import os
+import sys
+from services.file_processor import FileProcessor
+from services.session_rollup import rollup_file
+from services.storage import get_storage_service
+
+async def backfill(log_dir: str) -> None:
+    """Compute and store rollups for uploaded sessions that don't have one yet."""
+    file_processor = FileProcessor()
+    storage_service = get_storage_service()
+
+    # Map file ids to log files, e.g. "poker_now_log_<id> (Alwin).csv" -> "<id>"
+    log_files = {}
+    for filename in sorted(os.listdir(log_dir)):
+        log_files.setdefault(file_processor.extract_file_id(filename), os.path.join(log_dir, filename))
+
+    sessions = await storage_service.get_sessions_without_rollup()
+    print(f"Found {len(sessions)} sessions without rollup")
+
+    for session in sessions:
+        file_path = log_files.get(session['file_name'])
+        if not file_path:
+            print(f"No log found for session {session['id']} ({session['file_name']})")
+            continue
+
+        try:
+            await storage_service.update_session_rollup(session['id'], rollup_file(file_path))
+            print(f"Backfilled session {session['id']} from {file_path}")
+        except Exception as e:
+            print(f"Error backfilling session {session['id']}: {str(e)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python backfill_rollups.py <log_directory>")
+        sys.exit(1)
+
+    asyncio.run(backfill(sys.argv[1]))
@@ -0,0 +1,87 @@
+import os
+import statistics
+import subprocess
+import sys
+from typing import Set, Tuple
+
+# Measures serverless cold-start cost of the API entry points with `python -X importtime`.
+# Fails (exit 1) if the median import time exceeds the budget or if a module that should
+# only load on first use (storage clients, parser, numpy, upload and archive handling) is
+# imported at startup.
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 600
+RUNS = 5
+
+LAZY_MODULES = (
+    'supabase',
+    'numpy',
+    'poker_analyzer',
+    'services.supabase_service',
+    'services.sqlite_service',
+    'services.job_queue',
+    'services.archives',
+    'services.file_processor',
+    'log_io',
+    'timestamps',
+    'zipfile',
+    'tarfile',
+    'lzma'
+)
+
+
+def import_profile(module: str) -> Tuple[dict, Set[str]]:
+    """
+    Import a module in a fresh interpreter and return {module: (self_us, cumulative_us)}
+    and the names of the modules it loaded, leaving out those loaded at interpreter
+    startup (site hooks may load zipfile or lzma before the app).
+    """
+    env = {**os.environ, 'STORAGE_BACKEND': os.getenv('STORAGE_BACKEND', 'supabase')}
+    code = f'import sys; loaded = set(sys.modules); import {module}; print(*set(sys.modules) - loaded)'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=API_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time:  <self us> | <cumulative us> | <indented module name>"
+        head, cumulative_us, name = line.split('|')
+        profile[name.strip()] = (int(head.split(':')[1]), int(cumulative_us))
+    return profile, set(result.stdout.split())
+
+
+def run(module: str, budget_ms: float) -> bool:
+    totals = []
+    profile, loaded = {}, set()
+    for _ in range(RUNS):
+        profile, loaded = import_profile(module)
+        totals.append(profile[module][1] / 1000)
+
+    median_ms = statistics.median(totals)
+    print(f"{module}: median {median_ms:.1f} ms over {RUNS} runs (budget {budget_ms:.0f} ms)")
+
+    slowest = sorted(profile.items(), key=lambda item: item[1][0], reverse=True)[:10]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {self_us / 1000:8.1f} ms self  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    if eager:
+        print(f"  imported at startup but should be lazy: {', '.join(eager)}")
+
+    return median_ms <= budget_ms and not eager
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        print("Usage: python benchmarks/bench_cold_start.py [budget_ms]")
+        sys.exit(1)
+
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    ok = all([run('app', budget_ms), run('index', budget_ms)])
+    sys.exit(0 if ok else 1)
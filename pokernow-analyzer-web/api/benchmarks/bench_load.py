@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import contextlib
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from services import repo_root
+
+# Drives the API with concurrent simulated users and reports p50/p95/p99 latency and
+# throughput per operation. By default the app runs in-process (httpx over ASGI) on an
+# in-memory storage backend with injected latency; --blocking makes that latency hold
+# the event loop, as the synchronous Supabase client does. With --url it loads a running
+# server instead, e.g. one started with
+#
+#   STORAGE_BACKEND=memory MEMORY_LATENCY_MS=30 MEMORY_BLOCKING=1 uvicorn app:app
+#
+# Exits 1 if any operation's p95 exceeds --max-p95-ms.
+
+LOG_DIR = os.path.join(repo_root, 'logs')
+LOG_PREFIX = 'poker_now_log_'
+DEFAULT_MIX = 'upload=1,sessions=5,tags=2,stats=2'
+OPERATIONS = ('upload', 'sessions', 'tags', 'stats')
+TAGS = ('home', 'plo', 'league', 'friday')
+SEED_SESSIONS = 10
+
+
+def parse_mix(text: str) -> dict:
+    """Operation weights from "upload=1,sessions=5,..."."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentiles(latencies: list) -> tuple:
+    """p50, p95 and p99 of a list of latencies."""
+    if len(latencies) == 1:
+        return latencies * 3
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return cuts[49], cuts[94], cuts[98]
+
+
+class Uploads:
+    """Distinct copies of the bundled logs, so every upload is parsed rather than skipped as known."""
+
+    def __init__(self, log_dir: str):
+        self.logs = []
+        for path in sorted(glob.glob(os.path.join(log_dir, f'{LOG_PREFIX}*.csv'))):
+            with open(path, 'rb') as f:
+                self.logs.append((os.path.basename(path), f.read()))
+        if not self.logs:
+            raise Exception(f"No logs found in {log_dir}")
+        self.count = 0
+
+    def next(self) -> tuple:
+        name, content = self.logs[self.count % len(self.logs)]
+        self.count += 1
+        # New game id and trailing blank lines (ignored by the parser) for a new content hash
+        return f"{LOG_PREFIX}load{self.count}_{name[len(LOG_PREFIX):]}", content + b'\n' * self.count
+
+
+async def request(client: httpx.AsyncClient, operation: str, uploads: Uploads, session_ids: list,
+                  rng: random.Random) -> httpx.Response:
+    if operation == 'upload':
+        name, content = uploads.next()
+        return await client.post('/upload', files=[('files', (name, content, 'text/csv'))])
+    if operation == 'sessions':
+        return await client.get('/sessions')
+    if operation == 'tags':
+        chosen = rng.sample(session_ids, min(len(session_ids), rng.randint(1, 10)))
+        return await client.post('/sessions/bulk/tags', json={'session_ids': chosen, 'tag': rng.choice(TAGS)})
+    return await client.get('/stats', params={'tags': rng.choice(TAGS)} if rng.random() < 0.5 else None)
+
+
+def failed(response: httpx.Response) -> bool:
+    if response.status_code != 200:
+        return True
+    body = response.json()
+    return isinstance(body, dict) and body.get('status') == 'error'
+
+
+async def run_load(client: httpx.AsyncClient, mix: dict, users: int, requests: int, log_dir: str,
+                   seed: int = 0) -> dict:
+    """Seed some sessions, then run `requests` operations drawn from mix over `users` concurrent users."""
+    rng = random.Random(seed)
+    uploads = Uploads(log_dir)
+    for _ in range(SEED_SESSIONS):
+        name, content = uploads.next()
+        await client.post('/upload', files=[('files', (name, content, 'text/csv'))])
+    session_ids = [session['id'] for session in (await client.get('/sessions')).json()]
+    if not session_ids:
+        raise Exception("Seeding uploads failed, no sessions to read")
+
+    names = list(mix)
+    queue = rng.choices(names, weights=[mix[name] for name in names], k=requests)
+    results = {name: {'latencies': [], 'errors': 0} for name in names}
+
+    async def user(user_rng: random.Random) -> None:
+        while queue:
+            operation = queue.pop()
+            started = time.perf_counter()
+            try:
+                response = await request(client, operation, uploads, session_ids, user_rng)
+                error = failed(response)
+            except httpx.HTTPError:
+                error = True
+            results[operation]['latencies'].append(time.perf_counter() - started)
+            results[operation]['errors'] += error
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(random.Random(rng.random())) for _ in range(users)))
+    return {'seconds': time.perf_counter() - started, 'operations': results}
+
+
+def report(results: dict, max_p95_ms: float = None) -> bool:
+    seconds = results['seconds']
+    total = sum(len(result['latencies']) for result in results['operations'].values())
+    print(f"{total} requests in {seconds:.2f}s, {total / seconds:.1f} req/s")
+    print(f"{'operation':<10} {'count':>6} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    ok = True
+    everything = []
+    for name, result in results['operations'].items():
+        latencies = result['latencies']
+        if not latencies:
+            continue
+        everything += latencies
+        p50, p95, p99 = (value * 1000 for value in percentiles(latencies))
+        print(f"{name:<10} {len(latencies):>6} {result['errors']:>6} {len(latencies) / seconds:>7.1f} "
+              f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+        ok = ok and result['errors'] == 0 and (max_p95_ms is None or p95 <= max_p95_ms)
+    if everything:
+        p50, p95, p99 = (value * 1000 for value in percentiles(everything))
+        print(f"{'all':<10} {len(everything):>6} {'':>6} {total / seconds:>7.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+    return ok
+
+
+async def main(args: argparse.Namespace) -> bool:
+    mix = parse_mix(args.mix)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            results = await run_load(client, mix, args.users, args.requests, args.logs, args.seed)
+    else:
+        import app as app_module
+        from services.memory_service import MemoryService
+
+        storage = MemoryService(args.latency_ms / 1000, args.jitter_ms / 1000, args.blocking, args.seed)
+        app_module.get_storage_service = lambda: storage
+        transport = httpx.ASGITransport(app=app_module.app)
+        # The app's request logging goes to /dev/null so it doesn't bury the report
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            async with httpx.AsyncClient(transport=transport, base_url='http://load', timeout=args.timeout) as client:
+                results = await run_load(client, mix, args.users, args.requests, args.logs, args.seed)
+        print(f"storage: {storage.calls} calls, {args.latency_ms:.0f} ms + up to {args.jitter_ms:.0f} ms each"
+              f"{', blocking' if args.blocking else ''}")
+    return report(results, args.max_p95_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the API with a mix of uploads and reads')
+    parser.add_argument('--url', help='Base URL of a running server, instead of the app in-process')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent users')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Operation weights (default {DEFAULT_MIX})')
+    parser.add_argument('--latency-ms', type=float, default=30.0, help='Injected latency per storage call')
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--blocking', action='store_true', help='Hold the event loop during storage calls')
+    parser.add_argument('--logs', default=LOG_DIR, help='Directory of logs to upload')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-p95-ms', type=float, help='Fail if any operation\'s p95 is above this')
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
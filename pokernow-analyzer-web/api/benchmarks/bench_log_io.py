@@ -0,0 +1,52 @@
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services  # noqa: F401  (puts the repo root on sys.path)
+from log_io import compact, find_logs
+from poker_analyzer import read_log
+
+# Parses a directory of logs stored as plain CSV, .csv.gz, .csv.xz and dictionary
+# compressed .csv.zst (as written by `poker_analyzer.py compact`), and reports the
+# size on disk and parse time of each.
+
+def parse_all(paths):
+    started = time.perf_counter()
+    hands = sum(len(read_log(path)[0]) for path in paths)
+    return hands, time.perf_counter() - started
+
+
+def run(log_dir: str) -> None:
+    sources = find_logs([log_dir])
+    sources = [path for path in sources if path.endswith('.csv')]
+    work = tempfile.mkdtemp()
+    try:
+        layouts = {'csv': sources, 'gz': [], 'xz': []}
+        for suffix, module in (('gz', gzip), ('xz', lzma)):
+            os.makedirs(os.path.join(work, suffix))
+            for path in sources:
+                output = os.path.join(work, suffix, os.path.basename(path) + '.' + suffix)
+                with open(path, 'rb') as f, module.open(output, 'wb') as out:
+                    shutil.copyfileobj(f, out)
+                layouts[suffix].append(output)
+        layouts['zst'] = sorted(compact(sources, os.path.join(work, 'zst')))
+
+        for name, paths in layouts.items():
+            size = sum(os.path.getsize(path) for path in paths)
+            hands, elapsed = parse_all(paths)
+            print(f"{name:<4} {size / 1e6:8.1f} MB  {hands:>7} hands  {elapsed * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(work)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python benchmarks/bench_log_io.py <logs_dir>")
+        sys.exit(1)
+
+    run(sys.argv[1])
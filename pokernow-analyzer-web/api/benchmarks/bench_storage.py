@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.sqlite_service import SqliteService
+
+async def run(database: str, sessions: int) -> None:
+    storage = SqliteService(database)
+    start = datetime.now(timezone.utc)
+
+    def timed(label, count, started):
+        elapsed = time.perf_counter() - started
+        print(f"{label:<20} {count:>6} ops  {elapsed * 1000:8.1f} ms  {elapsed / count * 1e6:8.1f} us/op")
+
+    started = time.perf_counter()
+    for i in range(sessions):
+        await storage.create_session({
+            'file_id': f'bench_{i}',
+            'start_time': start - timedelta(hours=i),
+            'end_time': start - timedelta(hours=i - 2),
+            'rollup': {'version': 1, 'players': {}, 'hands': {}}
+        })
+    timed('create_session', sessions, started)
+
+    started = time.perf_counter()
+    for i in range(sessions):
+        await storage.check_file_exists(f'bench_{i}')
+    timed('check_file_exists', sessions, started)
+
+    started = time.perf_counter()
+    await storage.bulk_add_tag(list(range(1, sessions + 1)), 'bench')
+    timed('bulk_add_tag', sessions, started)
+
+    started = time.perf_counter()
+    await storage.get_sessions()
+    timed('get_sessions', 1, started)
+
+    started = time.perf_counter()
+    await storage.get_session_rollups(list(range(1, sessions + 1)))
+    timed('get_session_rollups', 1, started)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3:
+        print("Usage: python benchmarks/bench_storage.py [database] [sessions]")
+        sys.exit(1)
+
+    database = sys.argv[1] if len(sys.argv) > 1 else ':memory:'
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    asyncio.run(run(database, sessions))
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytz
+from services.storage import StorageService
+from timestamps import order_to_datetime, parse_iso
+
+# Compares session formatting and log timestamp parsing against the previous
+# per-row path (fromisoformat + pytz astimezone + strftime for every field).
+
+def legacy_format(sessions):
+    pst_timezone = pytz.timezone('America/Los_Angeles')
+    formatted = []
+    for session in sessions:
+        start_time = datetime.fromisoformat(session['start_time'].replace('Z', '+00:00'))
+        start_time_pst = start_time.astimezone(pst_timezone)
+        upload_time = datetime.fromisoformat(session['upload_time'].replace('Z', '+00:00'))
+        upload_time_pst = upload_time.astimezone(pst_timezone)
+        formatted.append({
+            'display_name': start_time_pst.strftime('%B %-d, %Y %-I:%M%p'),
+            'upload_date': upload_time_pst.strftime('%B %-d, %Y %-I:%M%p'),
+            'start_time': datetime.fromisoformat(session['start_time'].replace('Z', '+00:00')).isoformat(),
+            'end_time': datetime.fromisoformat(session['end_time'].replace('Z', '+00:00')).isoformat()
+        })
+    return formatted
+
+
+class _Formatter(StorageService):
+    # Only the shared formatting helpers are exercised
+    create_session = check_file_exists = get_sessions = get_session_index = None
+    get_session_rollups = get_sessions_without_rollup = update_session_rollup = None
+    toggle_session_active = add_tag = remove_tag = None
+
+
+def timed(label, func, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} {best * 1000:8.2f} ms")
+    return result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    now = datetime.now(timezone.utc)
+    upload_time = now.isoformat()  # Bulk uploads share their upload minute
+    sessions = [{
+        'id': i,
+        'file_name': f'game_{i}',
+        'start_time': (now - timedelta(hours=3 * i)).isoformat().replace('+00:00', 'Z'),
+        'end_time': (now - timedelta(hours=3 * i - 2)).isoformat(),
+        'upload_time': upload_time,
+        'active': True,
+        'tags': [],
+        'rollup': None
+    } for i in range(count)]
+
+    legacy = timed(f"legacy format ({count} rows)", legacy_format, sessions)
+    fast = timed(f"format_sessions ({count} rows)", _Formatter().format_sessions, sessions)
+    assert [row['display_name'] for row in legacy] == [row['display_name'] for row in fast]
+    assert [row['upload_date'] for row in legacy] == [row['upload_date'] for row in fast]
+
+    orders = [str(170107079765009 + i * 123457) for i in range(count)]
+    ats = [order_to_datetime(order).isoformat().replace('+00:00', 'Z') for order in orders]
+    timed(f"parse 'at' column ({count} rows)", lambda: [parse_iso(at) for at in ats])
+    timed(f"parse 'order' column ({count} rows)", lambda: [order_to_datetime(order) for order in orders])
@@ -0,0 +1,2 @@
+-- Precomputed per-session rollup (per-player counters, game/table mix)
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS rollup jsonb;
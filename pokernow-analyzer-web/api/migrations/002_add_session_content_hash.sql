@@ -0,0 +1,4 @@
+-- SHA-256 of the uploaded log, used to skip duplicate uploads before parsing
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS content_hash text;
+CREATE INDEX IF NOT EXISTS idx_sessions_content_hash ON sessions (content_hash);
+CREATE INDEX IF NOT EXISTS idx_sessions_file_name ON sessions (file_name);
@@ -0,0 +1,7 @@
+-- Concurrent uploads of the same log both pass the duplicate check; the unique index
+-- makes the second insert fail, and the API reports it as skipped (NULLs may repeat).
+-- Rows uploaded twice before this migration must be removed first, see:
+--   SELECT content_hash, array_agg(id) FROM sessions
+--   WHERE content_hash IS NOT NULL GROUP BY content_hash HAVING count(*) > 1;
+DROP INDEX IF EXISTS idx_sessions_content_hash;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_content_hash_unique ON sessions (content_hash);
@@ -1,6 +1,5 @@
 from http.server import HTTPServer, SimpleHTTPRequestHandler
-import json
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, urlparse
 import cgi
 import os
 import sys
@@ -13,6 +12,7 @@ src_path = os.path.join(current_dir, 'src')
 sys.path.append(src_path)
 
 from poker_analyzer import PokerAnalyzer
+from services.serialization import encode_stats
 
 UPLOAD_FOLDER = os.path.join(current_dir, 'uploads')
 if not os.path.exists(UPLOAD_FOLDER):
@@ -25,7 +25,8 @@ class CORSRequestHandler(SimpleHTTPRequestHandler):
         self.end_headers()
 
     def do_POST(self):
-        if self.path == '/analyze':
+        url = urlparse(self.path)
+        if url.path == '/analyze':
             try:
                 # Parse the multipart form data
                 content_type = self.headers.get('Content-Type')
@@ -66,12 +67,17 @@ class CORSRequestHandler(SimpleHTTPRequestHandler):
                     analyzer.parse_log(filepath)
                     stats = analyzer.get_stats()
 
+                    # The get_stats layout by default; ?shape=columnar for parallel arrays
+                    shape = parse_qs(url.query).get('shape', ['nested'])[0]
+                    body, media_type = encode_stats(stats, self.headers.get('Accept'), shape)
+
                     # Send response
                     self.send_response(200)
                     self.send_cors_headers()
-                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Type', media_type)
+                    self.send_header('Content-Length', str(len(body)))
                     self.end_headers()
-                    self.wfile.write(json.dumps(stats).encode())
+                    self.wfile.write(body)
 
                 finally:
                     if os.path.exists(filepath):
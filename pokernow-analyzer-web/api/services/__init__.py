@@ -0,0 +1,7 @@
+import os
+import sys
+
+# poker_analyzer.py and timestamps.py live at the repository root
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if repo_root not in sys.path:
+    sys.path.append(repo_root)
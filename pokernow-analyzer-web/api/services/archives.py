@@ -0,0 +1,65 @@
+import os
+import tarfile
+import zipfile
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+# Bulk uploads: a .zip or .tar.zst of PokerNow logs is read member by member from the
+# uploaded stream, so members are never written to disk. zstandard is only imported
+# when a .tar.zst arrives.
+
+ZIP_SUFFIXES = ('.zip',)
+TAR_ZST_SUFFIXES = ('.tar.zst', '.tzst')
+LOG_SUFFIXES = ('.csv',)
+
+# Members larger than this once decompressed are skipped rather than read into memory
+MAX_MEMBER_BYTES = 256 * 1024 * 1024
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ZIP_SUFFIXES + TAR_ZST_SUFFIXES)
+
+
+def _is_log(name: str) -> bool:
+    base = os.path.basename(name)
+    return name.lower().endswith(LOG_SUFFIXES) and not base.startswith('.') and '__MACOSX' not in name
+
+
+def _iter_zip(fileobj: BinaryIO) -> Iterator[Tuple[str, Optional[bytes]]]:
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not _is_log(info.filename):
+                continue
+            if info.file_size > MAX_MEMBER_BYTES:
+                yield info.filename, None
+                continue
+            with archive.open(info) as member:
+                content = member.read(MAX_MEMBER_BYTES + 1)
+            # file_size comes from the archive's directory, check what was actually inflated
+            yield info.filename, content if len(content) <= MAX_MEMBER_BYTES else None
+
+
+def _iter_tar_zst(fileobj: BinaryIO) -> Iterator[Tuple[str, Optional[bytes]]]:
+    import zstandard
+
+    with zstandard.ZstdDecompressor().stream_reader(fileobj) as reader:
+        # "r|" reads the tar sequentially from the decompressed stream, no seeking
+        with tarfile.open(fileobj=reader, mode='r|') as archive:
+            for info in archive:
+                if not info.isfile() or not _is_log(info.name):
+                    continue
+                if info.size > MAX_MEMBER_BYTES:
+                    yield info.name, None
+                    continue
+                yield info.name, archive.extractfile(info).read()
+
+
+def iter_archive(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    Yield (member name, content) for each .csv log in a .zip or .tar.zst archive,
+    one member in memory at a time. content is None for members over MAX_MEMBER_BYTES.
+    """
+    if filename.lower().endswith(ZIP_SUFFIXES):
+        return _iter_zip(fileobj)
+    if filename.lower().endswith(TAR_ZST_SUFFIXES):
+        return _iter_tar_zst(fileobj)
+    raise ValueError(f"Unsupported archive type: {filename}")
@@ -1,17 +1,22 @@
 import csv
+import hashlib
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import BinaryIO, Dict, Optional, List
 import re
+from log_io import LogSource, open_log
+from timestamps import row_timestamp
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 class FileProcessor:
     def __init__(self):
         self.hand_start_pattern = re.compile(r"-- starting hand #1")
         self.hand_end_pattern = re.compile(r"-- ending hand #\d+")
 
-    def process_file(self, file_path: str) -> Dict:
-        """Process a poker session CSV file and extract relevant information."""
+    def process_file(self, file_path: LogSource) -> Dict:
+        """Process a poker session CSV file (path or open text stream) and extract relevant information."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
+            with open_log(file_path) as file:
                 # Skip header
                 next(file)
                 
@@ -47,18 +52,12 @@ class FileProcessor:
     def _extract_timestamp(self, line: str) -> datetime:
         """Extract timestamp from a line of the CSV file."""
         try:
-            parts = line.strip().split(',')
+            # The entry may contain commas, the at and order columns never do
+            parts = line.strip().rsplit(',', 2)
             if len(parts) < 3:
                 raise ValueError("Invalid line format")
             
-            # Get timestamp between second-to-last and last comma
-            timestamp_str = parts[-2].strip()
-            
-            # Handle 'Z' timezone indicator
-            if timestamp_str.endswith('Z'):
-                timestamp_str = timestamp_str[:-1] + '+00:00'
-            
-            return datetime.fromisoformat(timestamp_str)
+            return row_timestamp(parts)
         except Exception as e:
             raise ValueError(f"Error extracting timestamp: {str(e)}")
 
@@ -68,4 +67,19 @@ class FileProcessor:
         if filename.startswith(prefix):
             # Remove prefix and any file extension
             return filename[len(prefix):].split('.')[0].split(' ')[0]  # Also remove any text in parentheses
-        return filename.split('.')[0] 
\ No newline at end of file
+        return filename.split('.')[0]
+
+    async def save_upload(self, upload, destination: BinaryIO) -> str:
+        """
+        Stream an uploaded file to destination in chunks, hashing it on the way.
+        Returns the SHA-256 hex digest of the content.
+        """
+        digest = hashlib.sha256()
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            destination.write(chunk)
+        destination.flush()
+        return digest.hexdigest()
@@ -0,0 +1,187 @@
+import asyncio
+import io
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
+import orjson
+from services.file_processor import FileProcessor
+from services.session_rollup import rollup_file
+from services.sqlite_service import ConnectionPool
+from services.storage import StorageService
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    hands_processed INTEGER NOT NULL DEFAULT 0,
+    hands_total INTEGER,
+    session_id INTEGER,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+"""
+
+INSERT_JOB = """
+INSERT INTO jobs (id, filename, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)
+"""
+SELECT_JOB = "SELECT * FROM jobs WHERE id = ?"
+
+FAIL_UNFINISHED_JOBS = """
+UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE status IN ('queued', 'running')
+"""
+
+JOB_COLUMNS = {'status', 'hands_processed', 'hands_total', 'session_id', 'error'}
+FINISHED_STATUSES = {'done', 'failed', 'skipped'}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore:
+    """SQLite-backed job table, shared by the API process and the parse workers."""
+
+    def __init__(self, database: str):
+        self.pool = ConnectionPool(database, size=2)
+        with self.pool.connection() as conn:
+            conn.executescript(JOB_SCHEMA)
+
+    def create(self, filename: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self.pool.connection() as conn:
+            conn.execute(INSERT_JOB, (job_id, filename, now, now))
+        return job_id
+
+    def update(self, job_id: str, **fields) -> None:
+        unknown = set(fields) - JOB_COLUMNS
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.pool.connection() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*fields.values(), _now(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_JOB, (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def fail_unfinished(self, error: str) -> int:
+        """Mark queued and running jobs as failed. Returns the number of jobs marked."""
+        with self.pool.connection() as conn:
+            return conn.execute(FAIL_UNFINISHED_JOBS, (error, _now())).rowcount
+
+
+_worker_stores: Dict[str, JobStore] = {}
+
+
+def parse_upload(job_id: str, jobs_database: str, file_path: Optional[str], content: Optional[bytes] = None) -> Dict:
+    """
+    Parse an uploaded log in a worker process, reporting hand progress to the job table.
+    The log is read from file_path, or from content for members of an uploaded archive.
+    Returns the file data (times and rollup) ready to be stored as a session.
+    """
+    store = _worker_stores.get(jobs_database)
+    if store is None:
+        store = _worker_stores[jobs_database] = JobStore(jobs_database)
+
+    store.update(job_id, status='running')
+    source = file_path if content is None else io.StringIO(content.decode('utf-8'))
+    file_data = FileProcessor().process_file(source)
+    file_data['rollup'] = rollup_file(
+        source,
+        lambda processed, total: store.update(job_id, hands_processed=processed, hands_total=total)
+    )
+    return file_data
+
+
+class JobQueue:
+    """
+    In-process queue of upload jobs. Parsing runs in a process pool capped at
+    `workers` processes, so it never holds the event loop serving API requests.
+    """
+
+    def __init__(self, storage_service: StorageService, jobs_database: str = 'jobs.db', workers: int = 2):
+        self.storage_service = storage_service
+        self.jobs_database = jobs_database
+        self.workers = workers
+        self.store = JobStore(jobs_database)
+        # The queue lives in this process, so jobs left unfinished by a previous one never will be
+        self.store.fail_unfinished('Interrupted by a server restart')
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._tasks = []
+
+    def _start(self) -> None:
+        # Created lazily so the queue binds to the running event loop
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(
+        self, filename: str, file_path: Optional[str], file_data: Dict, content: Optional[bytes] = None
+    ) -> str:
+        """
+        Queue a saved upload for parsing and return its job id.
+        file_data holds the already known fields (file_id, content_hash).
+        The file at file_path is removed once the job finishes. Archive members are
+        passed as content instead, with no file_path.
+        """
+        self._start()
+        job_id = self.store.create(filename)
+        await self.queue.put((job_id, file_path, file_data, content))
+        return job_id
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id, file_path, file_data, content = await self.queue.get()
+            try:
+                parsed = await loop.run_in_executor(
+                    self.executor, parse_upload, job_id, self.jobs_database, file_path, content
+                )
+                # Uploads of the same log may have been stored meanwhile
+                session = await self.storage_service.create_session_once({**file_data, **parsed})
+                if session is None:
+                    self.store.update(job_id, status='skipped', error='Already uploaded')
+                else:
+                    self.store.update(job_id, status='done', session_id=session['id'])
+            except Exception as e:
+                self.store.update(job_id, status='failed', error=str(e))
+            finally:
+                if file_path and os.path.exists(file_path):
+                    os.unlink(file_path)
+                self.queue.task_done()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    async def events(self, job_id: str, interval: float = 0.5) -> AsyncIterator[str]:
+        """Yield server-sent events with the job state whenever it changes, until it finishes."""
+        last = None
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {orjson.dumps({'error': 'Job not found'}).decode()}\n\n"
+                return
+            if job != last:
+                yield f"data: {orjson.dumps(job).decode()}\n\n"
+                last = job
+            if job['status'] in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(interval)
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
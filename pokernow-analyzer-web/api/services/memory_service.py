@@ -0,0 +1,141 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+from services.storage import DuplicateSessionError, StorageService, select_rollup_keys
+
+# Stand-in for Supabase in load tests and local runs: sessions live in a dict and every
+# call waits `latency` seconds (plus up to `jitter` more) like a network round trip.
+# The real client is synchronous, so a SupabaseService call holds the event loop for
+# the whole round trip; blocking=True reproduces that with time.sleep, while the
+# default awaits asyncio.sleep like an async client would.
+
+
+class MemoryService(StorageService):
+    """In-memory storage backend with injected latency, a drop-in replacement for SupabaseService."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, blocking: bool = False, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.blocking = blocking
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._sessions: Dict[int, Dict] = {}
+        self._next_id = 1
+
+    async def _round_trip(self) -> None:
+        self.calls += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay <= 0:
+            return
+        if self.blocking:
+            time.sleep(delay)
+        else:
+            await asyncio.sleep(delay)
+
+    def _get_session(self, session_id: int) -> Dict:
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise Exception("Session not found")
+        return session
+
+    @staticmethod
+    def _row(session: Dict, with_rollup: bool = True) -> Dict:
+        # Rows are copies, like decoded responses; rollups are shared and must be treated as read-only
+        row = {**session, 'tags': list(session['tags'])}
+        if not with_rollup:
+            del row['rollup']
+        return row
+
+    async def create_session(self, file_data: Dict) -> Dict:
+        """Create a new session in memory."""
+        await self._round_trip()
+        content_hash = file_data.get('content_hash')
+        if content_hash and any(session['content_hash'] == content_hash for session in self._sessions.values()):
+            raise DuplicateSessionError("Error creating session: content_hash already exists")
+        session = {
+            'id': self._next_id,
+            'file_name': file_data['file_id'],
+            'content_hash': file_data.get('content_hash'),
+            'start_time': file_data['start_time'].isoformat(),
+            'end_time': file_data['end_time'].isoformat(),
+            'upload_time': datetime.now(timezone.utc).isoformat(),
+            'active': True,
+            'tags': [],
+            'rollup': file_data.get('rollup')
+        }
+        self._sessions[self._next_id] = session
+        self._next_id += 1
+        return self._row(session, with_rollup=False)
+
+    async def check_file_exists(self, file_name: str, content_hash: Optional[str] = None) -> bool:
+        """Check if a file has already been uploaded, by game id or by content hash."""
+        await self._round_trip()
+        return any(
+            session['file_name'] == file_name or (content_hash and session['content_hash'] == content_hash)
+            for session in self._sessions.values()
+        )
+
+    async def get_sessions(self) -> List[Dict]:
+        """Get all sessions."""
+        await self._round_trip()
+        sessions = sorted(self._sessions.values(), key=lambda session: session['start_time'], reverse=True)
+        return self.format_sessions([self._row(session) for session in sessions])
+
+    async def get_session_index(self) -> List[Dict]:
+        await self._round_trip()
+        return [
+            {'id': session['id'], 'tags': list(session['tags']), 'active': session['active']}
+            for session in self._sessions.values()
+        ]
+
+    async def get_session_rollups(self, session_ids: List[int], keys: Optional[Sequence[str]] = None) -> List[Dict]:
+        await self._round_trip()
+        return [
+            select_rollup_keys(self._sessions[session_id]['rollup'], keys) for session_id in session_ids
+            if session_id in self._sessions and self._sessions[session_id]['rollup'] is not None
+        ]
+
+    async def get_sessions_without_rollup(self) -> List[Dict]:
+        await self._round_trip()
+        return [
+            {'id': session['id'], 'file_name': session['file_name']}
+            for session in self._sessions.values() if session['rollup'] is None
+        ]
+
+    async def update_session_rollup(self, session_id: int, rollup: Dict) -> Dict:
+        await self._round_trip()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise Exception("Error updating session rollup: No session found with that ID")
+        session['rollup'] = rollup
+        return self._row(session, with_rollup=False)
+
+    async def toggle_session_active(self, session_id: int, active: bool) -> Dict:
+        await self._round_trip()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise Exception("Error toggling session active status: No session found with that ID")
+        session['active'] = active
+        return self._row(session, with_rollup=False)
+
+    async def add_tag(self, session_id: int, tag: str) -> Dict:
+        await self._round_trip()
+        try:
+            session = self._get_session(session_id)
+        except Exception as e:
+            raise Exception(f"Error adding tag: {str(e)}")
+        if tag not in session['tags']:
+            session['tags'].append(tag)
+        return self._row(session, with_rollup=False)
+
+    async def remove_tag(self, session_id: int, tag: str) -> Dict:
+        await self._round_trip()
+        try:
+            session = self._get_session(session_id)
+        except Exception as e:
+            raise Exception(f"Error removing tag: {str(e)}")
+        if tag in session['tags']:
+            session['tags'].remove(tag)
+        return self._row(session, with_rollup=False)
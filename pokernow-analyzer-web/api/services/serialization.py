@@ -0,0 +1,91 @@
+from typing import Dict, Optional, Tuple
+import orjson
+import msgspec
+from fastapi.responses import Response
+
+# Order of the per-context metrics produced by PokerAnalyzer.calculate_context_stats
+METRICS = (
+    'PFR', 'VPIP', 'AF', 'WTSD',
+    'Hands', 'Hands Played', 'Preflop Raises', 'Showdowns', 'Flop Hands',
+    'Bets', 'Raises', 'Calls', '3Bets', '4Bets', '5Bets'
+)
+
+CONTEXT_FAMILIES = ('by_game_type', 'by_table_size', 'by_combined')
+
+MSGPACK_MEDIA_TYPE = 'application/x-msgpack'
+
+_msgpack_encoder = msgspec.msgpack.Encoder()
+
+
+def columnar_stats(stats: Dict[str, Dict[str, Dict]]) -> Dict:
+    """
+    Convert the nested output of PokerAnalyzer.get_stats into a columnar shape:
+    one player list plus parallel arrays per metric for each context family.
+    """
+    players = sorted(stats)
+    overall = {metric: [] for metric in METRICS}
+    families = {
+        family: {'player': [], 'context': [], **{metric: [] for metric in METRICS}}
+        for family in CONTEXT_FAMILIES
+    }
+
+    for index, player in enumerate(players):
+        player_stats = stats[player]
+        row = player_stats['overall']
+        for metric in METRICS:
+            overall[metric].append(row.get(metric, 0))
+
+        for family in CONTEXT_FAMILIES:
+            columns = families[family]
+            for context, row in player_stats.get(family, {}).items():
+                columns['player'].append(index)
+                columns['context'].append(context)
+                for metric in METRICS:
+                    columns[metric].append(row.get(metric, 0))
+
+    return {
+        'players': players,
+        'metrics': list(METRICS),
+        'overall': overall,
+        **families
+    }
+
+
+def dumps(payload) -> bytes:
+    """Serialize a payload to JSON bytes with orjson."""
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_msgpack(payload) -> bytes:
+    """Serialize a payload to MessagePack bytes with msgspec."""
+    return _msgpack_encoder.encode(payload)
+
+
+class StatsJSONResponse(Response):
+    media_type = 'application/json'
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Return True if the client opted into MessagePack via the Accept header."""
+    return bool(accept) and MSGPACK_MEDIA_TYPE in accept
+
+
+def encode_stats(stats: Dict, accept: Optional[str] = None, shape: str = 'nested') -> Tuple[bytes, str]:
+    """
+    Encode a get_stats payload, returning (body, media_type).
+    shape is 'nested' (default) for the get_stats layout or 'columnar' for parallel arrays.
+    """
+    payload = columnar_stats(stats) if shape == 'columnar' else stats
+    if wants_msgpack(accept):
+        return dumps_msgpack(payload), MSGPACK_MEDIA_TYPE
+    return dumps(payload), 'application/json'
+
+
+def stats_response(stats: Dict, accept: Optional[str] = None, shape: str = 'nested') -> Response:
+    """Build a FastAPI response for a get_stats payload without going through jsonable_encoder."""
+    body, media_type = encode_stats(stats, accept, shape)
+    return Response(content=body, media_type=media_type)
+
@@ -0,0 +1,195 @@
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+
+# poker_analyzer (repository root, see services/__init__.py) is imported inside the
+# functions that parse or rebuild stats, so session listing doesn't load the parser.
+if TYPE_CHECKING:
+    from log_io import LogSource
+    from poker_analyzer import PokerAnalyzer
+
+ROLLUP_VERSION = 1
+
+# Top-level rollup keys read by each consumer, so storage only returns those: the hand
+# profiles, ledger and search postings are several times the size of the counters.
+STATS_KEYS = ('counters', 'players', 'hands')
+INTERVAL_KEYS = STATS_KEYS + ('profiles',)
+LEDGER_KEYS = ('ledger',)
+LISTING_KEYS = ('players', 'hands')  # Player names and game mix of /sessions
+SEARCH_KEYS = ('search',)
+
+# Order of the counters stored per player and context, matches stat_plugins.STAT_FIELDS
+COUNTER_FIELDS = (
+    'total_hands',
+    'hands_played',
+    'preflop_raise_hands',
+    'showdown_hands',
+    'three_bet_hands',
+    'four_bet_hands',
+    'five_bet_hands',
+    'flop_hands',
+    'total_bets',
+    'total_raises',
+    'total_calls'
+)
+
+
+def build_rollup(analyzer: 'PokerAnalyzer') -> Dict:
+    """
+    Build a compact per-session rollup from a parsed analyzer.
+
+    Only the combined (game type x table size) counters are stored since every
+    other context, including the overall stats, is a sum over them. Hand profiles
+    (see stat_intervals) are stored per player and context as [hands, *profile] rows.
+    """
+    players = {}
+    for player, data in analyzer.players.items():
+        contexts = {
+            context: [stats[name] for name in COUNTER_FIELDS]
+            for context, stats in data.combined_stats.items()
+            if stats['total_hands'] > 0
+        }
+        if contexts:
+            players[player] = contexts
+
+    return {
+        'version': ROLLUP_VERSION,
+        'counters': list(COUNTER_FIELDS),
+        'players': players,
+        'hands': dict(analyzer.context_hands),
+        'profiles': profile_rows(
+            (player, context, profile, hands)
+            for player, data in analyzer.players.items()
+            for context, profiles in data.hand_profiles.items()
+            for profile, hands in profiles.items()
+        )
+    }
+
+
+def profile_rows(profiles: Iterable[tuple]) -> Dict[str, Dict[str, List[List[int]]]]:
+    """Sum (player, context, profile, hands) into sorted [hands, *profile] rows per player and context."""
+    totals: Dict[tuple, int] = {}
+    for player, context, profile, hands in profiles:
+        key = (player, context, tuple(profile))
+        totals[key] = totals.get(key, 0) + hands
+
+    rows: Dict[str, Dict[str, List[List[int]]]] = {}
+    for (player, context, profile), hands in sorted(totals.items()):
+        rows.setdefault(player, {}).setdefault(context, []).append([hands, *profile])
+    return rows
+
+
+def rollup_file(file_path: 'LogSource', progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Run the analyzer over a log file (path or open text stream) and return its rollup,
+    with the session's chip ledger (see chip_ledger) under 'ledger' and its hand search
+    postings (see hand_search) under 'search'.
+    """
+    from chip_ledger import read_ledger
+    from hand_search import posting_lists
+    from poker_analyzer import PokerAnalyzer, read_log
+
+    read = read_log(file_path)  # Shared by the analyzer and the search postings
+    analyzer = PokerAnalyzer()
+    analyzer.parse_log(file_path, progress, read=read)
+    rollup = build_rollup(analyzer)
+    rollup['ledger'] = read_ledger(file_path)
+    rollup['search'] = posting_lists(read[0])
+    return rollup
+
+
+def split_context(context: str) -> tuple[str, str]:
+    """Split a combined context such as "NLHE_6h" into ("NLHE", "6")."""
+    game_type, table_info = context.rsplit('_', 1)
+    return game_type, table_info[:-1]
+
+
+def game_stats(rollup: Dict) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Compute the game type and table size mix of a session as percentages of hands."""
+    game_types: Dict[str, int] = {}
+    table_sizes: Dict[str, int] = {}
+    for context, hands in rollup.get('hands', {}).items():
+        game_type, table_size = split_context(context)
+        game_types[game_type] = game_types.get(game_type, 0) + hands
+        table_sizes[table_size] = table_sizes.get(table_size, 0) + hands
+
+    total = sum(game_types.values())
+    if total == 0:
+        return {'game_types': {}, 'table_sizes': {}}
+
+    return {
+        'game_types': {
+            game_type: {'percentage': round(hands / total * 100, 1)}
+            for game_type, hands in game_types.items()
+        },
+        'table_sizes': {
+            table_size: {'percentage': round(hands / total * 100, 1)}
+            for table_size, hands in table_sizes.items()
+        }
+    }
+
+
+def rollup_players(rollup: Dict) -> List[str]:
+    """Return the sorted player names of a session rollup."""
+    return sorted(rollup.get('players', {}))
+
+
+def merge_rollups(rollups: Iterable[Dict]) -> Dict:
+    """
+    Sum the stored counters of several session rollups into a single rollup.
+    Counter rows are stacked into one matrix and summed per (player, context) with numpy.
+    """
+    import numpy as np  # Deferred so listing sessions doesn't pay for numpy on cold start
+
+    index: Dict[tuple, int] = {}
+    positions: List[int] = []
+    rows: List[List[int]] = []
+    hands: Dict[str, int] = {}
+    profiles: List[tuple] = []
+    for rollup in rollups:
+        for player, contexts in rollup.get('players', {}).items():
+            for context, counters in contexts.items():
+                positions.append(index.setdefault((player, context), len(index)))
+                rows.append(counters)
+        for context, count in rollup.get('hands', {}).items():
+            hands[context] = hands.get(context, 0) + count
+        for player, contexts in rollup.get('profiles', {}).items():
+            profiles.extend(
+                (player, context, row[1:], row[0]) for context, context_rows in contexts.items() for row in context_rows
+            )
+
+    players: Dict[str, Dict[str, List[int]]] = {}
+    if rows:
+        totals = np.zeros((len(index), len(COUNTER_FIELDS)), dtype=np.int64)
+        np.add.at(totals, np.asarray(positions), np.asarray(rows, dtype=np.int64))
+        for (player, context), row in zip(index, totals.tolist()):
+            players.setdefault(player, {})[context] = row
+
+    return {
+        'version': ROLLUP_VERSION,
+        'counters': list(COUNTER_FIELDS),
+        'players': players,
+        'hands': hands,
+        'profiles': profile_rows(profiles)
+    }
+
+
+def rollup_to_analyzer(rollup: Dict) -> 'PokerAnalyzer':
+    """
+    Rebuild a PokerAnalyzer from stored counters so get_stats can be served
+    without re-parsing any logs.
+    """
+    from poker_analyzer import PokerAnalyzer, PlayerStats
+
+    analyzer = PokerAnalyzer()
+    fields = rollup.get('counters', COUNTER_FIELDS)
+    for player, contexts in rollup.get('players', {}).items():
+        data = analyzer.players.setdefault(player, PlayerStats())
+        for context, counters in contexts.items():
+            game_type, table_size = split_context(context)
+            data.add_context_counts(game_type, int(table_size), dict(zip(fields, counters)))
+    for player, contexts in rollup.get('profiles', {}).items():
+        data = analyzer.players.setdefault(player, PlayerStats())
+        for context, rows in contexts.items():
+            game_type, table_size = split_context(context)
+            data.add_hand_profiles(game_type, int(table_size), {tuple(row[1:]): row[0] for row in rows})
+    analyzer.context_hands = dict(rollup.get('hands', {}))
+    return analyzer
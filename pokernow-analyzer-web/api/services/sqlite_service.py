@@ -0,0 +1,267 @@
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from queue import Queue
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
+import orjson
+from services.session_rollup import LISTING_KEYS
+from services.storage import DuplicateSessionError, StorageService, select_rollup_keys
+
+T = TypeVar('T')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT NOT NULL,
+    content_hash TEXT,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    upload_time TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_file_name ON sessions (file_name);
+CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions (start_time);
+-- Unique so concurrent uploads of the same log can't both be stored (NULLs may repeat)
+DROP INDEX IF EXISTS idx_sessions_content_hash;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_content_hash_unique ON sessions (content_hash);
+
+CREATE TABLE IF NOT EXISTS session_tags (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (session_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_session_tags_tag ON session_tags (tag);
+
+CREATE TABLE IF NOT EXISTS session_rollups (
+    session_id INTEGER PRIMARY KEY REFERENCES sessions (id) ON DELETE CASCADE,
+    rollup BLOB NOT NULL
+);
+"""
+
+# Statements are kept as constants so sqlite3's per-connection statement cache reuses
+# the compiled (prepared) statement on every call.
+INSERT_SESSION = """
+INSERT INTO sessions (file_name, content_hash, start_time, end_time, upload_time) VALUES (?, ?, ?, ?, ?)
+"""
+INSERT_ROLLUP = """
+INSERT INTO session_rollups (session_id, rollup) VALUES (?, ?)
+ON CONFLICT (session_id) DO UPDATE SET rollup = excluded.rollup
+"""
+SELECT_FILE_EXISTS = "SELECT 1 FROM sessions WHERE file_name = ? OR content_hash = ? LIMIT 1"
+SELECT_SESSION_COLUMNS = """
+SELECT s.id, s.file_name, s.content_hash, s.start_time, s.end_time, s.upload_time, s.active,
+       (SELECT json_group_array(t.tag) FROM session_tags t WHERE t.session_id = s.id) AS tags
+"""
+# Only the rollup keys the listing shows, as a JSON array; SQLite extracts them, so the
+# profiles and search postings never reach Python
+SELECT_SESSIONS = SELECT_SESSION_COLUMNS + """, json_extract(CAST(r.rollup AS TEXT), {}) AS listing
+FROM sessions s LEFT JOIN session_rollups r ON r.session_id = s.id
+ORDER BY s.start_time DESC
+""".format(', '.join(f"'$.{key}'" for key in LISTING_KEYS))
+SELECT_SESSION = SELECT_SESSION_COLUMNS + "FROM sessions s WHERE s.id = ?"
+SELECT_SESSION_INDEX = SELECT_SESSION_COLUMNS + "FROM sessions s"
+SELECT_WITHOUT_ROLLUP = """
+SELECT s.id, s.file_name FROM sessions s
+WHERE NOT EXISTS (SELECT 1 FROM session_rollups r WHERE r.session_id = s.id)
+"""
+UPDATE_ACTIVE = "UPDATE sessions SET active = ? WHERE id = ?"
+INSERT_TAG = "INSERT OR IGNORE INTO session_tags (session_id, tag) VALUES (?, ?)"
+DELETE_TAG = "DELETE FROM session_tags WHERE session_id = ? AND tag = ?"
+
+
+class ConnectionPool:
+    """A fixed-size pool of SQLite connections shared across requests."""
+
+    def __init__(self, database: str, size: int = 4):
+        if database == ':memory:':
+            # Pooled connections must share one in-memory database
+            database, uri = f'file:pokernow-{id(self)}?mode=memory&cache=shared', True
+        else:
+            uri = False
+
+        self._connections: Queue = Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(database, uri=uri, check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._connections.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, committing on success and rolling back on error."""
+        conn = self._connections.get()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._connections.put(conn)
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get().close()
+
+
+class SqliteService(StorageService):
+    """Local SQLite (WAL) storage backend, a drop-in replacement for SupabaseService."""
+
+    def __init__(self, database: str = 'pokernow.db', pool_size: int = 4):
+        self.pool = ConnectionPool(database, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _row_to_session(self, row: sqlite3.Row) -> Dict:
+        session = dict(row)
+        session['active'] = bool(session['active'])
+        session['tags'] = orjson.loads(session['tags']) if session['tags'] else []
+        if 'listing' in session:
+            listing = session.pop('listing')
+            session['rollup'] = {
+                key: value for key, value in zip(LISTING_KEYS, orjson.loads(listing)) if value is not None
+            } if listing else None
+        return session
+
+    def _get_session(self, conn: sqlite3.Connection, session_id: int) -> Optional[Dict]:
+        row = conn.execute(SELECT_SESSION, (session_id,)).fetchone()
+        return self._row_to_session(row) if row else None
+
+    async def _run(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        """Run work on a pooled connection in a worker thread, off the event loop."""
+        def run() -> T:
+            with self.pool.connection() as conn:
+                return work(conn)
+        return await asyncio.to_thread(run)
+
+    async def create_session(self, file_data: Dict) -> Dict:
+        """Create a new session in SQLite."""
+        def create(conn: sqlite3.Connection) -> Dict:
+            cursor = conn.execute(INSERT_SESSION, (
+                file_data['file_id'],
+                file_data.get('content_hash'),
+                file_data['start_time'].isoformat(),
+                file_data['end_time'].isoformat(),
+                datetime.now(timezone.utc).isoformat()
+            ))
+            session_id = cursor.lastrowid
+            if file_data.get('rollup') is not None:
+                conn.execute(INSERT_ROLLUP, (session_id, orjson.dumps(file_data['rollup'])))
+            return self._get_session(conn, session_id)
+
+        try:
+            return await self._run(create)
+        except sqlite3.IntegrityError as e:
+            raise DuplicateSessionError(f"Error creating session: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error creating session: {str(e)}")
+
+    async def check_file_exists(self, file_name: str, content_hash: Optional[str] = None) -> bool:
+        """Check if a file has already been uploaded, by game id or by content hash."""
+        try:
+            return await self._run(
+                lambda conn: conn.execute(SELECT_FILE_EXISTS, (file_name, content_hash)).fetchone() is not None
+            )
+        except Exception as e:
+            raise Exception(f"Error checking file existence: {str(e)}")
+
+    async def get_sessions(self) -> List[Dict]:
+        """Get all sessions."""
+        try:
+            rows = await self._run(lambda conn: conn.execute(SELECT_SESSIONS).fetchall())
+            return self.format_sessions([self._row_to_session(row) for row in rows])
+        except Exception as e:
+            raise Exception(f"Error fetching sessions: {str(e)}")
+
+    async def get_session_index(self) -> List[Dict]:
+        try:
+            rows = await self._run(lambda conn: conn.execute(SELECT_SESSION_INDEX).fetchall())
+            return [
+                {'id': session['id'], 'tags': session['tags'], 'active': session['active']}
+                for session in map(self._row_to_session, rows)
+            ]
+        except Exception as e:
+            raise Exception(f"Error fetching session index: {str(e)}")
+
+    async def get_session_rollups(self, session_ids: List[int], keys: Optional[Sequence[str]] = None) -> List[Dict]:
+        try:
+            placeholders = ','.join('?' * len(session_ids))
+            rows = await self._run(lambda conn: conn.execute(
+                f"SELECT rollup FROM session_rollups WHERE session_id IN ({placeholders})",
+                list(session_ids)
+            ).fetchall())
+            return [select_rollup_keys(orjson.loads(row['rollup']), keys) for row in rows]
+        except Exception as e:
+            raise Exception(f"Error fetching session rollups: {str(e)}")
+
+    async def get_sessions_without_rollup(self) -> List[Dict]:
+        try:
+            return await self._run(
+                lambda conn: [dict(row) for row in conn.execute(SELECT_WITHOUT_ROLLUP).fetchall()]
+            )
+        except Exception as e:
+            raise Exception(f"Error fetching sessions without rollup: {str(e)}")
+
+    async def update_session_rollup(self, session_id: int, rollup: Dict) -> Dict:
+        def update(conn: sqlite3.Connection) -> Dict:
+            session = self._get_session(conn, session_id)
+            if not session:
+                raise Exception("No session found with that ID")
+            conn.execute(INSERT_ROLLUP, (session_id, orjson.dumps(rollup)))
+            return session
+
+        try:
+            return await self._run(update)
+        except Exception as e:
+            raise Exception(f"Error updating session rollup: {str(e)}")
+
+    async def toggle_session_active(self, session_id: int, active: bool) -> Dict:
+        def toggle(conn: sqlite3.Connection) -> Dict:
+            conn.execute(UPDATE_ACTIVE, (int(active), session_id))
+            session = self._get_session(conn, session_id)
+            if not session:
+                raise Exception("No session found with that ID")
+            return session
+
+        try:
+            return await self._run(toggle)
+        except Exception as e:
+            raise Exception(f"Error toggling session active status: {str(e)}")
+
+    async def add_tag(self, session_id: int, tag: str) -> Dict:
+        def add(conn: sqlite3.Connection) -> Dict:
+            if not self._get_session(conn, session_id):
+                raise Exception("Session not found")
+            conn.execute(INSERT_TAG, (session_id, tag))
+            return self._get_session(conn, session_id)
+
+        try:
+            return await self._run(add)
+        except Exception as e:
+            raise Exception(f"Error adding tag: {str(e)}")
+
+    async def remove_tag(self, session_id: int, tag: str) -> Dict:
+        def remove(conn: sqlite3.Connection) -> Dict:
+            if not self._get_session(conn, session_id):
+                raise Exception("Session not found")
+            conn.execute(DELETE_TAG, (session_id, tag))
+            return self._get_session(conn, session_id)
+
+        try:
+            return await self._run(remove)
+        except Exception as e:
+            raise Exception(f"Error removing tag: {str(e)}")
+
+    async def bulk_add_tag(self, session_ids: List[int], tag: str) -> List[Dict]:
+        """Add a tag to multiple sessions in a single transaction."""
+        def add(conn: sqlite3.Connection) -> List[Dict]:
+            conn.executemany(INSERT_TAG, [(session_id, tag) for session_id in session_ids])
+            return [self._get_session(conn, session_id) for session_id in session_ids]
+
+        try:
+            return await self._run(add)
+        except Exception as e:
+            raise Exception(f"Error in bulk tag operation: {str(e)}")
@@ -0,0 +1,98 @@
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from services.session_rollup import SEARCH_KEYS, STATS_KEYS, merge_rollups, rollup_to_analyzer
+
+# Loads the rollups of session ids with only the given top-level keys, like
+# StorageService.get_session_rollups
+RollupLoader = Callable[[List[int], Sequence[str]], Awaitable[List[Dict]]]
+
+class StatsCache:
+    """
+    In-process cache of merged multi-session stats.
+
+    Entries are keyed by (session-id set, version). The version is bumped
+    whenever a session's tags or active flag change, which drops every entry.
+    Population tables (see stat_percentiles) built from the merged stats are
+    cached the same way, per minimum hand count, and so are hand search indexes
+    (see hand_search) merged from the sessions' stored postings.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries: Dict[Tuple[FrozenSet[int], int], Dict] = {}
+        self._populations: Dict[Tuple[FrozenSet[int], int, int], Dict] = {}
+        self._hand_indexes: Dict[Tuple[FrozenSet[int], int], Tuple] = {}
+
+    def invalidate(self) -> None:
+        """Drop all cached results after a tag or active change."""
+        self.version += 1
+        self._entries.clear()
+        self._populations.clear()
+        self._hand_indexes.clear()
+
+    def _store(self, entries: Dict, key: tuple, value) -> None:
+        if len(entries) >= self.max_entries:
+            # Evict the oldest entry
+            entries.pop(next(iter(entries)))
+        entries[key] = value
+
+    async def get_stats(self, session_ids: Iterable[int], load_rollups: RollupLoader) -> Dict:
+        """
+        Return merged get_stats output for the given sessions. On a miss the
+        stored rollups are loaded and summed, logs are never re-parsed.
+        """
+        ids = frozenset(session_ids)
+        key = (ids, self.version)
+        stats = self._entries.get(key)
+        if stats is None:
+            rollups = await load_rollups(sorted(ids), STATS_KEYS) if ids else []
+            stats = rollup_to_analyzer(merge_rollups(rollup for rollup in rollups if rollup)).get_stats()
+            self._store(self._entries, key, stats)
+        return stats
+
+    async def get_population(self, session_ids: Iterable[int], load_rollups: RollupLoader,
+                             min_hands: int) -> Tuple[Dict, Dict]:
+        """
+        Return the merged stats of the given sessions and their population tables per
+        combined context, building the tables once per session set and min_hands.
+        """
+        from stat_percentiles import population_tables  # numpy, deferred like the stats themselves
+
+        ids = frozenset(session_ids)
+        stats = await self.get_stats(ids, load_rollups)
+        key = (ids, self.version, min_hands)
+        tables = self._populations.get(key)
+        if tables is None:
+            tables = population_tables(stats, min_hands)
+            self._store(self._populations, key, tables)
+        return stats, tables
+
+    async def get_hand_index(self, session_ids: Iterable[int], load_rollups: RollupLoader) -> Tuple:
+        """
+        Return the hand search index of the given sessions and the number of them
+        uploaded before search postings were stored, which the index leaves out.
+        """
+        from hand_search import HandIndex  # numpy, deferred like the stats themselves
+
+        ids = frozenset(session_ids)
+        key = (ids, self.version)
+        entry = self._hand_indexes.get(key)
+        if entry is None:
+            rollups = await load_rollups(sorted(ids), SEARCH_KEYS) if ids else []
+            postings = [rollup['search'] for rollup in rollups if rollup and 'search' in rollup]
+            entry = (HandIndex.from_posting_lists(postings), len(ids) - len(postings))
+            self._store(self._hand_indexes, key, entry)
+        return entry
+
+
+def select_sessions(sessions: Iterable[Dict], tags: Optional[List[str]] = None,
+                    active: Optional[bool] = None) -> List[Dict]:
+    """Filter sessions by tags (any of) and active flag."""
+    selected = []
+    for session in sessions:
+        if active is not None and bool(session.get('active')) != active:
+            continue
+        if tags and not set(tags) & set(session.get('tags') or []):
+            continue
+        selected.append(session)
+    return selected
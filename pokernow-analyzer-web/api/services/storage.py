@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+import asyncio
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from services.session_rollup import game_stats, rollup_players
+
+class DuplicateSessionError(Exception):
+    """A session with the same content hash was stored meanwhile, by a concurrent upload."""
+
+
+class StorageService(ABC):
+    """
+    Persistence interface for uploaded sessions, their tags and rollups.
+
+    Rows returned by implementations use the Supabase `sessions` column names:
+    id, file_name, content_hash, start_time, end_time, upload_time, active, tags, rollup.
+    """
+
+    display_timezone: Optional[str] = None  # timestamps.DISPLAY_TIMEZONE when unset
+
+    @abstractmethod
+    async def create_session(self, file_data: Dict) -> Dict:
+        """Create a new session. Raises DuplicateSessionError if its content hash is stored."""
+
+    @abstractmethod
+    async def check_file_exists(self, file_name: str, content_hash: Optional[str] = None) -> bool:
+        """Check if a file has already been uploaded, by game id or by content hash."""
+
+    @abstractmethod
+    async def get_sessions(self) -> List[Dict]:
+        """Get all sessions formatted for the frontend, newest first."""
+
+    @abstractmethod
+    async def get_session_index(self) -> List[Dict]:
+        """Get id, tags and active flag of all sessions, without the rollup payload."""
+
+    @abstractmethod
+    async def get_session_rollups(self, session_ids: List[int], keys: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Get the stored rollups of the given sessions. With keys, rollups only hold those
+        of their top-level keys that they have (see session_rollup.STATS_KEYS and co).
+        """
+
+    @abstractmethod
+    async def get_sessions_without_rollup(self) -> List[Dict]:
+        """Get id and file name of sessions uploaded before rollups were stored."""
+
+    @abstractmethod
+    async def update_session_rollup(self, session_id: int, rollup: Dict) -> Dict:
+        """Store the precomputed rollup of a session."""
+
+    @abstractmethod
+    async def toggle_session_active(self, session_id: int, active: bool) -> Dict:
+        """Toggle a session's active status."""
+
+    @abstractmethod
+    async def add_tag(self, session_id: int, tag: str) -> Dict:
+        """Add a tag to a session."""
+
+    @abstractmethod
+    async def remove_tag(self, session_id: int, tag: str) -> Dict:
+        """Remove a tag from a session."""
+
+    async def create_session_once(self, file_data: Dict) -> Optional[Dict]:
+        """
+        Create a session unless the log is already stored (same game id or content hash),
+        checking again under a lock shared by direct uploads and background jobs, as an
+        upload of the same log may have been stored since they checked. None if it was.
+        """
+        if getattr(self, '_create_lock', None) is None:
+            self._create_lock = asyncio.Lock()
+        async with self._create_lock:
+            if await self.check_file_exists(file_data['file_id'], file_data.get('content_hash')):
+                return None
+            try:
+                return await self.create_session(file_data)
+            except DuplicateSessionError:
+                return None  # Stored by another server process meanwhile
+
+    async def bulk_add_tag(self, session_ids: List[int], tag: str) -> List[Dict]:
+        """Add a tag to multiple sessions."""
+        try:
+            results = []
+            for session_id in session_ids:
+                result = await self.add_tag(session_id, tag)
+                results.append(result)
+            return results
+        except Exception as e:
+            raise Exception(f"Error in bulk tag operation: {str(e)}")
+
+    def format_date(self, date_str):
+        from timestamps import parse_iso
+        try:
+            # Parse the date string and format it consistently
+            return parse_iso(date_str).isoformat()
+        except Exception as e:
+            print(f"Error formatting date {date_str}: {e}")
+            return date_str
+
+    def format_sessions(self, sessions: List[Dict]) -> List[Dict]:
+        """
+        Format stored session rows for the frontend. Each timestamp is parsed once
+        and display names are formatted in bulk in the display timezone (PST).
+        """
+        from timestamps import DISPLAY_TIMEZONE, format_display_bulk, parse_iso
+
+        display_timezone = self.display_timezone or DISPLAY_TIMEZONE
+        parsed = []
+        for session in sessions:
+            try:
+                parsed.append((
+                    session,
+                    parse_iso(session['start_time']),
+                    parse_iso(session['end_time']),
+                    parse_iso(session['upload_time'])
+                ))
+            except Exception as e:
+                print(f"Error formatting session {session.get('id')}: {str(e)}")
+                continue
+
+        start_names = format_display_bulk((row[1] for row in parsed), display_timezone)
+        upload_names = format_display_bulk((row[3] for row in parsed), display_timezone)
+
+        formatted_sessions = []
+        for (session, start_time, end_time, _), start_name, upload_name in zip(parsed, start_names, upload_names):
+            rollup = session.get('rollup') or {}
+            formatted_sessions.append({
+                'id': session['id'],
+                'display_name': start_name,
+                'file_id': session['file_name'],
+                'upload_date': upload_name,
+                'start_time': start_time.isoformat(),
+                'end_time': end_time.isoformat(),
+                'is_active': session['active'],
+                'tags': session['tags'] or [],
+                'players': rollup_players(rollup),
+                'game_stats': game_stats(rollup)
+            })
+        return formatted_sessions
+
+def select_rollup_keys(rollup: Optional[Dict], keys: Optional[Sequence[str]]) -> Optional[Dict]:
+    """The given top-level keys of a rollup, or all of it without keys."""
+    if rollup is None or keys is None:
+        return rollup
+    return {key: rollup[key] for key in keys if key in rollup}
+
+@lru_cache(maxsize=None)
+def get_storage_service() -> StorageService:
+    """
+    Create the storage backend selected by the STORAGE_BACKEND env var:
+    "supabase" (default), "sqlite" (database file from SQLITE_PATH) or "memory"
+    (an in-memory stand-in for load tests, with MEMORY_LATENCY_MS per call and
+    MEMORY_BLOCKING=1 to hold the event loop like the Supabase client does).
+    The client is created on first use and cached for the life of the process.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    backend = os.getenv('STORAGE_BACKEND', 'supabase').lower()
+
+    if backend == 'sqlite':
+        from services.sqlite_service import SqliteService
+        return SqliteService(os.getenv('SQLITE_PATH', 'pokernow.db'))
+    if backend == 'supabase':
+        from services.supabase_service import SupabaseService
+        return SupabaseService()
+    if backend == 'memory':
+        from services.memory_service import MemoryService
+        return MemoryService(
+            latency=float(os.getenv('MEMORY_LATENCY_MS', '0')) / 1000,
+            blocking=os.getenv('MEMORY_BLOCKING', '0') == '1'
+        )
+    raise Exception(f"Unknown storage backend: {backend}")
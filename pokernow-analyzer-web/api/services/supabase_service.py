@@ -1,11 +1,14 @@
 from supabase import create_client
 import os
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 from dotenv import load_dotenv
-import pytz
+from services.session_rollup import LISTING_KEYS
+from services.storage import DuplicateSessionError, StorageService
 
-class SupabaseService:
+UNIQUE_VIOLATION = '23505'  # Postgres error code, see migrations/003_unique_session_content_hash.sql
+
+class SupabaseService(StorageService):
     def __init__(self):
         load_dotenv()
         
@@ -19,79 +22,57 @@ class SupabaseService:
             supabase_url,
             supabase_key
         )
-        self.pst_timezone = pytz.timezone('America/Los_Angeles')
 
     async def create_session(self, file_data: Dict) -> Dict:
         """Create a new session in Supabase."""
         try:
             data = {
                 'file_name': file_data['file_id'],
+                'content_hash': file_data.get('content_hash'),
                 'start_time': file_data['start_time'].isoformat(),
                 'end_time': file_data['end_time'].isoformat(),
-                'upload_time': datetime.utcnow().isoformat()
+                'upload_time': datetime.utcnow().isoformat(),
+                'rollup': file_data.get('rollup')
             }
             
             response = self.supabase.table('sessions').insert(data).execute()
             return response.data[0]
         except Exception as e:
+            if getattr(e, 'code', None) == UNIQUE_VIOLATION:
+                raise DuplicateSessionError(f"Error creating session: {str(e)}")
             raise Exception(f"Error creating session: {str(e)}")
 
-    async def check_file_exists(self, file_name: str) -> bool:
-        """Check if a file has already been uploaded."""
+    async def check_file_exists(self, file_name: str, content_hash: Optional[str] = None) -> bool:
+        """Check if a file has already been uploaded, by game id or by content hash."""
         try:
-            response = self.supabase.table('sessions').select('id').eq('file_name', file_name).execute()
-            return len(response.data) > 0
+            # Separate .eq() filters, as values inside an or_() filter string would need
+            # quoting: file names may contain commas and parentheses
+            for column, value in (('content_hash', content_hash), ('file_name', file_name)):
+                if not value:
+                    continue
+                response = self.supabase.table('sessions').select('id').eq(column, value).limit(1).execute()
+                if response.data:
+                    return True
+            return False
         except Exception as e:
             raise Exception(f"Error checking file existence: {str(e)}")
 
-    def format_date(self, date_str):
-        try:
-            # Parse the date string and format it consistently
-            date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            return date_obj.isoformat()
-        except Exception as e:
-            print(f"Error formatting date {date_str}: {e}")
-            return date_str
-
     async def get_sessions(self):
         """Get all sessions."""
         try:
             print("Fetching sessions from Supabase...")
-            response = self.supabase.table('sessions').select('*').order('start_time.desc').execute()
+            # Only the parts of the rollups that the listing shows
+            columns = ', '.join(
+                ['id', 'file_name', 'start_time', 'end_time', 'upload_time', 'active', 'tags'] +
+                [f"{key}:rollup->{key}" for key in LISTING_KEYS]
+            )
+            response = self.supabase.table('sessions').select(columns).order('start_time.desc').execute()
             print(f"Got {len(response.data)} sessions")
+            for session in response.data:
+                session['rollup'] = {key: session.pop(key) or {} for key in LISTING_KEYS}
             
             # Format the data for frontend
-            formatted_sessions = []
-            for session in response.data:
-                try:
-                    # Convert timestamps to PST
-                    start_time = datetime.fromisoformat(session['start_time'].replace('Z', '+00:00'))
-                    start_time_pst = start_time.astimezone(self.pst_timezone)
-                    
-                    # Use the stored upload_time from database
-                    upload_time = datetime.fromisoformat(session['upload_time'].replace('Z', '+00:00'))
-                    upload_time_pst = upload_time.astimezone(self.pst_timezone)
-                    
-                    formatted_session = {
-                        'id': session['id'],
-                        'display_name': f"{start_time_pst.strftime('%B %-d, %Y %-I:%M%p')}",
-                        'file_id': session['file_name'],
-                        'upload_date': upload_time_pst.strftime('%B %-d, %Y %-I:%M%p'),
-                        'start_time': self.format_date(session['start_time']),
-                        'end_time': self.format_date(session['end_time']),
-                        'is_active': session['active'],
-                        'tags': session['tags'] or [],
-                        'players': [],
-                        'game_stats': {
-                            'game_types': {},
-                            'table_sizes': {}
-                        }
-                    }
-                    formatted_sessions.append(formatted_session)
-                except Exception as e:
-                    print(f"Error formatting session {session['id']}: {str(e)}")
-                    print(f"Session data: {session}")
-                    continue
+            formatted_sessions = self.format_sessions(response.data)
             
             print(f"Returning {len(formatted_sessions)} formatted sessions")
             return formatted_sessions
@@ -99,6 +80,47 @@ class SupabaseService:
             print(f"Error in get_sessions: {str(e)}")
             raise Exception(f"Error fetching sessions: {str(e)}") 
 
+    async def get_session_index(self) -> List[Dict]:
+        """Get id, tags and active flag of all sessions, without the rollup payload."""
+        try:
+            response = self.supabase.table('sessions').select('id, tags, active').execute()
+            return response.data
+        except Exception as e:
+            raise Exception(f"Error fetching session index: {str(e)}")
+
+    async def get_session_rollups(self, session_ids: List[int], keys: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Get the stored rollups of the given sessions, only downloading the given keys if any."""
+        try:
+            if keys is None:
+                response = self.supabase.table('sessions').select('rollup').in_('id', session_ids).execute()
+                return [session['rollup'] for session in response.data]
+            # JSON path columns, e.g. "players:rollup->players", are null where the key is missing
+            columns = ', '.join(f"{key}:rollup->{key}" for key in keys)
+            response = self.supabase.table('sessions').select(columns).in_('id', session_ids).execute()
+            return [{key: value for key, value in row.items() if value is not None} for row in response.data]
+        except Exception as e:
+            raise Exception(f"Error fetching session rollups: {str(e)}")
+
+    async def get_sessions_without_rollup(self) -> List[Dict]:
+        """Get id and file name of sessions uploaded before rollups were stored."""
+        try:
+            response = self.supabase.table('sessions').select('id, file_name').is_('rollup', 'null').execute()
+            return response.data
+        except Exception as e:
+            raise Exception(f"Error fetching sessions without rollup: {str(e)}")
+
+    async def update_session_rollup(self, session_id: int, rollup: Dict) -> Dict:
+        """Store the precomputed rollup of a session."""
+        try:
+            response = self.supabase.table('sessions').update({
+                'rollup': rollup
+            }).eq('id', session_id).execute()
+            if not response.data:
+                raise Exception("No session found with that ID")
+            return response.data[0]
+        except Exception as e:
+            raise Exception(f"Error updating session rollup: {str(e)}")
+
     async def toggle_session_active(self, session_id: int, active: bool) -> Dict:
         """Toggle a session's active status."""
         try:
@@ -159,14 +181,3 @@ class SupabaseService:
             return response.data[0]
         except Exception as e:
             raise Exception(f"Error removing tag: {str(e)}")
-
-    async def bulk_add_tag(self, session_ids: List[int], tag: str) -> List[Dict]:
-        """Add a tag to multiple sessions."""
-        try:
-            results = []
-            for session_id in session_ids:
-                result = await self.add_tag(session_id, tag)
-                results.append(result)
-            return results
-        except Exception as e:
-            raise Exception(f"Error in bulk tag operation: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,40 @@
+import csv
+import os
+import pytest
+from fastapi.testclient import TestClient
+from services import repo_root
+from services.sqlite_service import SqliteService
+import app as app_module
+
+LOG_DIR = os.path.join(repo_root, 'logs')
+HEADER = ['entry', 'at', 'order']
+
+def _hand(number, actions, stacks=True):
+    """Rows of one hand in play order."""
+    rows = [[f'-- starting hand #{number} (id: h{number})  (No Limit Texas Hold\'em) (dealer: "A, Jr @ a1") --']]
+    if stacks:
+        rows.append(['Player stacks: #1 "A, Jr @ a1" (100) | #2 "B "the rock" @ b2" (100)'])
+    rows += [[action] for action in actions]
+    rows.append([f'-- ending hand #{number} --'])
+    return rows
+
+def _write_log(path, hands):
+    rows = [row for hand in hands for row in hand]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        # Logs are newest first
+        for i, row in reversed(list(enumerate(rows))):
+            writer.writerow(row + ['2024-01-01T00:00:00.000Z', str(170406720000000 + i)][:3 - len(row)])
+
+@pytest.fixture
+def client(monkeypatch):
+    """The app on an in-memory SQLite database."""
+    storage = SqliteService(':memory:')
+    monkeypatch.setattr(app_module, 'get_storage_service', lambda: storage)
+    return TestClient(app_module.app)
+
+def upload(client, path):
+    """Upload one log file and return the response body."""
+    with open(path, 'rb') as f:
+        return client.post('/upload', files=[('files', (os.path.basename(path), f, 'text/csv'))]).json()
@@ -0,0 +1,65 @@
+import io
+import os
+import tarfile
+import zipfile
+import pytest
+import zstandard
+from services.archives import iter_archive
+import app as app_module
+from conftest import LOG_DIR
+
+LOG_NAMES = ['poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv', 'poker_now_log_PEEN_BOZO.csv']
+
+def _read(name):
+    with open(os.path.join(LOG_DIR, name), 'rb') as f:
+        return f.read()
+
+def _zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name in LOG_NAMES:
+            archive.writestr(f'logs/{name}', _read(name))
+        archive.writestr('README.txt', b'not a log')
+    return buffer.getvalue()
+
+def _tar_zst():
+    tar_buffer = io.BytesIO()
+    with tarfile.open(fileobj=tar_buffer, mode='w') as archive:
+        for name in LOG_NAMES:
+            content = _read(name)
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return zstandard.ZstdCompressor().compress(tar_buffer.getvalue())
+
+@pytest.mark.parametrize('filename, build', [('logs.zip', _zip), ('logs.tar.zst', _tar_zst)])
+def test_iter_archive_yields_csv_members(filename, build):
+    members = dict(iter_archive(io.BytesIO(build()), filename))
+    assert sorted(os.path.basename(name) for name in members) == sorted(LOG_NAMES)
+    assert members[next(name for name in members if name.endswith(LOG_NAMES[0]))] == _read(LOG_NAMES[0])
+
+def test_upload_archive_reports_each_member(client):
+    response = client.post('/upload', files=[('files', ('logs.tar.zst', _tar_zst(), 'application/zstd'))])
+    body = response.json()
+    assert sorted(body['processed']) == sorted(f'logs.tar.zst/{name}' for name in LOG_NAMES)
+    assert body['failed'] == []
+
+    # The same logs inside a zip are recognised by content hash
+    body = client.post('/upload', files=[('files', ('logs.zip', _zip(), 'application/zip'))]).json()
+    assert sorted(body['skipped']) == sorted(f'logs.zip/logs/{name}' for name in LOG_NAMES)
+    assert body['processed'] == []
+
+    sessions = client.get('/sessions').json()
+    assert sorted(session['file_id'] for session in sessions) == ['PEEN_BOZO', 'pgl0q7wsvjue87_9yO_hL32rf']
+    assert all(session['players'] for session in sessions)
+
+def test_concurrent_duplicate_upload_is_skipped(client, monkeypatch):
+    # Both uploads pass the duplicate check, as when they run at the same time
+    async def not_found(file_name, content_hash=None):
+        return False
+    monkeypatch.setattr(app_module.get_storage_service(), 'check_file_exists', not_found)
+
+    files = [('files', (name, _read(LOG_NAMES[0]), 'text/csv')) for name in ('first.csv', 'second.csv')]
+    body = client.post('/upload', files=files).json()
+    assert body['processed'] == ['first.csv'] and body['skipped'] == ['second.csv']
+    assert len(client.get('/sessions').json()) == 1
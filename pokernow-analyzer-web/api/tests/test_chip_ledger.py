@@ -0,0 +1,134 @@
+import csv
+import glob
+import os
+import pytest
+from chip_ledger import (
+    ACTION_PATTERN, load_store, ledger_summary, merge_ledgers, net, read_ledger, save_store, season_ledger, settle,
+    to_cents, update_store
+)
+from conftest import LOG_DIR, _write_log, upload
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+A = '"A, Jr @ a1"'
+B = '"B "the rock" @ b2"'
+
+def _session(quit_b=True):
+    """A buys in for 100 and tops up 50, B buys in for 100 and leaves with 140."""
+    rows = [
+        [f'The admin approved the player {A} participation with a stack of 100.00.'],
+        [f'The admin approved the player {B} participation with a stack of 100.'],
+        [f'The player {A} joined the game with a stack of 100.'],
+        [f'The player {B} joined the game with a stack of 100.'],
+        ['-- starting hand #1 (id: h1)  (No Limit Texas Hold\'em) --'],
+        [f'Player stacks: #1 {A} (100) | #2 {B} (100)'],
+        [f'{A} bets 10'],
+        [f'{B} calls 10'],
+        [f'{B} collected 20 from pot'],
+        ['-- ending hand #1 --'],
+        [f'The admin updated the player {A} stack from 90 to 140.'],
+        ['-- starting hand #2 (id: h2)  (No Limit Texas Hold\'em) --'],
+        [f'Player stacks: #1 {A} (140) | #2 {B} (110)'],
+        [f'{B} bets 30'],
+        [f'{A} raises to 90'],
+        [f'{B} calls 90'],
+        ['Flop:  [Ah, Kd, 2c]'],
+        [f'{B} bets 20'],
+        [f'{A} calls 20'],
+        [f'{B} collected 220 from pot'],
+        ['-- ending hand #2 --']
+    ]
+    if quit_b:
+        rows.append([f'The player {B} quits the game with a stack of 220.'])
+    return [rows]
+
+def test_session_ledger(tmp_path):
+    log = tmp_path / 'poker_now_log_game1.csv'
+    _write_log(log, _session())
+
+    ledger = read_ledger(str(log))
+    # A is still seated: the last hand is replayed from its stacks line
+    assert ledger == {'a, jr': [15000, 0, 3000], 'b "the rock"': [10000, 22000, 0]}
+    assert settle(ledger) == [('a, jr', 'b "the rock"', 12000)]
+    assert ledger_summary(ledger)['players']['a, jr']['net'] == -120.0
+
+def test_log_starting_mid_game(tmp_path):
+    log = tmp_path / 'poker_now_log_game1.csv'
+    _write_log(log, [_session(quit_b=False)[0][11:]])
+
+    # Stacks at the first hand in the log count as buy-ins
+    assert read_ledger(str(log)) == {'a, jr': [14000, 0, 3000], 'b "the rock"': [11000, 0, 22000]}
+
+def test_update_after_approval(tmp_path):
+    log = tmp_path / 'poker_now_log_game1.csv'
+    rows = _session()[0]
+    # The update right after approving 100 goes "from 1", but only 100 reaches the table
+    rows.insert(1, [f'The admin updated the player {A} stack from 1.00 to 100.00.'])
+    # A new id after logging in keeps the account
+    rows.insert(11, [f'The player "A, Jr @ a3" changed the ID from a1 to a3 because authenticated login.'])
+    rows = [[text.replace('@ a1"', '@ a3"') if i > 11 else text] for i, (text,) in enumerate(rows)]
+    _write_log(log, [rows])
+
+    assert read_ledger(str(log)) == {'a, jr': [15000, 0, 3000], 'b "the rock"': [10000, 22000, 0]}
+
+def test_merge_and_store(tmp_path):
+    first = tmp_path / 'poker_now_log_game1.csv'
+    _write_log(first, [_session(quit_b=False)[0]])
+    store_path = str(tmp_path / 'ledger.json')
+
+    store = load_store(store_path)
+    assert update_store(store, [str(first)]) == ['game1']
+    save_store(store, store_path)
+
+    # Re-reading the same export is skipped, a later export of the game replaces it
+    store = load_store(store_path)
+    assert update_store(store, [str(first)]) == []
+    later = tmp_path / 'poker_now_log_game1 (Alwin).csv'
+    _write_log(later, _session())
+    assert update_store(store, [str(later)]) == ['game1']
+    assert season_ledger(store) == read_ledger(str(later))
+
+    doubled = merge_ledgers([read_ledger(str(later))] * 2)
+    assert doubled['a, jr'] == [30000, 0, 6000]
+
+def test_corpus_log_balances():
+    # Three players are still seated after the last hand, which moved 440 chips
+    ledger = read_ledger(os.path.join(LOG_DIR, 'poker_now_log_pgl2q1GiOWedxAsSfnQwezi2q (AHH).csv'))
+    assert len(ledger) == 9
+    assert sum(cash_out + stack - buy_in for buy_in, cash_out, stack in ledger.values()) == 0
+
+def _unfinished_pot(log_file):
+    """Chips in the pot of the log's last hand if it never ended, else 0."""
+    with open(log_file, encoding='utf-8') as f:
+        rows = []
+        for row in csv.reader(f):
+            rows.append(row[0])
+            if row[0].startswith('Player stacks:'):
+                break
+    if any(text.startswith('-- ending hand') for text in rows):
+        return 0
+    pot, street = 0, {}
+    for text in reversed(rows):
+        if text.startswith(('Flop', 'Turn', 'River')):
+            pot += sum(street.values())
+            street = {}
+        action = ACTION_PATTERN.match(text)
+        if action:
+            name, player_id, verb, amount = action.groups()
+            key = (name, player_id)
+            street[key] = street.get(key, 0) + to_cents(amount) if verb.startswith('posts') else to_cents(amount)
+    return pot + sum(street.values())
+
+@pytest.mark.parametrize('log_file', sorted(glob.glob(os.path.join(LOG_DIR, '*.csv'))), ids=os.path.basename)
+def test_every_log_balances(log_file):
+    # Only chips still in the pot of an unfinished last hand are unaccounted for
+    ledger = read_ledger(log_file)
+    assert sum(net(amounts) for amounts in ledger.values()) == -_unfinished_pot(log_file)
+
+def test_ledger_endpoint(client):
+    body = upload(client, LOG_FILE)
+    assert len(body['processed']) == 1
+
+    ledger = client.get('/ledger').json()
+    assert ledger['sessions'] == 1 and ledger['missing'] == 0
+    assert ledger == {**ledger_summary(read_ledger(LOG_FILE)), 'sessions': 1, 'missing': 0}
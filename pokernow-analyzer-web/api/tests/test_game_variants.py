@@ -0,0 +1,29 @@
+import services  # noqa: F401  Puts the repository root on sys.path
+from poker_analyzer import PokerAnalyzer, detect_game_type
+
+def _starting_line(game):
+    return f'-- starting hand #1 (id: abc)  ({game}) (dealer: "A @ 1") --'
+
+def test_detect_game_type():
+    assert detect_game_type(_starting_line("No Limit Texas Hold'em")) == 'NLHE'
+    assert detect_game_type(_starting_line('Pot Limit Omaha Hi')) == 'PLO'
+    assert detect_game_type(_starting_line('Pot Limit Omaha Hi/Lo')) == 'PLO8'
+    assert detect_game_type(_starting_line('Pot Limit Omaha Hi 5 Cards')) == 'PLO5'
+
+def test_large_table_and_new_variant_allocate_on_demand():
+    players = [f'P{i} @ {i}' for i in range(12)]
+    stacks = ' | '.join(f'#{i + 1} "{name}" (100)' for i, name in enumerate(players))
+    hand = [
+        _starting_line('Pot Limit Omaha Hi/Lo'),
+        f'Player stacks: {stacks}',
+        '"P0 @ 0" raises to 10',
+        '-- ending hand #1 --'
+    ]
+
+    analyzer = PokerAnalyzer()
+    analyzer.process_hand(hand)
+
+    stats = analyzer.get_stats()['p0']
+    assert stats['by_combined']['PLO8_12h']['Raises'] == 1
+    assert list(stats['by_table_size']) == ['12-handed']
+    assert set(analyzer.players['p1'].combined_stats) == {'PLO8_12h'}
@@ -0,0 +1,87 @@
+import csv
+import glob
+import gzip
+import os
+import pytest
+import services  # noqa: F401
+from hand_sampling import index_hands, read_bytes, read_hand, sample_logs
+from poker_analyzer import ERROR_CSV_HEADERS, STATS_CSV_HEADERS, PokerAnalyzer, main, read_log
+from conftest import LOG_DIR
+
+LOG_FILES = sorted(glob.glob(os.path.join(LOG_DIR, '*.csv')))[:8]
+
+def _full(log_files):
+    analyzer = PokerAnalyzer()
+    for log_file in log_files:
+        analyzer.parse_log(log_file)
+    return analyzer
+
+def test_index_matches_read_log():
+    for log_file in LOG_FILES:
+        offsets = index_hands(log_file)
+        content = read_bytes(log_file)
+        hands = read_log(log_file)[0]
+        assert len(offsets) == len(hands)
+        for start, end, hand in zip(offsets.starts.tolist(), offsets.ends.tolist(), hands):
+            assert read_hand(content[start:end]) == hand
+
+def test_full_sample_matches_parse():
+    analyzer = PokerAnalyzer()
+    report = sample_logs(analyzer, LOG_FILES, fraction=1.0)
+    assert report.sampled == report.hands
+    full = _full(LOG_FILES)
+    assert analyzer.get_stats() == full.get_stats()
+    assert analyzer.context_hands == full.context_hands
+
+    # Every stratum fully drawn: no sampling error
+    for contexts in report.standard_errors.values():
+        assert all(error == 0 for error in contexts['overall'].values())
+
+def test_sample_estimates():
+    analyzer = PokerAnalyzer()
+    report = sample_logs(analyzer, LOG_FILES, fraction=0.2, seed=3)
+    assert report.sampled < report.hands
+    full = _full(LOG_FILES).get_stats()
+    estimated = analyzer.get_stats()
+
+    # Players with a lot of hands: estimates within a few standard errors of the real stats.
+    # A player dealt into every sampled hand of their strata has no spread in hand counts,
+    # so those get a small relative tolerance too.
+    regulars = [player for player, contexts in full.items() if contexts['overall']['Hands'] >= 300]
+    assert regulars
+    for player in regulars:
+        errors = report.standard_errors[player]['overall']
+        actual, estimate = full[player]['overall'], estimated[player]['overall']
+        for metric in ('VPIP', 'PFR'):
+            assert errors[metric] > 0
+            assert abs(estimate[metric] - actual[metric]) <= 5 * errors[metric]
+        assert abs(estimate['Hands'] - actual['Hands']) <= 5 * errors['Hands'] + 0.05 * actual['Hands']
+
+def test_same_seed_same_sample():
+    first, second, other = PokerAnalyzer(), PokerAnalyzer(), PokerAnalyzer()
+    assert sample_logs(first, LOG_FILES, 0.1, seed=1).standard_errors == \
+        sample_logs(second, LOG_FILES, 0.1, seed=1).standard_errors
+    sample_logs(other, LOG_FILES, 0.1, seed=2)
+    assert first.get_stats() == second.get_stats() != other.get_stats()
+
+def test_compressed_log(tmp_path):
+    compressed = tmp_path / (os.path.basename(LOG_FILES[0]) + '.gz')
+    compressed.write_bytes(gzip.compress(read_bytes(LOG_FILES[0])))
+    plain, packed = PokerAnalyzer(), PokerAnalyzer()
+    sample_logs(plain, LOG_FILES[:1], 0.5, seed=4)
+    sample_logs(packed, [str(compressed)], 0.5, seed=4)
+    assert packed.get_stats() == plain.get_stats()
+
+def test_bad_fraction():
+    for fraction in (0, -0.1, 1.5):
+        with pytest.raises(ValueError):
+            sample_logs(PokerAnalyzer(), LOG_FILES, fraction)
+
+def test_cli_sample(tmp_path, capsys):
+    output = tmp_path / 'stats.csv'
+    main(['sample', *LOG_FILES, '-o', str(output), '--fraction', '0.3'])
+    assert 'Sampled' in capsys.readouterr().err
+    with open(output) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == STATS_CSV_HEADERS + ERROR_CSV_HEADERS
+    assert len(rows) > 1 and all(float(value) >= 0 for row in rows[1:] for value in row[-len(ERROR_CSV_HEADERS):])
@@ -0,0 +1,89 @@
+import csv
+import io
+import os
+import numpy as np
+import pytest
+from hand_search import HandIndex, extract_facts, posting_lists
+from poker_analyzer import main, read_hands
+from conftest import LOG_DIR, upload
+
+LOG_FILES = [
+    os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+]
+
+@pytest.fixture(scope='module')
+def index():
+    return HandIndex.from_logs(LOG_FILES)
+
+@pytest.fixture(scope='module')
+def facts():
+    return [found for log_file in LOG_FILES for found in map(extract_facts, read_hands(log_file)) if found]
+
+def test_extract_facts():
+    hand = next(hand for hand in read_hands(LOG_FILES[0]) if extract_facts(hand).hand_id == 'hyen8tobbl5d')
+    found = extract_facts(hand)
+    assert found.hand_number == 8 and found.game_type == 'NLHE' and found.pot == 5080
+    assert {'player:bozo', 'player:peen', 'game:nlhe', 'street:flop', 'street:river'} <= found.terms
+
+@pytest.mark.parametrize('query, expected', [
+    ('player:bozo player:peen street:river pot>500',
+     lambda f: {'player:bozo', 'player:peen', 'street:river'} <= f.terms and f.pot > 500),
+    ('raise:bozo AND NOT street:flop', lambda f: 'raise:bozo' in f.terms and 'street:flop' not in f.terms),
+    ('(win:peen OR win:bozo) street:showdown',
+     lambda f: bool({'win:peen', 'win:bozo'} & f.terms) and 'street:showdown' in f.terms),
+    ('action:allin OR pot<=30', lambda f: 'action:allin' in f.terms or f.pot <= 30),
+    ('pot>=512 pot<1024', lambda f: 512 <= f.pot < 1024),
+    ('pot=480', lambda f: f.pot == 480),
+    ('NOT game:nlhe', lambda f: 'game:nlhe' not in f.terms),
+    ('player:nobody', lambda f: False),
+])
+def test_matches_brute_force(index, facts, query, expected):
+    assert index.search(query).tolist() == [i for i, found in enumerate(facts) if expected(found)]
+
+def test_session_postings(index):
+    sessions = []
+    for log_file in LOG_FILES:
+        postings = posting_lists(read_hands(log_file))
+        assert any(isinstance(posting, str) for posting in postings['postings'].values())  # Dense, as bitsets
+        assert any(isinstance(posting, list) for posting in postings['postings'].values())  # Sparse, as positions
+        sessions.append({**postings, 'log': os.path.basename(log_file)})
+
+    merged = HandIndex.from_posting_lists(sessions)
+    for name, array in index.arrays.items():
+        assert np.array_equal(merged.arrays[name], array)
+
+def test_save_and_load(index, tmp_path):
+    path = str(tmp_path / 'hands.npz')
+    index.save(path)
+    loaded = HandIndex.load(path)
+    assert np.array_equal(loaded.search('fold:peen pot>100'), index.search('fold:peen pot>100'))
+    assert loaded.row(0) == index.row(0)
+
+@pytest.mark.parametrize('query', ['', 'player:bozo AND (', 'player:bozo )', 'bozo', 'seat:1'])
+def test_invalid_queries(index, query):
+    with pytest.raises(ValueError):
+        index.search(query)
+
+def test_cli_search(tmp_path, capsys):
+    path = str(tmp_path / 'hands.npz')
+    main(['search-index', path, *LOG_FILES])
+    capsys.readouterr()
+    main(['search', path, 'player:bozo street:river', '-n', '5'])
+    out = capsys.readouterr()
+    rows = list(csv.reader(io.StringIO(out.out)))
+    assert rows[0] == ['Log', 'Hand', 'Game Type', 'Pot'] and len(rows) == 6
+    assert out.err.startswith(f"{len(HandIndex.load(path).search('player:bozo street:river'))} of ")
+
+def test_search_endpoint(client):
+    for log_file in LOG_FILES:
+        upload(client, log_file)
+
+    expected = HandIndex.from_logs(LOG_FILES)
+    response = client.get('/hands/search', params={'q': 'player:bozo pot>1000', 'limit': 3}).json()
+    assert response['sessions'] == 2 and response['missing'] == 0
+    assert response['matches'] == len(expected.search('player:bozo pot>1000'))
+    assert len(response['hands']) == 3 and set(response['hands'][0]) == {'hand_number', 'hand_id', 'game_type', 'pot'}
+    assert response['searched'] == len(expected)
+
+    assert client.get('/hands/search', params={'q': 'player:bozo ('}).json()['status'] == 'error'
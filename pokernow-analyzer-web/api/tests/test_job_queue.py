@@ -0,0 +1,105 @@
+import asyncio
+import os
+import shutil
+import pytest
+from services.job_queue import JobQueue, JobStore, parse_upload
+from services.sqlite_service import SqliteService
+from conftest import LOG_DIR
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+def test_job_store_updates(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_id = store.create('upload.csv')
+    assert store.get(job_id)['status'] == 'queued'
+
+    store.update(job_id, status='running', hands_processed=10, hands_total=20)
+    job = store.get(job_id)
+    assert (job['status'], job['hands_processed'], job['hands_total']) == ('running', 10, 20)
+
+    with pytest.raises(ValueError):
+        store.update(job_id, filename='other.csv')
+
+def test_parse_upload_reports_progress(tmp_path):
+    database = str(tmp_path / 'jobs.db')
+    job_id = JobStore(database).create('upload.csv')
+
+    file_data = parse_upload(job_id, database, LOG_FILE)
+    job = JobStore(database).get(job_id)
+    assert job['status'] == 'running'
+    assert job['hands_processed'] == job['hands_total'] > 0
+    assert file_data['rollup']['players']
+
+def test_parse_upload_from_content(tmp_path):
+    database = str(tmp_path / 'jobs.db')
+    job_id = JobStore(database).create('logs.zip/upload.csv')
+    with open(LOG_FILE, 'rb') as f:
+        content = f.read()
+
+    assert parse_upload(job_id, database, None, content) == parse_upload(job_id, database, LOG_FILE)
+
+def test_job_queue_stores_session(tmp_path):
+    upload = tmp_path / 'upload.csv'
+    shutil.copy(LOG_FILE, upload)
+    storage = SqliteService(':memory:')
+
+    async def run():
+        queue = JobQueue(storage, str(tmp_path / 'jobs.db'), workers=1)
+        job_id = await queue.submit('upload.csv', str(upload), {'file_id': 'game', 'content_hash': 'abc'})
+        await queue.queue.join()
+        queue.shutdown()
+        return queue.get(job_id)
+
+    job = asyncio.run(run())
+    assert job['status'] == 'done'
+    assert not upload.exists()
+    assert asyncio.run(storage.check_file_exists('game'))
+
+def test_job_queue_skips_duplicates(tmp_path):
+    storage = SqliteService(':memory:')
+
+    async def run():
+        queue = JobQueue(storage, str(tmp_path / 'jobs.db'), workers=2)
+        # Both are queued before either is stored, as with concurrent uploads of one log
+        job_ids = []
+        for i in range(2):
+            upload = tmp_path / f'upload{i}.csv'
+            shutil.copy(LOG_FILE, upload)
+            job_ids.append(await queue.submit(upload.name, str(upload), {'file_id': 'game', 'content_hash': 'abc'}))
+        await queue.queue.join()
+        queue.shutdown()
+        return [queue.get(job_id) for job_id in job_ids]
+
+    jobs = asyncio.run(run())
+    assert sorted(job['status'] for job in jobs) == ['done', 'skipped']
+    assert len(asyncio.run(storage.get_sessions())) == 1
+
+def test_job_queue_skips_direct_upload(tmp_path):
+    upload = tmp_path / 'upload.csv'
+    shutil.copy(LOG_FILE, upload)
+    storage = SqliteService(':memory:')
+
+    async def run():
+        queue = JobQueue(storage, str(tmp_path / 'jobs.db'), workers=1)
+        job_id = await queue.submit('upload.csv', str(upload), {'file_id': 'game', 'content_hash': 'abc'})
+        # A direct upload of another export of the game, stored while the job parses
+        direct = {**parse_upload(job_id, str(tmp_path / 'jobs.db'), LOG_FILE), 'file_id': 'game', 'content_hash': 'def'}
+        assert await storage.create_session_once(direct) is not None
+        assert await storage.create_session_once(direct) is None
+        await queue.queue.join()
+        queue.shutdown()
+        return queue.get(job_id)
+
+    assert asyncio.run(run())['status'] == 'skipped'
+    assert len(asyncio.run(storage.get_sessions())) == 1
+
+def test_unfinished_jobs_fail_on_restart(tmp_path):
+    database = str(tmp_path / 'jobs.db')
+    store = JobStore(database)
+    queued, running, done = store.create('a.csv'), store.create('b.csv'), store.create('c.csv')
+    store.update(running, status='running')
+    store.update(done, status='done')
+
+    JobQueue(SqliteService(':memory:'), database)
+    assert [store.get(job_id)['status'] for job_id in (queued, running, done)] == ['failed', 'failed', 'done']
+    assert store.get(queued)['error'] == 'Interrupted by a server restart'
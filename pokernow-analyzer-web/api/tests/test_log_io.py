@@ -0,0 +1,104 @@
+import gzip
+import lzma
+import os
+import shutil
+import pytest
+import services  # noqa: F401
+from log_io import DICTIONARY_SUFFIX, compact, detect_compression, find_logs, log_stem, open_log
+from poker_analyzer import PokerAnalyzer
+from poker_partials import partial_path
+from conftest import LOG_DIR
+
+LOG_FILES = [
+    os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO_2.csv')
+]
+
+def _stats(log_file):
+    analyzer = PokerAnalyzer()
+    report = analyzer.parse_log(log_file)
+    return analyzer.get_stats(), report.hands, analyzer.start_time, analyzer.end_time
+
+@pytest.mark.parametrize('suffix, module', [('.gz', gzip), ('.xz', lzma)])
+def test_parse_compressed_log(tmp_path, suffix, module):
+    compressed = str(tmp_path / (os.path.basename(LOG_FILES[0]) + suffix))
+    with open(LOG_FILES[0], 'rb') as f, module.open(compressed, 'wb') as out:
+        shutil.copyfileobj(f, out)
+
+    assert _stats(compressed) == _stats(LOG_FILES[0])
+
+def _small_logs(directory, size=2000):
+    """The rows of the test logs split into logs of about `size` bytes, where a dictionary pays off."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for log_file in LOG_FILES:
+        with open(log_file, 'rb') as f:
+            header = f.readline()
+            content = f.read()
+        start = 0
+        while start < len(content):
+            end = content.find(b'\n', start + size)
+            end = len(content) if end == -1 else end + 1
+            path = os.path.join(str(directory), f'poker_now_log_part{len(paths):04}.csv')
+            with open(path, 'wb') as out:
+                out.write(header + content[start:end])
+            paths.append(path)
+            start = end
+    return paths
+
+def _read(path):
+    with open_log(path) as f:
+        return f.read()
+
+def test_compact_round_trip(tmp_path):
+    results = compact(LOG_FILES, str(tmp_path))
+
+    outputs = sorted(results)
+    assert [os.path.basename(path) for path in outputs] == [
+        'poker_now_log_PEEN_BOZO.csv.zst', 'poker_now_log_PEEN_BOZO_2.csv.zst'
+    ]
+    # Full-size logs compress better on their own than with a dictionary and its size added
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(DICTIONARY_SUFFIX)]
+    assert all(compressed < source for source, compressed in results.values())
+    for log_file, output in zip(LOG_FILES, outputs):
+        assert detect_compression(output) == 'zstd'
+        with open_log(output) as f, open(log_file, encoding='utf-8') as raw:
+            assert f.read() == raw.read()
+        assert _stats(output) == _stats(log_file)
+
+    assert find_logs([str(tmp_path)]) == outputs
+
+def test_compact_with_dictionary(tmp_path):
+    sources = _small_logs(tmp_path / 'logs')
+    output_dir = str(tmp_path / 'compact')
+    results = compact(sources, output_dir, level=3)
+
+    dictionaries = [path for path in results if path.endswith(DICTIONARY_SUFFIX)]
+    assert len(dictionaries) == 1 and results[dictionaries[0]] == (0, os.path.getsize(dictionaries[0]))
+    assert sum(source for source, _ in results.values()) == sum(map(os.path.getsize, sources))
+    for source, output in zip(sources, sorted(set(results) - set(dictionaries))):
+        assert _read(output) == _read(source)
+
+    # Logs too small to outweigh a dictionary are compressed without one
+    results = compact(sources[:10], str(tmp_path / 'few'), level=3)
+    assert len(results) == 10 and not any(path.endswith(DICTIONARY_SUFFIX) for path in results)
+
+def test_compact_replace(tmp_path):
+    sources = _small_logs(tmp_path)
+
+    compact(sources, level=3, replace=True)
+
+    logs = [os.path.basename(source) + '.zst' for source in sources]
+    assert sorted(name for name in os.listdir(tmp_path) if not name.endswith(DICTIONARY_SUFFIX)) == logs
+
+    # Recompacting one log doesn't train a dictionary; the others keep reading with theirs
+    compact([str(tmp_path / logs[0])], level=3, replace=True)
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(DICTIONARY_SUFFIX)]) == 1
+    expected = _small_logs(tmp_path / 'expected')
+    for source, name in zip(expected, logs):
+        assert _read(str(tmp_path / name)) == _read(source)
+
+def test_log_stem():
+    assert log_stem('/logs/poker_now_log_abc.csv.zst') == 'poker_now_log_abc'
+    assert log_stem('poker_now_log_abc (AHH).csv') == 'poker_now_log_abc (AHH)'
+    assert partial_path('logs/poker_now_log_abc.csv.gz', 'out') == os.path.join('out', 'poker_now_log_abc.npz')
@@ -0,0 +1,97 @@
+import os
+import shutil
+import services  # noqa: F401
+from log_io import game_id
+from log_watcher import IngestDaemon, ingest
+from poker_analyzer import PokerAnalyzer
+from poker_partials import reduce_partials
+from conftest import LOG_DIR, _hand, _write_log
+
+GAME_LOG = os.path.join(LOG_DIR, 'poker_now_log_pgl2q1GiOWedxAsSfnQwezi2q (AHH).csv')
+OTHER_LOG = os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO.csv')
+
+def _stats(*log_files):
+    analyzer = PokerAnalyzer()
+    for log_file in log_files:
+        analyzer.parse_log(log_file)
+    return analyzer.get_stats()
+
+def _daemon_stats(daemon):
+    return reduce_partials(
+        os.path.join(daemon.state_dir, name) for name in sorted(os.listdir(daemon.state_dir))
+    ).get_stats()
+
+def test_game_id():
+    assert game_id('/drop/poker_now_log_pglKrdju (Alwin).csv') == 'pglKrdju'
+    assert game_id('poker_now_log_pglKrdju (1).csv.gz') == 'pglKrdju'
+    assert game_id('poker_now_log_PEEN_BOZO_2.csv') == 'PEEN_BOZO_2'
+
+def test_repeat_exports_are_counted_once(tmp_path):
+    drop = tmp_path / 'drop'
+    drop.mkdir()
+    shutil.copy(GAME_LOG, drop / 'poker_now_log_pgl2q1GiOWedxAsSfnQwezi2q (AHH).csv')
+    shutil.copy(GAME_LOG, drop / 'poker_now_log_pgl2q1GiOWedxAsSfnQwezi2q (Alwin).csv')
+    shutil.copy(OTHER_LOG, drop)
+    stats_file = str(tmp_path / 'stats.csv')
+
+    messages = []
+    daemon = ingest(str(drop), stats_file=stats_file, log=messages.append)
+
+    expected = _stats(GAME_LOG, OTHER_LOG)
+    assert sorted(daemon.partials) == ['PEEN_BOZO', 'pgl2q1GiOWedxAsSfnQwezi2q']
+    assert _daemon_stats(daemon) == expected
+    assert sum('already analyzed' in message for message in messages) == 1
+    assert os.path.exists(stats_file)
+
+    # A restarted daemon picks up its state and parses nothing again, but still writes the stats
+    new_stats_file = str(tmp_path / 'new.csv')
+    parsed = len(messages)
+    restarted = ingest(str(drop), stats_file=new_stats_file, log=messages.append)
+    assert len(messages) == parsed and len(restarted.ingested) == 3
+    assert _daemon_stats(restarted) == expected
+    with open(stats_file) as f, open(new_stats_file) as new:
+        assert new.read() == f.read()
+
+def test_later_export_adds_new_hands(tmp_path):
+    drop = tmp_path / 'drop'
+    drop.mkdir()
+    hands = [_hand(number, ['"A, Jr @ a1" raises to 4', '"B "the rock" @ b2" calls 4']) for number in range(1, 5)]
+    full = tmp_path / 'full.csv'
+    _write_log(full, hands)
+
+    # The first export is taken mid-game, its last hand hasn't ended yet
+    _write_log(drop / 'poker_now_log_game1.csv', hands[:2] + [hands[2][:-1]])
+    daemon = IngestDaemon(str(drop), stats_file=str(tmp_path / 'stats.csv'), workers=1, log=lambda message: None)
+    try:
+        daemon.wait()
+        assert _daemon_stats(daemon) == _stats(str(drop / 'poker_now_log_game1.csv'))
+    finally:
+        daemon.close()
+
+    # After a restart that export is parsed again, as its newest hand may still end
+    daemon = IngestDaemon(str(drop), stats_file=str(tmp_path / 'stats.csv'), workers=1, log=lambda message: None)
+    assert daemon.ingested == {}
+    try:
+        _write_log(drop / 'poker_now_log_game1 (1).csv', hands)
+        daemon.wait()
+    finally:
+        daemon.close()
+
+    assert sorted(daemon.partials['game1']['hand_ids'].tolist()) == ['h1', 'h2', 'h3', 'h4']
+    assert _daemon_stats(daemon) == _stats(str(full))
+
+def test_waits_for_logs_to_settle(tmp_path):
+    log = tmp_path / 'poker_now_log_game1.csv'
+    _write_log(log, [_hand(1, ['"A, Jr @ a1" bets 2'])])
+    daemon = IngestDaemon(str(tmp_path), settle=2.0)
+
+    daemon.scan()
+    _, seen_at = daemon.changed[str(log)]
+    assert daemon.ready(seen_at + 1) == []
+    assert daemon.ready(seen_at + 2) == [str(log)]
+
+    # Still growing: the settle time starts over
+    with open(log, 'a') as f:
+        f.write('"-- starting hand #2 (id: h2) --",2024-01-01T00:00:00.000Z,170406720000100\n')
+    assert daemon.ready(seen_at + 2) == []
+    assert daemon.changed[str(log)][1] > seen_at
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from services.memory_service import MemoryService
+from services.session_rollup import rollup_file
+from services.storage import get_storage_service
+import app as app_module
+from conftest import LOG_DIR, upload
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+def _file_data(file_id, hours_ago, rollup=None, content_hash=None):
+    start_time = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return {
+        'file_id': file_id,
+        'content_hash': content_hash,
+        'start_time': start_time,
+        'end_time': start_time + timedelta(hours=2),
+        'rollup': rollup
+    }
+
+def test_sessions_like_sqlite():
+    storage = MemoryService()
+    rollup = rollup_file(LOG_FILE)
+    first = asyncio.run(storage.create_session(_file_data('old', 48, content_hash='abc123')))
+    second = asyncio.run(storage.create_session(_file_data('new', 1, rollup)))
+
+    assert asyncio.run(storage.check_file_exists('renamed', 'abc123'))
+    assert asyncio.run(storage.check_file_exists('new'))
+    assert not asyncio.run(storage.check_file_exists('missing', 'other'))
+
+    sessions = asyncio.run(storage.get_sessions())
+    assert [s['file_id'] for s in sessions] == ['new', 'old']
+    assert sessions[0]['players'] == sorted(rollup['players'])
+    assert asyncio.run(storage.get_session_rollups([first['id'], second['id']])) == [rollup]
+    assert asyncio.run(storage.get_session_rollups([second['id']], ('ledger', 'search'))) == [
+        {'ledger': rollup['ledger'], 'search': rollup['search']}
+    ]
+    assert asyncio.run(storage.get_sessions_without_rollup()) == [{'id': first['id'], 'file_name': 'old'}]
+
+    asyncio.run(storage.bulk_add_tag([first['id'], second['id']], 'plo'))
+    assert asyncio.run(storage.remove_tag(first['id'], 'plo'))['tags'] == []
+    assert asyncio.run(storage.toggle_session_active(second['id'], False))['active'] is False
+    assert asyncio.run(storage.get_session_index()) == [
+        {'id': first['id'], 'tags': [], 'active': True},
+        {'id': second['id'], 'tags': ['plo'], 'active': False}
+    ]
+    with pytest.raises(Exception):
+        asyncio.run(storage.add_tag(999, 'missing'))
+
+def test_injected_latency():
+    async def concurrent(storage):
+        started = time.perf_counter()
+        await asyncio.gather(*(storage.get_session_index() for _ in range(5)))
+        return time.perf_counter() - started
+
+    # Awaited latency overlaps across requests, blocking latency adds up
+    assert asyncio.run(concurrent(MemoryService(latency=0.05))) < 0.2
+    assert asyncio.run(concurrent(MemoryService(latency=0.05, blocking=True))) >= 0.25
+
+def test_memory_backend(monkeypatch):
+    monkeypatch.setenv('STORAGE_BACKEND', 'memory')
+    monkeypatch.setenv('MEMORY_LATENCY_MS', '5')
+    get_storage_service.cache_clear()
+    try:
+        storage = get_storage_service()
+        assert isinstance(storage, MemoryService) and storage.latency == 0.005 and not storage.blocking
+    finally:
+        get_storage_service.cache_clear()
+
+def test_app_on_memory_storage(monkeypatch):
+    storage = MemoryService()
+    monkeypatch.setattr(app_module, 'get_storage_service', lambda: storage)
+    client = TestClient(app_module.app)
+    body = upload(client, LOG_FILE)
+    assert len(body['processed']) == 1
+
+    session_id = client.get('/sessions').json()[0]['id']
+    assert client.post('/sessions/bulk/tags', json={'session_ids': [session_id], 'tag': 'home'}).json()['status'] == \
+        'success'
+    assert client.get('/stats', params={'tags': 'home'}).json()
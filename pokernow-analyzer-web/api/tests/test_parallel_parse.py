@@ -0,0 +1,61 @@
+import os
+import pytest
+import services  # noqa: F401
+from poker_analyzer import PokerAnalyzer, hand_deltas
+from conftest import LOG_DIR, _hand, _write_log
+
+LOG_FILES = [
+    os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO.csv')
+]
+
+def _parse(log_file, **kwargs):
+    analyzer = PokerAnalyzer()
+    report = analyzer.parse_log(log_file, **kwargs)
+    return analyzer, (report.rows, report.hands, report.rejected)
+
+@pytest.mark.parametrize('log_file', LOG_FILES)
+def test_workers_match_sequential(log_file):
+    sequential, sequential_report = _parse(log_file)
+    parallel, parallel_report = _parse(log_file, workers=2)
+
+    assert parallel.get_stats() == sequential.get_stats()
+    assert list(parallel.players) == list(sequential.players)
+    assert parallel.context_hands == sequential.context_hands
+    assert (parallel.start_time, parallel.end_time) == (sequential.start_time, sequential.end_time)
+    assert parallel_report == sequential_report
+
+def test_hand_deltas_is_pure():
+    analyzer = PokerAnalyzer()
+    hand = [row[0] for row in _hand(1, ['"A, Jr @ a1" raises to 4', '"B "the rock" @ b2" calls 4'])]
+
+    delta = hand_deltas(hand, analyzer.dispatch)
+    assert analyzer.players == {} and analyzer.context_hands == {}
+    assert delta.seats == [('a, jr', 2), ('b "the rock"', 2)]
+    assert delta.counts['a, jr']['preflop_raise_hands'] == 1
+
+    analyzer.apply_hand(delta)
+    reference = PokerAnalyzer()
+    reference.process_hand(hand)
+    assert analyzer.get_stats() == reference.get_stats()
+    assert analyzer.context_hands == reference.context_hands
+
+def test_failing_hand_leaves_no_trace(tmp_path, monkeypatch):
+    log = tmp_path / 'log.csv'
+    _write_log(log, [
+        _hand(1, ['"A, Jr @ a1" bets 2']),
+        _hand(2, ['"B "the rock" @ b2" bets 2'])
+    ])
+
+    def fail(hand, player):
+        if player == 'b "the rock"':
+            raise RuntimeError('boom')
+
+    analyzer = PokerAnalyzer()
+    analyzer.dispatch = {**analyzer.dispatch, 'bet': analyzer.dispatch.get('bet', ()) + (fail,)}
+    report = analyzer.parse_log(str(log))
+
+    assert report.rejected == {'RuntimeError: boom': 1}
+    # The hand is dropped whole, its players are only seated by hands that succeed
+    assert analyzer.players['b "the rock"'].total_hands == 1
+    assert analyzer.context_hands == {'NLHE_2h': 1}
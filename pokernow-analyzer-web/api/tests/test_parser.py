@@ -0,0 +1,49 @@
+import csv
+import services  # noqa: F401
+from poker_analyzer import PokerAnalyzer
+from conftest import _hand, _write_log
+
+def test_names_with_commas_and_quotes(tmp_path):
+    log = tmp_path / 'log.csv'
+    _write_log(log, [_hand(1, ['"A, Jr @ a1" raises to 4', '"B "the rock" @ b2" calls 4'])])
+
+    analyzer = PokerAnalyzer()
+    report = analyzer.parse_log(str(log))
+
+    stats = analyzer.get_stats()
+    assert set(stats) == {'a, jr', 'b "the rock"'}
+    assert stats['a, jr']['overall']['Raises'] == 1
+    assert stats['b "the rock"']['overall']['Calls'] == 1
+    assert report.hands == 1 and report.rejected_hands == 0
+
+def test_malformed_hands_are_quarantined(tmp_path):
+    log = tmp_path / 'log.csv'
+    quarantine = tmp_path / 'quarantine.csv'
+    malformed = _hand(2, ['"A, Jr @ a1" raises to 4'])
+    malformed[2] = malformed[2] + ['2024-01-01T00:00:00.000Z', '1', 'extra']
+    unfinished = _hand(3, ['"A, Jr @ a1" bets 2'])[:-1]
+    _write_log(log, [
+        _hand(1, ['"A, Jr @ a1" bets 2']),
+        malformed,
+        unfinished,
+        _hand(4, ['"A, Jr @ a1" bets 2'], stacks=False),
+        _hand(5, ['"B "the rock" @ b2" bets 2'])
+    ])
+
+    analyzer = PokerAnalyzer()
+    report = analyzer.parse_log(str(log), quarantine=str(quarantine))
+
+    stats = analyzer.get_stats()
+    assert stats['a, jr']['overall']['Hands'] == 2
+    assert stats['a, jr']['overall']['Bets'] == 1
+    assert stats['a, jr']['overall']['Raises'] == 0
+    assert report.hands == 5
+    assert report.rejected == {'malformed row': 1, 'incomplete hand': 1, 'missing player stacks': 1}
+    assert report.rejection_rate == 3 / 5
+
+    with open(quarantine) as f:
+        rows = list(csv.DictReader(f))
+    assert [row['Reason'] for row in rows] == ['missing player stacks', 'incomplete hand', 'malformed row']
+    # Hand 4 is the second newest, its three rows follow the header and hand 5's four rows
+    assert (rows[0]['First Line'], rows[0]['Last Line']) == ('6', '8')
+    assert rows[0]['Hand'].startswith('-- starting hand #4')
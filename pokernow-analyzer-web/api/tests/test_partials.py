@@ -0,0 +1,39 @@
+import os
+import pytest
+import services  # noqa: F401
+from poker_analyzer import PokerAnalyzer
+from poker_partials import find_partials, map_log, merge_partials, partial_to_analyzer, read_partial, reduce_partials
+from conftest import LOG_DIR
+
+LOG_FILES = [
+    os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO_2.csv')
+]
+
+@pytest.fixture
+def partial_files(tmp_path):
+    return [map_log(log_file, str(tmp_path)) for log_file in LOG_FILES]
+
+def test_map_is_deterministic(partial_files, tmp_path):
+    rerun = map_log(LOG_FILES[0], str(tmp_path / 'rerun'))
+    with open(partial_files[0], 'rb') as a, open(rerun, 'rb') as b:
+        assert a.read() == b.read()
+
+def test_reduce_matches_analyzer(partial_files, tmp_path):
+    analyzer = PokerAnalyzer()
+    for log_file in LOG_FILES:
+        analyzer.parse_log(log_file)
+
+    assert find_partials([str(tmp_path)]) == sorted(partial_files)
+    assert reduce_partials(partial_files).get_stats() == analyzer.get_stats()
+
+def test_merge_is_order_independent(partial_files):
+    partials = [read_partial(path) for path in partial_files]
+    forward = merge_partials(partials)
+    reverse = merge_partials(reversed(partials))
+    nested = merge_partials([merge_partials(partials[1:]), partials[0]])
+    for name, values in forward.items():
+        assert (values == reverse[name]).all()
+        assert (values == nested[name]).all()
+    assert partial_to_analyzer(forward).get_stats() == partial_to_analyzer(nested).get_stats()
@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pytest
+from player_styles import STYLE_FEATURES, StyleSpace, style_vector
+from conftest import LOG_DIR, upload
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+def _stats(styles):
+    """get_stats-shaped stats with the given (VPIP, PFR) per player and 100 hands each."""
+    return {
+        player: {'overall': {
+            'Hands': 100, 'VPIP': vpip, 'PFR': pfr, 'AF': 2.0, 'WTSD': 25.0, '3Bets': 4, '4Bets': 1, '5Bets': 0
+        }, 'by_combined': {}}
+        for player, (vpip, pfr) in styles.items()
+    }
+
+STYLES = {
+    'nit': (15.0, 10.0), 'nit2': (16.0, 10.5), 'reg': (25.0, 18.0), 'reg alt': (25.5, 18.2),
+    'fish': (60.0, 8.0), 'maniac': (80.0, 50.0)
+}
+
+def test_style_vectors():
+    stats = _stats(STYLES)
+    stats['nit']['overall']['Hands'] = 200
+    assert style_vector(stats['nit']['overall']) == [15.0, 10.0, 2.0, 25.0, 2.0, 0.5, 0.0]
+
+    space = StyleSpace.from_stats(stats, min_hands=150)
+    assert space.players == ['nit'] and space.features.shape == (1, len(STYLE_FEATURES))
+    assert len(StyleSpace.from_stats(stats, context='PLO_6h')) == 0
+
+def test_similar_and_alts():
+    space = StyleSpace.from_stats(_stats(STYLES))
+    points = space.points
+    brute = np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=2))
+    assert np.allclose(space.distances(points), brute, atol=1e-6)
+
+    assert [player for player, _ in space.similar('reg', 2)] == ['reg alt', 'nit2']
+    assert space.similar('reg', 10)[-1][0] == 'maniac' and len(space.similar('reg', 10)) == 5
+    assert [(player, other) for player, other, _ in space.alt_candidates(1.0)] == [('reg', 'reg alt'), ('nit', 'nit2')]
+    assert space.alt_candidates(0.0) == []
+
+def test_nearest_in_blocks(monkeypatch):
+    rng = np.random.default_rng(3)
+    stats = _stats({f'p{i}': tuple(rng.uniform(10, 60, size=2)) for i in range(50)})
+    space = StyleSpace.from_stats(stats)
+    expected = space.nearest()
+    monkeypatch.setattr('player_styles.DISTANCE_BLOCK', 7)
+    for blocked, whole in zip(space.nearest(), expected):
+        assert np.allclose(blocked, whole)
+
+def test_kmeans_separates_styles():
+    space = StyleSpace.from_stats(_stats(STYLES))
+    clusters = space.clusters(3)
+    assert [cluster['players'] for cluster in clusters] == [['nit', 'nit2', 'reg', 'reg alt'], ['maniac'], ['fish']]
+    assert space.clusters(3) == clusters  # Seeded
+    assert clusters[1]['center']['VPIP'] == pytest.approx(80.0)
+    assert clusters[0]['center']['AF'] == pytest.approx(2.0)
+    assert len(space.clusters(10)) == len(STYLES)
+
+def test_kmeans_restarts_empty_clusters():
+    # Four players share a style, so seeding repeats centers and leaves clusters empty
+    styles = {**{f'nit{i}': STYLES['nit'] for i in range(4)}, 'fish': STYLES['fish'], 'maniac': STYLES['maniac']}
+    space = StyleSpace.from_stats(_stats(styles))
+    labels, centers = space.kmeans(5)
+    assert sorted(np.bincount(labels, minlength=5).tolist()) == [1, 1, 1, 1, 2]
+    assert len(centers) == 5
+
+def test_styles_endpoints(client):
+    body = upload(client, LOG_FILE)
+    assert len(body['processed']) == 1
+
+    styles = client.get('/stats/styles', params={'k': 2, 'min_hands': 1}).json()
+    assert len(styles['clusters']) == 2
+    assert sum(len(cluster['players']) for cluster in styles['clusters']) == styles['players']
+
+    player = styles['clusters'][0]['players'][0]
+    similar = client.get(f'/stats/styles/{player}', params={'n': 2, 'min_hands': 1}).json()
+    assert len(similar) == 2 and similar[0]['distance'] <= similar[1]['distance']
+    assert client.get('/stats/styles/nobody').json()['status'] == 'error'
@@ -0,0 +1,50 @@
+import pytest
+import msgspec
+import orjson
+from services.serialization import (
+    METRICS, MSGPACK_MEDIA_TYPE, columnar_stats, encode_stats
+)
+
+def _context_stats(hands):
+    stats = {metric: 0 for metric in METRICS}
+    stats['Hands'] = hands
+    stats['VPIP'] = 50.0
+    return stats
+
+@pytest.fixture
+def sample_stats():
+    return {
+        'Bob': {
+            'overall': _context_stats(10),
+            'by_game_type': {'NLHE': _context_stats(10)},
+            'by_table_size': {'6-handed': _context_stats(10)},
+            'by_combined': {'NLHE_6h': _context_stats(10)}
+        },
+        'Alice': {
+            'overall': _context_stats(4),
+            'by_game_type': {'NLHE': _context_stats(1), 'PLO': _context_stats(3)},
+            'by_table_size': {'6-handed': _context_stats(4)},
+            'by_combined': {'NLHE_6h': _context_stats(1), 'PLO_6h': _context_stats(3)}
+        }
+    }
+
+def test_columnar_stats_parallel_arrays(sample_stats):
+    result = columnar_stats(sample_stats)
+
+    assert result['players'] == ['Alice', 'Bob']
+    assert result['overall']['Hands'] == [4, 10]
+
+    by_game_type = result['by_game_type']
+    assert by_game_type['player'] == [0, 0, 1]
+    assert by_game_type['context'] == ['NLHE', 'PLO', 'NLHE']
+    assert by_game_type['Hands'] == [1, 3, 10]
+    assert all(len(by_game_type[metric]) == 3 for metric in METRICS)
+
+def test_encode_stats_json_and_msgpack(sample_stats):
+    body, media_type = encode_stats(sample_stats)
+    assert media_type == 'application/json'
+    assert orjson.loads(body) == sample_stats
+
+    body, media_type = encode_stats(sample_stats, accept=MSGPACK_MEDIA_TYPE, shape='columnar')
+    assert media_type == MSGPACK_MEDIA_TYPE
+    assert msgspec.msgpack.decode(body) == columnar_stats(sample_stats)
@@ -0,0 +1,34 @@
+import os
+import pytest
+from services.session_rollup import (
+    build_rollup, game_stats, merge_rollups, rollup_file, rollup_players, rollup_to_analyzer
+)
+from poker_analyzer import PokerAnalyzer
+from conftest import LOG_DIR
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+@pytest.fixture
+def analyzer():
+    analyzer = PokerAnalyzer()
+    analyzer.parse_log(LOG_FILE)
+    return analyzer
+
+def test_rollup_round_trip_matches_analyzer(analyzer):
+    rollup = build_rollup(analyzer)
+    assert rollup_to_analyzer(rollup).get_stats() == analyzer.get_stats()
+
+def test_game_stats_percentages(analyzer):
+    stats = game_stats(build_rollup(analyzer))
+    assert sum(v['percentage'] for v in stats['table_sizes'].values()) == pytest.approx(100, abs=0.5)
+    assert set(stats['game_types']) <= {'NLHE', 'PLO'}
+
+def test_merge_rollups_sums_counters(analyzer):
+    rollup = rollup_file(LOG_FILE)
+    merged = merge_rollups([rollup, rollup])
+    assert rollup_players(merged) == rollup_players(rollup)
+
+    player = rollup_players(rollup)[0]
+    for context, counters in rollup['players'][player].items():
+        assert merged['players'][player][context] == [2 * c for c in counters]
+    assert merged['hands'] == {k: 2 * v for k, v in rollup['hands'].items()}
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import services  # noqa: F401
+from poker_analyzer import read_hands
+from showdown_index import (
+    BOARD_FLUSH_POSSIBLE, BOARD_PAIRED, NO_CARD, ShowdownIndex, board_flags, encode_card,
+    extract_showdowns, hand_category, pack_cards, parse_cards, unpack_cards
+)
+from conftest import LOG_DIR
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+def test_cards_pack_into_six_bits():
+    cards = np.array([[0, 51, 17, NO_CARD, NO_CARD, NO_CARD], [12, 13, 14, 15, 16, 50]], dtype=np.uint8)
+    packed = pack_cards(cards)
+    assert packed.shape == (2, 5)
+    assert (unpack_cards(packed, 6) == cards).all()
+
+def test_hand_category():
+    assert hand_category(parse_cards('Q♦, 10♦'), parse_cards('2♦, 5♦, K♦, 5♠, 9♣')) == 5
+    assert hand_category(parse_cards('A♠, 2♣'), parse_cards('3♦, 4♥, 5♣, K♠, K♣')) == 4
+    # Omaha must use exactly two hole cards, so a four-flush in hand is no flush
+    assert hand_category(parse_cards('A♦, K♦, Q♦, J♦'), parse_cards('2♦, 7♠, 9♣, 3♥, 4♠'), omaha=True) == 0
+    assert board_flags(parse_cards('5♦, 5♠, 9♦, 2♦')) == BOARD_PAIRED | BOARD_FLUSH_POSSIBLE
+
+def test_extract_showdowns():
+    hand = next(
+        hand for hand in read_hands(LOG_FILE) if 'id: aohq1g4opt8j' in hand[0][0]
+    )
+    shown = {hand.player: hand for hand in extract_showdowns(hand)}
+    assert shown['bp'].hole == [encode_card('J♣'), encode_card('10♠')]
+    assert shown['bp'].collected == 52
+    assert len(shown['bp'].board) == 5
+    assert shown['alwin'].hole == [encode_card('Q♦'), encode_card('K♦')]
+    assert all(hand.collected == 0 for player, hand in shown.items() if player != 'bp')
+
+def test_index_round_trip_and_query(tmp_path):
+    index = ShowdownIndex.from_logs([LOG_FILE])
+    path = str(tmp_path / 'showdowns.npz')
+    index.save(path)
+    loaded = ShowdownIndex.load(path)
+
+    assert len(loaded) == len(index) > 0
+    assert loaded.query() == index.query()
+    flushes = loaded.query(category='flush', board=['paired'])
+    assert all(row['category'] == 'flush' for row in flushes)
+    assert all(board_flags([encode_card(card) for card in row['board']]) & BOARD_PAIRED for row in flushes)
+    assert loaded.query(player='nobody') == []
+    player = loaded.query()[0]['player']
+    assert {row['player'] for row in loaded.query(player=player.upper())} == {player}
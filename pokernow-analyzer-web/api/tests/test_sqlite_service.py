@@ -0,0 +1,92 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from services.session_rollup import LISTING_KEYS, game_stats, rollup_file
+from services.sqlite_service import SELECT_SESSIONS, SqliteService
+from services.storage import DuplicateSessionError
+from conftest import LOG_DIR
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+@pytest.fixture
+def storage():
+    return SqliteService(':memory:')
+
+def _file_data(file_id, hours_ago, rollup=None):
+    start_time = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    return {
+        'file_id': file_id,
+        'start_time': start_time,
+        'end_time': start_time + timedelta(hours=2),
+        'rollup': rollup
+    }
+
+def test_create_and_list_sessions(storage):
+    rollup = rollup_file(LOG_FILE)
+    asyncio.run(storage.create_session(_file_data('old', 48)))
+    created = asyncio.run(storage.create_session(_file_data('new', 1, rollup)))
+
+    assert created['file_name'] == 'new'
+    assert created['active'] is True
+    assert asyncio.run(storage.check_file_exists('old'))
+    assert not asyncio.run(storage.check_file_exists('missing'))
+
+    sessions = asyncio.run(storage.get_sessions())
+    assert [s['file_id'] for s in sessions] == ['new', 'old']
+    assert sessions[0]['players'] == sorted(rollup['players'])
+    assert sessions[1]['players'] == []
+    assert sessions[0]['game_stats'] == game_stats(rollup)
+
+    assert asyncio.run(storage.get_session_rollups([created['id']])) == [rollup]
+    assert [s['file_name'] for s in asyncio.run(storage.get_sessions_without_rollup())] == ['old']
+
+def test_tags_and_active(storage):
+    first = asyncio.run(storage.create_session(_file_data('a', 2)))
+    second = asyncio.run(storage.create_session(_file_data('b', 1)))
+
+    assert asyncio.run(storage.add_tag(first['id'], 'home'))['tags'] == ['home']
+    asyncio.run(storage.bulk_add_tag([first['id'], second['id']], 'plo'))
+    assert asyncio.run(storage.remove_tag(first['id'], 'home'))['tags'] == ['plo']
+    assert asyncio.run(storage.toggle_session_active(second['id'], False))['active'] is False
+
+    index = {s['id']: s for s in asyncio.run(storage.get_session_index())}
+    assert index[first['id']] == {'id': first['id'], 'tags': ['plo'], 'active': True}
+    assert index[second['id']] == {'id': second['id'], 'tags': ['plo'], 'active': False}
+
+    with pytest.raises(Exception):
+        asyncio.run(storage.add_tag(999, 'missing'))
+
+def test_check_file_exists_by_content_hash(storage):
+    file_data = _file_data('game', 1)
+    file_data['content_hash'] = 'abc123'
+    asyncio.run(storage.create_session(file_data))
+
+    assert asyncio.run(storage.check_file_exists('renamed', 'abc123'))
+    assert asyncio.run(storage.check_file_exists('game', 'other'))
+    assert not asyncio.run(storage.check_file_exists('renamed', 'other'))
+
+    # A concurrent upload that passed the check before the first was stored
+    with pytest.raises(DuplicateSessionError):
+        asyncio.run(storage.create_session(file_data))
+    asyncio.run(storage.create_session(_file_data('no hash', 1)))
+    asyncio.run(storage.create_session(_file_data('no hash either', 1)))
+
+def test_listing_reads_only_listing_keys(storage):
+    asyncio.run(storage.create_session(_file_data('game', 1, rollup_file(LOG_FILE))))
+    with storage.pool.connection() as conn:
+        rows = conn.execute(SELECT_SESSIONS).fetchall()
+    assert set(storage._row_to_session(rows[0])['rollup']) == set(LISTING_KEYS)
+
+def test_queries_run_off_the_event_loop(storage):
+    async def blocked():
+        # The event loop keeps running while every pooled connection is borrowed
+        connections = [storage.pool._connections.get() for _ in range(storage.pool._connections.maxsize)]
+        index = asyncio.ensure_future(storage.get_session_index())
+        await asyncio.sleep(0.05)
+        assert not index.done()
+        for conn in connections:
+            storage.pool._connections.put(conn)
+        return await index
+
+    assert asyncio.run(blocked()) == []
@@ -0,0 +1,85 @@
+import csv
+import os
+import numpy as np
+from services.session_rollup import build_rollup, merge_rollups, rollup_to_analyzer
+from poker_analyzer import INTERVAL_CSV_HEADERS, STATS_CSV_HEADERS, PokerAnalyzer, main
+from stat_intervals import bootstrap_intervals
+from conftest import LOG_DIR, upload
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO.csv')
+
+def _analyzer(log_file=LOG_FILE):
+    analyzer = PokerAnalyzer()
+    analyzer.parse_log(log_file)
+    return analyzer
+
+def test_intervals_contain_point_estimates():
+    analyzer = _analyzer()
+    stats = analyzer.get_stats()
+    intervals = analyzer.get_intervals(resamples=500)
+
+    assert set(intervals) == set(stats)
+    for player, bounds in intervals.items():
+        assert analyzer.players[player].profiles() and sum(analyzer.players[player].profiles().values()) == \
+            analyzer.players[player].total_hands
+        assert list(bounds['by_combined']) == list(stats[player]['by_combined'])
+        for metric, (low, high) in bounds['overall'].items():
+            assert low <= stats[player]['overall'][metric] <= high
+
+def test_same_seed_same_intervals():
+    analyzer = _analyzer()
+    assert analyzer.get_intervals(resamples=200, seed=7) == analyzer.get_intervals(resamples=200, seed=7)
+    assert analyzer.get_intervals(resamples=200, seed=7) != analyzer.get_intervals(resamples=200, seed=8)
+
+def test_bootstrap_intervals():
+    # Every hand played and none raised: no spread to resample
+    assert bootstrap_intervals({(1, 0, 0, 0, 0, 0, 1): 50}, 100, 0.95, np.random.default_rng(0)) == {
+        'VPIP': (100.0, 100.0), 'PFR': (0.0, 0.0), 'AF': (0.0, 0.0), 'WTSD': (0.0, 0.0)
+    }
+    assert bootstrap_intervals({}, 100, 0.95) == {}
+
+    # Half the hands played: a narrower level gives a narrower interval
+    profiles = {(1, 0, 0, 0, 0, 0, 0): 100, (0, 0, 0, 0, 0, 0, 0): 100}
+    wide = bootstrap_intervals(profiles, 2000, 0.99, np.random.default_rng(0))['VPIP']
+    narrow = bootstrap_intervals(profiles, 2000, 0.5, np.random.default_rng(0))['VPIP']
+    assert wide[0] < narrow[0] < 50 < narrow[1] < wide[1]
+
+def test_rollups_keep_profiles():
+    analyzer = _analyzer()
+    restored = rollup_to_analyzer(merge_rollups([build_rollup(analyzer)]))
+    assert restored.get_intervals(resamples=200) == analyzer.get_intervals(resamples=200)
+
+    # Merging two sessions counts their hands twice
+    doubled = rollup_to_analyzer(merge_rollups([build_rollup(analyzer)] * 2))
+    for player, data in analyzer.players.items():
+        assert doubled.players[player].profiles() == {
+            profile: hands * 2 for profile, hands in data.profiles().items()
+        }
+
+def test_cli_interval_columns(tmp_path, capsys):
+    output = tmp_path / 'stats.csv'
+    main(['analyze', LOG_FILE, '-o', str(output), '--ci', '--resamples', '100'])
+    with open(output) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == STATS_CSV_HEADERS + INTERVAL_CSV_HEADERS
+    hands, played, low, high = (rows[0].index(name) for name in ('Hands', 'Hands Played', 'VPIP Low', 'VPIP High'))
+    for row in rows[1:]:
+        assert float(row[low]) - 0.01 <= int(row[played]) / int(row[hands]) * 100 <= float(row[high]) + 0.01
+
+def test_intervals_endpoint(client):
+    body = upload(client, LOG_FILE)
+    assert len(body['processed']) == 1
+
+    response = client.get('/stats/intervals', params={'resamples': 200}).json()
+    assert response['sessions'] == 1 and response['missing'] == 0
+    expected = _analyzer().get_intervals(resamples=200)
+    assert response['players'] == {
+        player: {
+            'overall': {metric: list(bounds) for metric, bounds in contexts['overall'].items()},
+            'by_combined': {
+                context: {metric: list(bounds) for metric, bounds in by_metric.items()}
+                for context, by_metric in contexts['by_combined'].items()
+            }
+        }
+        for player, contexts in expected.items()
+    }
@@ -0,0 +1,85 @@
+import asyncio
+import glob
+import os
+import numpy as np
+import pytest
+from services.session_rollup import rollup_file
+from services.stats_cache import StatsCache
+from poker_analyzer import PokerAnalyzer
+from stat_percentiles import QUANTILES, percentile_ranks, population_tables
+from conftest import LOG_DIR, upload
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+def _stats(log_files):
+    analyzer = PokerAnalyzer()
+    for log_file in log_files:
+        analyzer.parse_log(log_file)
+    return analyzer.get_stats()
+
+def test_tables_match_brute_force():
+    stats = _stats(sorted(glob.glob(os.path.join(LOG_DIR, '*.csv')))[:20])
+    tables = population_tables(stats, min_hands=20)
+    assert tables
+
+    for context, table in tables.items():
+        pool = {
+            player: contexts['by_combined'][context]
+            for player, contexts in stats.items()
+            if contexts['by_combined'].get(context, {}).get('Hands', 0) >= 20
+        }
+        assert table.players == len(pool)
+        vpip = np.array([context_stats['VPIP'] for context_stats in pool.values()])
+        row = table.metrics.index('VPIP')
+        assert np.allclose(table.quantiles[row], np.quantile(vpip, QUANTILES))
+        assert sum(table.summary()['metrics']['VPIP']['histogram']['counts']) == len(pool)
+
+        for player, context_stats in pool.items():
+            below = np.sum(vpip < context_stats['VPIP'])
+            equal = np.sum(vpip == context_stats['VPIP'])
+            assert table.rank('VPIP', context_stats['VPIP']) == pytest.approx((below + equal / 2) / len(pool) * 100)
+            ranks = percentile_ranks(tables, stats, player)[context]
+            assert ranks['3Bets per 100']['value'] == pytest.approx(context_stats['3Bets'] / context_stats['Hands'] * 100)
+
+def test_rank_bounds():
+    stats = {
+        player: {'by_combined': {'PLO_6h': {'Hands': 100, 'VPIP': vpip}}}
+        for player, vpip in (('a', 10.0), ('b', 20.0), ('c', 20.0), ('d', 40.0))
+    }
+    table = population_tables(stats)['PLO_6h']
+    assert table.rank('VPIP', 5.0) == 0
+    assert table.rank('VPIP', 20.0) == 50
+    assert table.rank('VPIP', 50.0) == 100
+    assert table.rank('AF', 1.0) is None
+    assert population_tables(stats, min_hands=101) == {}
+
+def test_population_cached_until_invalidated():
+    rollup = rollup_file(LOG_FILE)
+
+    async def load_rollups(session_ids, keys=None):
+        return [rollup for _ in session_ids]
+
+    cache = StatsCache()
+    _, first = asyncio.run(cache.get_population([1, 2], load_rollups, 20))
+    _, second = asyncio.run(cache.get_population([2, 1], load_rollups, 20))
+    assert first is second
+    _, fewer = asyncio.run(cache.get_population([1, 2], load_rollups, 10 ** 6))
+    assert fewer == {}
+
+    cache.invalidate()
+    _, rebuilt = asyncio.run(cache.get_population([1, 2], load_rollups, 20))
+    assert rebuilt is not first
+
+def test_population_endpoints(client):
+    body = upload(client, LOG_FILE)
+    assert len(body['processed']) == 1
+
+    stats = _stats([LOG_FILE])
+    tables = population_tables(stats, min_hands=1)
+    population = client.get('/stats/population', params={'min_hands': 1}).json()
+    assert set(population) == set(tables)
+
+    player = next(iter(stats))
+    ranks = client.get(f'/stats/population/{player}', params={'min_hands': 1}).json()
+    assert ranks == percentile_ranks(tables, stats, player)
+    assert client.get('/stats/population/nobody').json()['status'] == 'error'
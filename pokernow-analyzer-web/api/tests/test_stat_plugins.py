@@ -0,0 +1,64 @@
+import os
+import pytest
+import services  # noqa: F401
+from poker_analyzer import PokerAnalyzer
+from stat_plugins import STAT_PLUGINS, HandState, StatPlugin, classify_action, register_stat_plugin
+from conftest import LOG_DIR
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+class Limp(StatPlugin):
+    name = 'Limp'
+    counters = ('limp_hands',)
+    labels = {'limp_hands': 'Limps'}
+
+    def listeners(self):
+        return {'call': self.call}
+
+    def call(self, hand: HandState, player):
+        if hand.street == 'preflop' and hand.preflop_raises == 0:
+            hand.mark('limp_hands', player)
+
+    def metrics(self, stats):
+        return {'Limp': stats['limp_hands'] / stats['total_hands'] * 100}
+
+@pytest.fixture
+def limp():
+    plugin = Limp()
+    register_stat_plugin(plugin)
+    yield plugin
+    STAT_PLUGINS.remove(plugin)
+
+def test_classify_action():
+    assert classify_action('"a @ 1" posts a big blind of 2') == 'post'
+    assert classify_action('"a @ 1" calls 2') == 'call'
+    assert classify_action('"a @ 1" raises to 6') == 'raise'
+    assert classify_action('flop:  [10♥, 5♦, 9♣]') == 'flop'
+    assert classify_action('"a @ 1" checks') is None
+
+def test_dispatch_table_groups_handlers_by_event():
+    analyzer = PokerAnalyzer()
+    assert len(analyzer.dispatch['raise']) == 3  # PFR, AF, 3-bet
+    assert 'checks' not in analyzer.dispatch
+
+def test_registered_plugin_adds_counter_and_metric(limp):
+    analyzer = PokerAnalyzer()
+    analyzer.parse_log(LOG_FILE)
+    stats = analyzer.get_stats()
+
+    limps = {player: data.overall_stats()['limp_hands'] for player, data in analyzer.players.items()}
+    assert sum(limps.values()) > 0
+    player = max(limps, key=limps.get)
+    data = analyzer.players[player]
+    assert limps[player] == sum(s['limp_hands'] for s in data.combined_stats.values())
+    overall = stats[player]['overall']
+    assert overall['Limps'] == limps[player]
+    assert overall['Limp'] == pytest.approx(overall['Limps'] / overall['Hands'] * 100)
+
+def test_register_rejects_unknown_event():
+    class Checks(StatPlugin):
+        def listeners(self):
+            return {'check': lambda hand, player: None}
+
+    with pytest.raises(ValueError):
+        register_stat_plugin(Checks())
@@ -0,0 +1,40 @@
+import asyncio
+import os
+from services.session_rollup import rollup_file
+from services.stats_cache import StatsCache, select_sessions
+from conftest import LOG_DIR
+
+LOG_FILE = os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv')
+
+SESSIONS = [
+    {'id': 1, 'tags': ['home'], 'active': True},
+    {'id': 2, 'tags': ['home', 'plo'], 'active': False},
+    {'id': 3, 'tags': None, 'active': True}
+]
+
+def test_select_sessions():
+    assert [s['id'] for s in select_sessions(SESSIONS, ['home'])] == [1, 2]
+    assert [s['id'] for s in select_sessions(SESSIONS, ['home'], active=True)] == [1]
+    assert [s['id'] for s in select_sessions(SESSIONS, active=True)] == [1, 3]
+
+def test_stats_cache_hits_until_invalidated():
+    rollup = rollup_file(LOG_FILE)
+    loads = []
+
+    async def load_rollups(session_ids, keys=None):
+        loads.append(session_ids)
+        return [rollup for _ in session_ids]
+
+    cache = StatsCache()
+    first = asyncio.run(cache.get_stats([2, 1], load_rollups))
+    second = asyncio.run(cache.get_stats([1, 2], load_rollups))
+    assert first is second
+    assert loads == [[1, 2]]
+
+    player = next(iter(first))
+    single = asyncio.run(cache.get_stats([1], load_rollups))
+    assert first[player]['overall']['Hands'] == 2 * single[player]['overall']['Hands']
+
+    cache.invalidate()
+    asyncio.run(cache.get_stats([1, 2], load_rollups))
+    assert loads == [[1, 2], [1], [1, 2]]
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from services.file_processor import FileProcessor
+from timestamps import format_display, format_display_bulk, order_to_datetime, parse_iso, row_timestamp
+
+ROW = ['"-- ending hand #333 --"', '2023-11-27T07:39:51.643Z', '170107079164302']
+
+def test_order_matches_at_column():
+    assert order_to_datetime(ROW[2]) == parse_iso(ROW[1])
+    assert row_timestamp(ROW) == parse_iso(ROW[1])
+    assert row_timestamp([ROW[0], ROW[1], '']) == parse_iso(ROW[1])
+
+def test_extract_timestamp_with_commas_in_entry():
+    line = '"Flop:  [10♥, 5♦, 9♣]",2023-11-27T07:39:31.089Z,170107077108900\n'
+    assert FileProcessor()._extract_timestamp(line) == datetime(2023, 11, 27, 7, 39, 31, 89000, tzinfo=timezone.utc)
+
+@pytest.mark.parametrize('value, expected', [
+    (datetime(2023, 11, 27, 7, 39, tzinfo=timezone.utc), 'November 26, 2023 11:39PM'),
+    (datetime(2024, 3, 9, 17, 5, tzinfo=timezone.utc), 'March 9, 2024 9:05AM'),
+    (datetime(2024, 7, 1, 19, 0, tzinfo=timezone.utc), 'July 1, 2024 12:00PM'),
+])
+def test_format_display_matches_strftime(value, expected):
+    assert format_display(value) == expected
+
+def test_format_display_bulk():
+    start = datetime(2024, 3, 9, 17, 5, tzinfo=timezone.utc)
+    values = [start, start + timedelta(seconds=30), start + timedelta(hours=1)]
+    assert format_display_bulk(values) == [format_display(value) for value in values]
@@ -0,0 +1,84 @@
+import csv
+import os
+import pytest
+import services  # noqa: F401
+from poker_analyzer import PokerAnalyzer
+from stat_plugins import STAT_PLUGINS, StatPlugin
+from conftest import LOG_DIR, _hand, _write_log
+
+LOG_FILES = [
+    os.path.join(LOG_DIR, 'poker_now_log_pgl0q7wsvjue87_9yO_hL32rf.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_PEEN_BOZO.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_pglqtg-YRm05OPHlz8wj38qug.csv'),
+    os.path.join(LOG_DIR, 'poker_now_log_single_hand_test')
+]
+
+def _parse(log_files, engine, **kwargs):
+    analyzer = PokerAnalyzer()
+    reports = [analyzer.parse_log(log_file, engine=engine, **kwargs) for log_file in log_files]
+    return analyzer, [(report.rows, report.hands, report.rejected) for report in reports]
+
+@pytest.mark.parametrize('log_file', LOG_FILES)
+def test_matches_loop_engine(log_file):
+    loop, loop_reports = _parse([log_file], 'loop')
+    vectorized, vectorized_reports = _parse([log_file], 'vectorized')
+
+    assert vectorized.get_stats() == loop.get_stats()
+    assert list(vectorized.players) == list(loop.players)
+    assert vectorized.context_hands == loop.context_hands
+    assert vectorized.get_intervals(resamples=200) == loop.get_intervals(resamples=200)
+    assert {player: data.hand_profiles for player, data in vectorized.players.items()} == \
+        {player: data.hand_profiles for player, data in loop.players.items()}
+    assert (vectorized.start_time, vectorized.end_time) == (loop.start_time, loop.end_time)
+    assert vectorized_reports == loop_reports
+
+def test_accumulates_across_logs():
+    loop, _ = _parse(LOG_FILES, 'loop')
+    vectorized, _ = _parse(LOG_FILES, 'vectorized')
+    assert vectorized.get_stats() == loop.get_stats()
+
+def test_quarantine_and_fallback_hands(tmp_path):
+    log = tmp_path / 'log.csv'
+    malformed = _hand(2, ['"A, Jr @ a1" raises to 4'])
+    malformed[2] = malformed[2] + ['2024-01-01T00:00:00.000Z', '1', 'extra']
+    # Seated twice, handled by process_hand
+    reseated = _hand(6, ['"A, Jr @ a1" raises to 4', 'Player stacks: #1 "A, Jr @ a1" (96)', '"A, Jr @ a1" bets 2'])
+    _write_log(log, [
+        _hand(1, ['"A, Jr @ a1" bets 2', '"B "the rock" @ b2" raises to 6', '"A, Jr @ a1" folds']),
+        malformed,
+        _hand(3, ['"A, Jr @ a1" bets 2'])[:-1],
+        _hand(4, ['"A, Jr @ a1" bets 2'], stacks=False),
+        _hand(5, ['"B "the rock" @ b2" raises to 4', '"A, Jr @ a1" raises to 12', '"B "the rock" @ b2" calls 8',
+                  'Flop: [Ah, Kd, 2c]', '"B "the rock" @ b2" shows a Ac, Ad.']),
+        reseated
+    ])
+
+    results = {}
+    for engine in ('loop', 'vectorized'):
+        quarantine = tmp_path / f'{engine}.csv'
+        results[engine] = _parse([str(log)], engine, quarantine=str(quarantine))
+        with open(quarantine) as f:
+            results[engine] += (list(csv.reader(f)),)
+
+    loop, loop_reports, loop_quarantine = results['loop']
+    vectorized, vectorized_reports, vectorized_quarantine = results['vectorized']
+    assert vectorized.get_stats() == loop.get_stats()
+    assert vectorized.get_stats()['a, jr']['overall']['3Bets'] == 1
+    assert vectorized_reports == loop_reports
+    assert vectorized_quarantine == loop_quarantine
+
+def test_rejects_custom_stats(tmp_path):
+    class Checks(StatPlugin):
+        name = 'Checks'
+        counters = ('checks',)
+
+    STAT_PLUGINS.append(Checks())
+    try:
+        with pytest.raises(ValueError):
+            PokerAnalyzer().parse_log(LOG_FILES[0], engine='vectorized')
+    finally:
+        STAT_PLUGINS.pop()
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        PokerAnalyzer().parse_log(LOG_FILES[0], engine='spark')
@@ -663,7 +663,7 @@ const SessionsManager = () => {
       }}>
         <Typography variant="h5">Sessions Manager</Typography>
         <input
-          accept=".csv"
+          accept=".csv,.csv.gz,.csv.xz,.csv.zst,.zip,.tar.zst,.tzst"
           style={{ display: 'none' }}
           id="raised-button-file"
           type="file"
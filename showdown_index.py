@@ -0,0 +1,330 @@
+import os
+import re
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from poker_analyzer import HAND_ID_PATTERN, detect_game_type, read_hands
+from poker_partials import write_npz
+
+# Index of hands shown at showdown, for queries such as "all hands where X showed a
+# flush on a paired board" across the whole archive without reparsing logs.
+#
+# Cards are 6-bit ints (rank * 4 + suit, 0-51; 63 marks an empty slot) packed
+# MSB-first into bytes: hole cards take 6 slots (5 bytes), boards 5 slots (4 bytes).
+# Hand category and board texture are computed once when the index is built, so
+# queries are boolean masks over flat columns.
+
+INDEX_VERSION = 1
+
+RANKS = '23456789TJQKA'
+SUITS = '♣♦♥♠'
+SUIT_LETTERS = 'cdhs'
+NO_CARD = 63
+CARD_BITS = 6
+HOLE_SLOTS = 6
+BOARD_SLOTS = 5
+
+HAND_CATEGORIES = (
+    'high card',
+    'pair',
+    'two pair',
+    'three of a kind',
+    'straight',
+    'flush',
+    'full house',
+    'four of a kind',
+    'straight flush'
+)
+
+# Board texture flags
+BOARD_PAIRED = 1
+BOARD_TRIPS = 2
+BOARD_FLUSH_POSSIBLE = 4  # Three or more cards of one suit
+BOARD_FLAGS = {
+    'paired': BOARD_PAIRED,
+    'trips': BOARD_TRIPS,
+    'flush-possible': BOARD_FLUSH_POSSIBLE
+}
+
+CARD_PATTERN = re.compile(r'(10|[2-9TJQKA])\s*([♣♦♥♠cdhs])', re.IGNORECASE)
+PLAYER_PATTERN = re.compile(r'^"(.+?)(?: @ [^"]*)?"')
+COLLECTED_PATTERN = re.compile(r' collected ([\d.]+) from pot')
+BOARD_PREFIXES = ('Flop:', 'Turn:', 'River:')  # First run only
+
+
+def encode_card(text: str) -> int:
+    """Encode a card such as "10♥", "Th" or "Q♦" as rank * 4 + suit."""
+    match = CARD_PATTERN.fullmatch(text.strip())
+    if not match:
+        raise ValueError(f"Invalid card: {text}")
+    rank, suit = match.groups()
+    rank = 'T' if rank == '10' else rank.upper()
+    suit = SUIT_LETTERS[SUITS.index(suit)] if suit in SUITS else suit.lower()
+    return RANKS.index(rank) * 4 + SUIT_LETTERS.index(suit)
+
+
+def decode_card(card: int) -> str:
+    return RANKS[card // 4] + SUIT_LETTERS[card % 4]
+
+
+def parse_cards(text: str) -> List[int]:
+    return [encode_card(rank + suit) for rank, suit in CARD_PATTERN.findall(text)]
+
+
+def pack_cards(cards: np.ndarray) -> np.ndarray:
+    """Pack an (n, slots) array of 6-bit cards into (n, ceil(slots * 6 / 8)) bytes."""
+    shifts = np.arange(CARD_BITS - 1, -1, -1, dtype=np.uint8)
+    bits = (cards[:, :, None] >> shifts) & 1
+    return np.packbits(bits.reshape(len(cards), -1).astype(np.uint8), axis=1)
+
+
+def unpack_cards(packed: np.ndarray, slots: int) -> np.ndarray:
+    """Inverse of pack_cards."""
+    bits = np.unpackbits(packed, axis=1)[:, :slots * CARD_BITS].reshape(len(packed), slots, CARD_BITS)
+    weights = 1 << np.arange(CARD_BITS - 1, -1, -1, dtype=np.uint8)
+    return (bits * weights).sum(axis=2).astype(np.uint8)
+
+
+def _straight(ranks: Sequence[int]) -> bool:
+    distinct = sorted(set(ranks))
+    if len(distinct) != 5:
+        return False
+    return distinct[4] - distinct[0] == 4 or distinct == [0, 1, 2, 3, 12]  # Wheel
+
+
+def _category(cards: Sequence[int]) -> int:
+    """Category (index into HAND_CATEGORIES) of up to five cards."""
+    ranks = [card // 4 for card in cards]
+    counts = sorted((ranks.count(rank) for rank in set(ranks)), reverse=True)
+    flush = len(cards) == 5 and len({card % 4 for card in cards}) == 1
+    straight = len(cards) == 5 and _straight(ranks)
+
+    if straight and flush:
+        return 8
+    if counts[0] == 4:
+        return 7
+    if counts[0] == 3 and len(counts) > 1 and counts[1] >= 2:
+        return 6
+    if flush:
+        return 5
+    if straight:
+        return 4
+    if counts[0] == 3:
+        return 3
+    if counts[0] == 2 and len(counts) > 1 and counts[1] == 2:
+        return 2
+    if counts[0] == 2:
+        return 1
+    return 0
+
+
+def hand_category(hole: Sequence[int], board: Sequence[int], omaha: bool = False) -> int:
+    """
+    Best standard hand category for hole cards and board. Omaha hands must use
+    exactly two hole cards and three board cards.
+    """
+    if not hole:
+        return 0
+    if omaha and len(board) >= 3:
+        return max(
+            _category(two + three)
+            for two in combinations(hole, 2)
+            for three in combinations(board, 3)
+        )
+    cards = list(hole) + list(board)
+    if len(cards) <= 5:
+        return _category(cards)
+    return max(_category(five) for five in combinations(cards, 5))
+
+
+def board_flags(board: Sequence[int]) -> int:
+    ranks = [card // 4 for card in board]
+    suits = [card % 4 for card in board]
+    most_rank = max((ranks.count(rank) for rank in set(ranks)), default=0)
+    flags = 0
+    if most_rank >= 2:
+        flags |= BOARD_PAIRED
+    if most_rank >= 3:
+        flags |= BOARD_TRIPS
+    if max((suits.count(suit) for suit in set(suits)), default=0) >= 3:
+        flags |= BOARD_FLUSH_POSSIBLE
+    return flags
+
+
+@dataclass
+class ShownHand:
+    player: str
+    hand_id: str
+    hand_number: int
+    game_type: str
+    hole: List[int]
+    board: List[int]
+    collected: float  # Chips collected from the pot in this hand, 0 if the player lost
+
+
+def extract_showdowns(hand: List[List[str]]) -> List[ShownHand]:
+    """Shown hands of one hand, given its (entry, at, order) rows from read_hands."""
+    entries = [row[0] for row in hand]
+    match = HAND_ID_PATTERN.search(entries[0])
+    if not match:
+        return []
+    hand_number, hand_id = int(match.group(1)), match.group(2)
+    game_type = detect_game_type(entries[0])
+
+    shown: Dict[str, List[int]] = {}
+    collected: Dict[str, float] = {}
+    board: List[int] = []
+    for entry in entries:
+        if entry.startswith(BOARD_PREFIXES):
+            # Each street line repeats the earlier board cards
+            board = parse_cards(entry.split(':', 1)[1])
+            continue
+        if ' shows a ' not in entry and ' collected ' not in entry:
+            continue
+        player_match = PLAYER_PATTERN.match(entry)
+        if not player_match:
+            continue
+        player = player_match.group(1).strip().lower()
+        if ' shows a ' in entry:
+            shown[player] = parse_cards(entry.split(' shows a ', 1)[1])
+        else:
+            amount = COLLECTED_PATTERN.search(entry)
+            if amount:
+                collected[player] = collected.get(player, 0.0) + float(amount.group(1))
+
+    return [
+        ShownHand(player, hand_id, hand_number, game_type, cards, board, collected.get(player, 0.0))
+        for player, cards in shown.items()
+    ]
+
+
+class ShowdownIndex:
+    """Columnar index of shown hands, built from logs and saved as a .npz file."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.players = arrays['players']
+        self.game_types = arrays['game_types']
+        self.hole = unpack_cards(arrays['hole'], HOLE_SLOTS)
+        self.board = unpack_cards(arrays['board'], BOARD_SLOTS)
+
+    def __len__(self) -> int:
+        return len(self.arrays['player_idx'])
+
+    @classmethod
+    def from_showdowns(cls, showdowns: Iterable[ShownHand]) -> 'ShowdownIndex':
+        showdowns = list(showdowns)
+        players = sorted({hand.player for hand in showdowns})
+        game_types = sorted({hand.game_type for hand in showdowns})
+        player_index = {player: i for i, player in enumerate(players)}
+        game_type_index = {game_type: i for i, game_type in enumerate(game_types)}
+
+        hole = np.full((len(showdowns), HOLE_SLOTS), NO_CARD, dtype=np.uint8)
+        board = np.full((len(showdowns), BOARD_SLOTS), NO_CARD, dtype=np.uint8)
+        for i, hand in enumerate(showdowns):
+            hole[i, :len(hand.hole[:HOLE_SLOTS])] = hand.hole[:HOLE_SLOTS]
+            board[i, :len(hand.board[:BOARD_SLOTS])] = hand.board[:BOARD_SLOTS]
+
+        return cls({
+            'version': np.array(INDEX_VERSION, dtype=np.int64),
+            'players': np.array(players, dtype=str),
+            'game_types': np.array(game_types, dtype=str),
+            'player_idx': np.array([player_index[hand.player] for hand in showdowns], dtype=np.int32),
+            'game_type_idx': np.array([game_type_index[hand.game_type] for hand in showdowns], dtype=np.uint8),
+            'hand_ids': np.array([hand.hand_id for hand in showdowns], dtype=str),
+            'hand_numbers': np.array([hand.hand_number for hand in showdowns], dtype=np.int32),
+            'hole': pack_cards(hole),
+            'board': pack_cards(board),
+            'category': np.array([
+                hand_category(hand.hole, hand.board, hand.game_type.startswith('PLO'))
+                for hand in showdowns
+            ], dtype=np.uint8),
+            'board_flags': np.array([board_flags(hand.board) for hand in showdowns], dtype=np.uint8),
+            'collected': np.array([hand.collected for hand in showdowns], dtype=np.float64)
+        })
+
+    @classmethod
+    def from_logs(cls, log_files: Iterable[str]) -> 'ShowdownIndex':
+        return cls.from_showdowns(
+            shown
+            for log_file in log_files
+            for hand in read_hands(log_file)
+            for shown in extract_showdowns(hand)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'ShowdownIndex':
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        if int(arrays['version']) != INDEX_VERSION:
+            raise ValueError(f"Unsupported showdown index version {int(arrays['version'])} in {path}")
+        return cls(arrays)
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        write_npz(self.arrays, path)
+
+    def mask(
+        self,
+        player: Optional[str] = None,
+        category: Optional[str] = None,
+        min_category: Optional[str] = None,
+        board: Iterable[str] = (),
+        game_type: Optional[str] = None,
+        won: Optional[bool] = None
+    ) -> np.ndarray:
+        """Boolean mask of the index rows matching every given condition."""
+        mask = np.ones(len(self), dtype=bool)
+        if player is not None:
+            mask &= self._lookup(self.players, player.lower(), self.arrays['player_idx'])
+        if game_type is not None:
+            mask &= self._lookup(self.game_types, game_type, self.arrays['game_type_idx'])
+        if category is not None:
+            mask &= self.arrays['category'] == HAND_CATEGORIES.index(category)
+        if min_category is not None:
+            mask &= self.arrays['category'] >= HAND_CATEGORIES.index(min_category)
+        for flag in board:
+            mask &= (self.arrays['board_flags'] & BOARD_FLAGS[flag]) != 0
+        if won is not None:
+            mask &= (self.arrays['collected'] > 0) == won
+        return mask
+
+    def _lookup(self, values: np.ndarray, value: str, column: np.ndarray) -> np.ndarray:
+        position = np.searchsorted(values, value)
+        if position == len(values) or values[position] != value:
+            return np.zeros(len(column), dtype=bool)
+        return column == position
+
+    def query(self, **conditions) -> List[Dict]:
+        """Shown hands matching the conditions accepted by mask(), in index order."""
+        return [self.row(i) for i in np.flatnonzero(self.mask(**conditions))]
+
+    def row(self, i: int) -> Dict:
+        return {
+            'player': str(self.players[self.arrays['player_idx'][i]]),
+            'hand_id': str(self.arrays['hand_ids'][i]),
+            'hand_number': int(self.arrays['hand_numbers'][i]),
+            'game_type': str(self.game_types[self.arrays['game_type_idx'][i]]),
+            'hole': _card_list(self.hole[i]),
+            'board': _card_list(self.board[i]),
+            'category': HAND_CATEGORIES[self.arrays['category'][i]],
+            'collected': float(self.arrays['collected'][i])
+        }
+
+
+def _card_list(cards: np.ndarray) -> List[str]:
+    return [decode_card(int(card)) for card in cards if card != NO_CARD]
+
+
+def format_row(row: Dict) -> Tuple[str, ...]:
+    return (
+        row['player'],
+        f"#{row['hand_number']} ({row['hand_id']})",
+        row['game_type'],
+        ' '.join(row['hole']),
+        ' '.join(row['board']),
+        row['category'],
+        f"{row['collected']:g}"
+    )
@@ -0,0 +1,56 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+from stat_plugins import PROFILE_FIELDS
+
+# Bootstrap confidence intervals for the rate stats. A player's hands are kept as
+# counts per distinct PROFILE_FIELDS profile (PlayerStats.hand_profiles), so drawing
+# n hands with replacement is one multinomial draw over the profiles: all resamples
+# are a (resamples x profiles) matrix, and their counter totals one product with the
+# (profiles x fields) profile matrix.
+
+FIELD = {name: i for i, name in enumerate(PROFILE_FIELDS)}
+
+
+def resample_totals(
+    profiles: Dict[Tuple[int, ...], int],
+    resamples: int,
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, int]:
+    """Counter totals of `resamples` bootstrap samples of a player's hands, and the number of hands."""
+    ordered = sorted(profiles.items())  # Draws don't depend on the order profiles were counted in
+    patterns = np.array([profile for profile, _ in ordered], dtype=np.int64).reshape(-1, len(PROFILE_FIELDS))
+    weights = np.array([hands for _, hands in ordered], dtype=np.int64)
+    hands = int(weights.sum())
+    draws = rng.multinomial(hands, weights / hands, size=resamples)  # Times each profile is drawn
+    return draws @ patterns, hands
+
+
+def metric_samples(totals: np.ndarray, hands: int) -> Dict[str, np.ndarray]:
+    """The metrics of stat_plugins for each row of counter totals."""
+    def column(name: str) -> np.ndarray:
+        return totals[:, FIELD[name]].astype(np.float64)
+
+    flop_hands = column('flop_hands')
+    return {
+        'VPIP': column('hands_played') / hands * 100,
+        'PFR': column('preflop_raise_hands') / hands * 100,
+        'AF': (column('total_bets') + column('total_raises')) / np.maximum(column('total_calls'), 1),
+        'WTSD': np.where(flop_hands > 0, column('showdown_hands') / np.maximum(flop_hands, 1) * 100, 0.0)
+    }
+
+
+def bootstrap_intervals(
+    profiles: Dict[Tuple[int, ...], int],
+    resamples: int,
+    level: float,
+    rng: Optional[np.random.Generator] = None
+) -> Dict[str, Tuple[float, float]]:
+    """Percentile bootstrap interval of each metric at the given confidence level, {} without hands."""
+    if not profiles or sum(profiles.values()) == 0:
+        return {}
+    totals, hands = resample_totals(profiles, resamples, rng or np.random.default_rng())
+    tail = (1 - level) / 2
+    return {
+        metric: tuple(np.quantile(samples, [tail, 1 - tail]).tolist())
+        for metric, samples in metric_samples(totals, hands).items()
+    }
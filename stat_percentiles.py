@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from stat_plugins import STAT_PLUGINS
+
+# Population tables: how a player's stats compare with everyone else's in the same
+# combined context (game type x table size). Each table keeps, per metric, the sorted
+# values of the players with at least `min_hands` hands there, so a percentile rank is
+# two binary searches; its quantiles and histogram are computed once when it is built.
+#
+# Metrics are the stats of get_stats: rates such as VPIP as they are, 'Hands' as a
+# count, and the other counters (3Bets, Showdowns, ...) per 100 hands, keyed
+# '<label> per 100', so players with different volumes compare.
+
+MIN_POPULATION_HANDS = 20
+QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+HISTOGRAM_BINS = 20
+HANDS = 'Hands'
+PER_100 = ' per 100'
+
+
+def counter_labels() -> Tuple[str, ...]:
+    """get_stats names of the counters of the registered stat plugins."""
+    return tuple(label for plugin in STAT_PLUGINS for label in plugin.labels.values())
+
+
+def population_values(context_stats: Dict[str, float]) -> Dict[str, float]:
+    """Metrics of one player in one context, with counters given per 100 hands."""
+    counters = counter_labels()
+    hands = context_stats[HANDS]
+    return {
+        f"{name}{PER_100}" if name in counters and name != HANDS else name:
+            value / hands * 100 if name in counters and name != HANDS else value
+        for name, value in context_stats.items()
+    }
+
+
+@dataclass
+class PopulationTable:
+    """Distribution of every metric over the players of one combined context."""
+    context: str
+    metrics: List[str]
+    values: np.ndarray  # (metrics x players), each row sorted with NaN (no value) last
+    counts: np.ndarray  # Players with a value, per metric
+    quantiles: np.ndarray  # (metrics x QUANTILES)
+    histograms: List[Tuple[List[int], List[float]]]  # (counts, bin edges) per metric
+
+    @classmethod
+    def build(cls, context: str, rows: List[Dict[str, float]]) -> 'PopulationTable':
+        metrics = sorted({name for row in rows for name in row})
+        matrix = np.array([[row.get(name, np.nan) for row in rows] for name in metrics], dtype=np.float64)
+        matrix = matrix.reshape(len(metrics), len(rows))
+        values = np.sort(matrix, axis=1)
+        counts = np.count_nonzero(~np.isnan(values), axis=1)
+        quantiles = np.nanquantile(values, QUANTILES, axis=1).T
+        histograms = []
+        for row, count in zip(values, counts.tolist()):
+            hist, edges = np.histogram(row[:count], bins=HISTOGRAM_BINS)
+            histograms.append((hist.tolist(), edges.tolist()))
+        return cls(context, metrics, values, counts, quantiles, histograms)
+
+    @property
+    def players(self) -> int:
+        return self.values.shape[1]
+
+    def rank(self, metric: str, value: float) -> Optional[float]:
+        """
+        Percentile rank of a value: the share of players below it plus half of those
+        equal to it, from 0 to 100. None for metrics the population doesn't have.
+        """
+        if metric not in self.metrics:
+            return None
+        i = self.metrics.index(metric)
+        row = self.values[i, :self.counts[i]]
+        if len(row) == 0:
+            return None
+        below = np.searchsorted(row, value, side='left')
+        not_above = np.searchsorted(row, value, side='right')
+        return float((below + not_above) / 2 / len(row) * 100)
+
+    def summary(self) -> Dict:
+        """Quantiles and histogram of each metric, for JSON responses."""
+        return {
+            'players': self.players,
+            'metrics': {
+                metric: {
+                    'players': int(count),
+                    'quantiles': dict(zip((f"p{round(q * 100)}" for q in QUANTILES), quantiles.tolist())),
+                    'histogram': {'counts': hist, 'edges': edges}
+                }
+                for metric, count, quantiles, (hist, edges) in zip(
+                    self.metrics, self.counts, self.quantiles, self.histograms
+                )
+            }
+        }
+
+
+def population_tables(
+    stats: Dict[str, Dict[str, Dict[str, float]]],
+    min_hands: int = MIN_POPULATION_HANDS
+) -> Dict[str, PopulationTable]:
+    """A table per combined context from get_stats output, over the players with at least min_hands hands in it."""
+    rows: Dict[str, List[Dict[str, float]]] = {}
+    for contexts in stats.values():
+        for context, context_stats in contexts['by_combined'].items():
+            if context_stats.get(HANDS, 0) >= min_hands:
+                rows.setdefault(context, []).append(population_values(context_stats))
+    return {context: PopulationTable.build(context, context_rows) for context, context_rows in rows.items()}
+
+
+def percentile_ranks(
+    tables: Dict[str, PopulationTable],
+    stats: Dict[str, Dict[str, Dict[str, float]]],
+    player: str
+) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+    """{context: {metric: {'value', 'percentile'}}} of one player against each context's population."""
+    ranks = {}
+    for context, context_stats in stats[player]['by_combined'].items():
+        table = tables.get(context)
+        ranks[context] = {
+            metric: {'value': value, 'percentile': table.rank(metric, value) if table else None}
+            for metric, value in population_values(context_stats).items()
+        }
+    return ranks
@@ -0,0 +1,257 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Stats are plugins that listen to the action events of a hand. PokerAnalyzer classifies
+# each log line into at most one event type and calls the handlers compiled for it, so
+# the per-line cost does not grow with the number of stats.
+
+# Counters of the built-in stats, in the order rollups and partials store them
+STAT_FIELDS = (
+    'total_hands',
+    'hands_played',
+    'preflop_raise_hands',
+    'showdown_hands',
+    'three_bet_hands',
+    'four_bet_hands',
+    'five_bet_hands',
+    'flop_hands',
+    'total_bets',
+    'total_raises',
+    'total_calls'
+)
+
+# Counters of one player in one hand that the built-in rate stats depend on. Each
+# player's hands are kept as counts per distinct profile, enough to resample hands
+# for confidence intervals (see stat_intervals.py).
+PROFILE_FIELDS = (
+    'hands_played',
+    'preflop_raise_hands',
+    'flop_hands',
+    'showdown_hands',
+    'total_bets',
+    'total_raises',
+    'total_calls'
+)
+
+STREET_EVENTS = ('flop', 'turn', 'river')
+ACTION_EVENTS = ('shows', 'raise', 'call', 'bet', 'post', 'fold')
+END_EVENT = 'end'  # Dispatched once per hand, after its last line
+EVENT_TYPES = STREET_EVENTS + ACTION_EVENTS + (END_EVENT,)
+
+BLIND_MARKERS = ('small blind', 'big blind', 'posts')
+
+
+def classify_action(text: str) -> Optional[str]:
+    """
+    Event type of a lowercased log entry, or None if no stat listens to it.
+    Blind posts, including "calls" and "raises" lines that complete a blind, are 'post'.
+    """
+    if "flop:" in text:
+        return 'flop'
+    if "turn:" in text:
+        return 'turn'
+    if "river:" in text:
+        return 'river'
+    if "shows" in text:
+        return 'shows'
+    if "raises" in text:
+        return 'post' if "posts" in text else 'raise'
+    if "calls" in text:
+        return 'post' if any(marker in text for marker in BLIND_MARKERS) else 'call'
+    if "bets" in text:
+        return 'bet'
+    if "posts" in text:
+        return 'post'
+    if "folds" in text:
+        return 'fold'
+    return None
+
+
+@dataclass
+class HandState:
+    """State of the hand being processed, shared by all stat plugins."""
+    game_type: str
+    table_size: int = 0
+    street: str = 'preflop'
+    seated: Set[str] = field(default_factory=set)
+    played: Set[str] = field(default_factory=set)  # Put chips in preflop (blinds included) and didn't fold
+    folded: Set[str] = field(default_factory=set)  # Folded preflop
+    preflop_raises: int = 0  # Preflop raises before the current event
+    counts: Dict[str, Dict[str, int]] = field(default_factory=dict)  # Player -> counter -> occurrences
+    marks: Dict[str, Set[str]] = field(default_factory=dict)  # Counter -> players counted once this hand
+
+    def count(self, player: str, counter: str) -> None:
+        """Count one occurrence of an event for a player."""
+        counts = self.counts.setdefault(player, {})
+        counts[counter] = counts.get(counter, 0) + 1
+
+    def mark(self, counter: str, player: str) -> None:
+        """Count a player once for this hand, however often it is marked."""
+        self.marks.setdefault(counter, set()).add(player)
+
+    def deltas(self) -> Dict[str, Dict[str, int]]:
+        """Counter increments of this hand per player."""
+        deltas = {player: dict(counts) for player, counts in self.counts.items()}
+        for counter, players in self.marks.items():
+            for player in players:
+                counts = deltas.setdefault(player, {})
+                counts[counter] = counts.get(counter, 0) + 1
+        return deltas
+
+
+Handler = Callable[[HandState, Optional[str]], None]
+
+
+class StatPlugin:
+    """
+    A stat computed from hand events.
+
+    counters: counter names the plugin increments, stored per player and context
+    labels: output name of each counter in get_stats
+    listeners(): event type -> handler(hand, player); player is None for street and end events
+    metrics(stats): derived values for one context's counters, e.g. {'VPIP': 23.5}
+    """
+    name = ''
+    counters: Tuple[str, ...] = ()
+    labels: Dict[str, str] = {}
+
+    def listeners(self) -> Dict[str, Handler]:
+        return {}
+
+    def metrics(self, stats: Dict[str, int]) -> Dict[str, float]:
+        return {}
+
+
+class HandsDealt(StatPlugin):
+    name = 'Hands'
+    counters = ('total_hands',)
+    labels = {'total_hands': 'Hands'}
+
+    def listeners(self) -> Dict[str, Handler]:
+        return {END_EVENT: self.end}
+
+    def end(self, hand: HandState, player: Optional[str]) -> None:
+        hand.marks['total_hands'] = set(hand.seated)
+
+
+class PreflopRaise(StatPlugin):
+    name = 'PFR'
+    counters = ('preflop_raise_hands',)
+    labels = {'preflop_raise_hands': 'Preflop Raises'}
+
+    def listeners(self) -> Dict[str, Handler]:
+        return {'raise': self.raise_}
+
+    def raise_(self, hand: HandState, player: Optional[str]) -> None:
+        if hand.street == 'preflop':
+            hand.mark('preflop_raise_hands', player)
+
+    def metrics(self, stats: Dict[str, int]) -> Dict[str, float]:
+        return {'PFR': (stats['preflop_raise_hands'] / stats['total_hands']) * 100}
+
+
+class VoluntarilyPutInPot(StatPlugin):
+    name = 'VPIP'
+    counters = ('hands_played',)
+    labels = {'hands_played': 'Hands Played'}
+
+    def listeners(self) -> Dict[str, Handler]:
+        return {END_EVENT: self.end}
+
+    def end(self, hand: HandState, player: Optional[str]) -> None:
+        hand.marks['hands_played'] = set(hand.played)
+
+    def metrics(self, stats: Dict[str, int]) -> Dict[str, float]:
+        return {'VPIP': (stats['hands_played'] / stats['total_hands']) * 100}
+
+
+class AggressionFactor(StatPlugin):
+    name = 'AF'
+    counters = ('total_bets', 'total_raises', 'total_calls')
+    labels = {'total_bets': 'Bets', 'total_raises': 'Raises', 'total_calls': 'Calls'}
+
+    def listeners(self) -> Dict[str, Handler]:
+        return {
+            'bet': lambda hand, player: hand.count(player, 'total_bets'),
+            'raise': lambda hand, player: hand.count(player, 'total_raises'),
+            'call': lambda hand, player: hand.count(player, 'total_calls')
+        }
+
+    def metrics(self, stats: Dict[str, int]) -> Dict[str, float]:
+        return {'AF': (stats['total_bets'] + stats['total_raises']) / (stats['total_calls'] or 1)}
+
+
+class WentToShowdown(StatPlugin):
+    name = 'WTSD'
+    counters = ('flop_hands', 'showdown_hands')
+    labels = {'showdown_hands': 'Showdowns', 'flop_hands': 'Flop Hands'}
+
+    def listeners(self) -> Dict[str, Handler]:
+        return {'flop': self.flop, 'shows': self.shows}
+
+    def flop(self, hand: HandState, player: Optional[str]) -> None:
+        hand.marks['flop_hands'] = hand.played - hand.folded
+
+    def shows(self, hand: HandState, player: Optional[str]) -> None:
+        hand.count(player, 'showdown_hands')
+
+    def metrics(self, stats: Dict[str, int]) -> Dict[str, float]:
+        return {'WTSD': (stats['showdown_hands'] / stats['flop_hands'] * 100) if stats['flop_hands'] > 0 else 0}
+
+
+class PreflopReraise(StatPlugin):
+    name = '3-bet'
+    counters = ('three_bet_hands', 'four_bet_hands', 'five_bet_hands')
+    labels = {'three_bet_hands': '3Bets', 'four_bet_hands': '4Bets', 'five_bet_hands': '5Bets'}
+
+    def listeners(self) -> Dict[str, Handler]:
+        return {'raise': self.raise_}
+
+    def raise_(self, hand: HandState, player: Optional[str]) -> None:
+        if hand.street != 'preflop' or hand.preflop_raises == 0:
+            return
+        if hand.preflop_raises == 1:
+            hand.mark('three_bet_hands', player)
+        elif hand.preflop_raises == 2:
+            hand.mark('four_bet_hands', player)
+        else:
+            hand.mark('five_bet_hands', player)
+
+
+# Registered stats, in the order their metrics and counters appear in get_stats
+STAT_PLUGINS: List[StatPlugin] = [
+    HandsDealt(),
+    PreflopRaise(),
+    VoluntarilyPutInPot(),
+    AggressionFactor(),
+    WentToShowdown(),
+    PreflopReraise()
+]
+
+
+def register_stat_plugin(plugin: StatPlugin) -> None:
+    """
+    Add a stat to every PokerAnalyzer created afterwards. Counters that are not
+    built in are kept in memory only; rollups and partials store STAT_FIELDS.
+    """
+    unknown = set(plugin.listeners()) - set(EVENT_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown event types for {plugin.name}: {', '.join(sorted(unknown))}")
+    STAT_PLUGINS.append(plugin)
+
+
+def stat_counters() -> Tuple[str, ...]:
+    """All counters of the registered stats, built-in counters first."""
+    extra = [
+        counter for plugin in STAT_PLUGINS for counter in plugin.counters if counter not in STAT_FIELDS
+    ]
+    return STAT_FIELDS + tuple(dict.fromkeys(extra))
+
+
+def compile_dispatch(plugins: List[StatPlugin]) -> Dict[str, Tuple[Handler, ...]]:
+    """Build the event type -> handlers table for the given plugins."""
+    table: Dict[str, List[Handler]] = {}
+    for plugin in plugins:
+        for event, handler in plugin.listeners().items():
+            table.setdefault(event, []).append(handler)
+    return {event: tuple(handlers) for event, handlers in table.items()}
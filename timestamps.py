@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence
+from zoneinfo import ZoneInfo
+
+# PokerNow's `order` column is the epoch in milliseconds times 100, plus a sequence
+# number for events logged within the same millisecond.
+ORDER_TICKS_PER_MS = 100
+
+DISPLAY_TIMEZONE = 'America/Los_Angeles'
+
+MONTHS = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+)
+
+
+def order_to_datetime(order) -> datetime:
+    """Convert an `order` column value to an aware UTC datetime (millisecond precision)."""
+    return datetime.fromtimestamp(int(order) // ORDER_TICKS_PER_MS / 1000, timezone.utc)
+
+
+def parse_iso(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, accepting the 'Z' UTC suffix."""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def row_timestamp(row: Sequence[str]) -> datetime:
+    """
+    Timestamp of a log row (entry, at, order). Uses the integer `order` column
+    when present and falls back to parsing the `at` column.
+    """
+    order = row[-1].strip()
+    if order.isdigit():
+        return order_to_datetime(order)
+    return parse_iso(row[-2].strip())
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str) -> ZoneInfo:
+    """Cached ZoneInfo lookup."""
+    return ZoneInfo(name)
+
+
+def format_display(value: datetime, tz: str = DISPLAY_TIMEZONE) -> str:
+    """
+    Format a datetime like strftime('%B %-d, %Y %-I:%M%p') in the given timezone,
+    e.g. "November 26, 2023 11:39PM", without strftime's locale and platform quirks.
+    """
+    local = value.astimezone(get_timezone(tz))
+    hour = local.hour % 12 or 12
+    meridiem = 'AM' if local.hour < 12 else 'PM'
+    return f"{MONTHS[local.month - 1]} {local.day}, {local.year} {hour}:{local.minute:02d}{meridiem}"
+
+
+def format_display_bulk(values: Iterable[datetime], tz: str = DISPLAY_TIMEZONE) -> List[str]:
+    """
+    Format many datetimes at once. Display strings have minute resolution, so
+    results are shared between values that fall in the same UTC minute.
+    """
+    formatted: Dict[int, str] = {}
+    results = []
+    for value in values:
+        minute = int(value.timestamp()) // 60
+        text = formatted.get(minute)
+        if text is None:
+            text = formatted[minute] = format_display(value, tz)
+        results.append(text)
+    return results
@@ -0,0 +1,376 @@
+import csv
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from log_io import LogSource, log_name, open_log
+from poker_analyzer import GAME_VARIANTS, ParseReport, PlayerStats, PokerAnalyzer, write_quarantine
+from stat_plugins import (
+    BLIND_MARKERS, PROFILE_FIELDS, STAT_FIELDS, AggressionFactor, HandsDealt, PreflopRaise, PreflopReraise, VoluntarilyPutInPot,
+    WentToShowdown
+)
+from timestamps import row_timestamp
+
+# Bulk engine for large batch jobs. A whole log is loaded into columns and classified
+# with numpy string kernels instead of line by line in process_hand: hand ids come from
+# a cumulative sum over the "starting hand" markers, the street of every row from a
+# running maximum over street events, and the counters of each (player, context) from
+# group-bys over the classified action rows. It computes the built-in stats only and
+# matches the loop engine exactly; hands whose shape the kernels don't model (several
+# "Player stacks" lines, an action on the "starting hand" line) are handed to
+# process_hand.
+#
+# The stripped, lowercased entries are dictionary encoded in two columns: the text up
+# to and including its last quote, which names the player, and the rest, such as
+# " calls 20". Both repeat a lot, so the kernels run over their small tables of
+# distinct values. No marker contains a quote, so a marker is in an entry exactly
+# when it is in one of its two parts.
+
+BUILTIN_PLUGINS = (HandsDealt, PreflopRaise, VoluntarilyPutInPot, AggressionFactor, WentToShowdown, PreflopReraise)
+
+# Event codes, in classify_action's order of precedence
+NO_EVENT, FLOP, TURN, RIVER, SHOWS, RAISE, CALL, BET, POST, FOLD = range(10)
+STREET_CODES = (FLOP, TURN, RIVER)
+PREFLOP = NO_EVENT  # Street of rows before the first street event of a hand
+
+# Markers of classify_action in the order it tests them; "raises" and "calls" lines
+# that complete a blind are posts
+MARKER_EVENTS = (
+    ('flop:', FLOP),
+    ('turn:', TURN),
+    ('river:', RIVER),
+    ('shows', SHOWS),
+    ('raises', RAISE),
+    ('calls', CALL),
+    ('bets', BET),
+    ('posts', POST),
+    ('folds', FOLD)
+)
+
+FIELD_INDEX = {name: i for i, name in enumerate(STAT_FIELDS)}
+
+
+def _factorize(values: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """(codes, distinct values) with distinct[codes[i]] == values[i]."""
+    index = {value: code for code, value in enumerate(dict.fromkeys(values))}
+    return np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values)), list(index)
+
+
+def _encode(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Dictionary encode strings as (codes, table of distinct values as UTF-8 bytes)."""
+    codes, distinct = _factorize(values)
+    return codes, np.array([value.encode() for value in distinct], dtype=bytes)
+
+
+def _contains(table: np.ndarray, marker: str) -> np.ndarray:
+    # A UTF-8 encoded marker is a substring of an encoded string exactly when the marker is a substring of the string
+    return np.char.find(table, marker.encode()) >= 0
+
+
+class _Entries:
+    """Stripped, lowercased log entries, split and dictionary encoded as described above."""
+
+    def __init__(self, entries: List[str]):
+        codes, texts = _factorize([entry.strip().lower() for entry in entries])
+        splits = [text.rpartition('"') for text in texts]
+        player_codes, self.player_parts = _encode([head + quote for head, quote, _ in splits])
+        rest_codes, self.rest_parts = _encode([rest for _, _, rest in splits])
+        self.player_codes = player_codes[codes]
+        self.rest_codes = rest_codes[codes]
+
+    def contains(self, marker: str) -> np.ndarray:
+        """Rows whose entry contains the lowercase marker."""
+        return (
+            _contains(self.player_parts, marker)[self.player_codes]
+            | _contains(self.rest_parts, marker)[self.rest_codes]
+        )
+
+
+def classify_events(entries: _Entries) -> np.ndarray:
+    """Vectorized stat_plugins.classify_action over all entries."""
+    posts = entries.contains('posts')
+    blind = np.logical_or.reduce([entries.contains(marker) for marker in BLIND_MARKERS])
+    conditions = [entries.contains(marker) for marker, _ in MARKER_EVENTS]
+    choices = [
+        np.where(posts, POST, RAISE) if event == RAISE else np.where(blind, POST, CALL) if event == CALL else event
+        for _, event in MARKER_EVENTS
+    ]
+    return np.select(conditions, choices, NO_EVENT).astype(np.int8)
+
+
+def detect_game_types(starting_lines: List[str]) -> np.ndarray:
+    """Vectorized detect_game_type: index into GAME_VARIANTS for each "starting hand" line."""
+    lines = np.array([line.lower().encode() for line in starting_lines], dtype=bytes)
+    best = np.zeros(len(lines), dtype=np.int64)
+    best_markers = np.zeros(len(lines), dtype=np.int64)
+    for index, variant in enumerate(GAME_VARIANTS):
+        if not variant.markers:
+            continue
+        match = np.logical_and.reduce([_contains(lines, marker) for marker in variant.markers])
+        better = match & (len(variant.markers) > best_markers)
+        best[better] = index
+        best_markers[better] = len(variant.markers)
+    return best
+
+
+def _range_counts(flags: np.ndarray, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """Number of set flags in each inclusive row range [first, last]."""
+    cumulative = np.concatenate(([0], np.cumsum(flags)))
+    return cumulative[last + 1] - cumulative[first]
+
+
+def _first_per_key(keys: np.ndarray) -> np.ndarray:
+    """Positions of the first occurrence of each distinct key."""
+    return np.unique(keys, return_index=True)[1]
+
+
+class _PlayerNames:
+    """
+    PokerAnalyzer.extract_player_name with memoization. Every pattern it tries ends
+    with a quote, so the name only depends on the text up to the last quote: that
+    part is the key, shared by all actions and stacks of a player.
+    """
+
+    def __init__(self, analyzer: PokerAnalyzer):
+        self.analyzer = analyzer
+        self.names: Dict[str, Optional[str]] = {}
+
+    def __call__(self, text: str) -> Optional[str]:
+        key = text[:text.rfind('"') + 1]
+        if key not in self.names:
+            self.names[key] = self.analyzer.extract_player_name(key)
+        return self.names[key]
+
+
+def parse_log_vectorized(
+    analyzer: PokerAnalyzer,
+    filename: LogSource,
+    progress: Optional[Callable[[int, int], None]] = None,
+    quarantine: Optional[str] = None
+) -> ParseReport:
+    """
+    Parse a log into analyzer like PokerAnalyzer.parse_log, with the same results,
+    rejected hands and report.
+    """
+    if tuple(type(plugin) for plugin in analyzer.plugins) != BUILTIN_PLUGINS:
+        raise ValueError("The vectorized engine only computes the built-in stats, use the loop engine")
+
+    started = time.perf_counter()
+    with open_log(filename) as f:
+        rows = list(csv.reader(f))[1:]
+    rows.reverse()  # Play order
+    row_count = len(rows)
+    entries = [row[0] if row else '' for row in rows]
+    encoded = _Entries(entries)
+    positions = np.arange(row_count)
+
+    def marked(marker: str, match: Callable[[str, str], bool] = str.__contains__) -> np.ndarray:
+        """Rows whose original entry has a case sensitive marker, checked among those that have it in lowercase."""
+        flags = np.zeros(row_count, dtype=bool)
+        candidates = np.flatnonzero(encoded.contains(marker.lower())).tolist()
+        flags[candidates] = [match(entries[row], marker) for row in candidates]
+        return flags
+
+    def span(first: int, last: int):
+        """Rows first..last in play order, as the (first, last) data row index in file order."""
+        return int(row_count - 1 - last), int(row_count - 1 - first)
+
+    # Hands run from a "starting hand" row to the first "ending hand" row before the next one
+    is_start = marked('starting hand #')
+    segment = np.cumsum(is_start)  # 0 before the first hand
+    starts = np.flatnonzero(is_start)
+    end_rows = np.flatnonzero(marked('ending hand #') & (segment > 0))
+    end_rows = end_rows[_first_per_key(segment[end_rows])]
+    ends = np.full(len(starts), -1)
+    ends[segment[end_rows] - 1] = end_rows
+    complete = ends >= 0
+
+    rejected = []
+    for i in np.flatnonzero(~complete).tolist():
+        # Runs until the next hand starts, as in read_log
+        last = starts[i + 1] - 1 if i + 1 < len(starts) else row_count - 1
+        rejected.append((span(starts[i], last), 'incomplete hand', entries[starts[i]]))
+    hand_starts = starts[complete]
+    hand_ends = ends[complete]
+    hands = len(hand_starts)
+
+    # Same checks as hand_error
+    row_lengths = np.array([len(row) for row in rows], dtype=np.int64)
+    malformed = _range_counts(row_lengths != 3, hand_starts, hand_ends) > 0
+    missing_stacks = _range_counts(marked('Player stacks:', str.startswith), hand_starts, hand_ends) == 0
+    for i in np.flatnonzero(malformed | missing_stacks).tolist():
+        reason = 'malformed row' if malformed[i] else 'missing player stacks'
+        rejected.append((span(hand_starts[i], hand_ends[i]), reason, entries[hand_starts[i]]))
+    accepted = ~(malformed | missing_stacks)
+
+    # Row -> accepted hand, -1 elsewhere
+    segment_hand = np.full(len(starts) + 1, -1)
+    segment_hand[np.flatnonzero(complete) + 1] = np.where(accepted, np.arange(hands), -1)
+    hand_of_row = segment_hand[segment]
+    in_hand = hand_of_row >= 0
+    in_hand[in_hand] = positions[in_hand] <= hand_ends[hand_of_row[in_hand]]
+    hand_of_row[~in_hand] = -1
+
+    is_stacks = in_hand & encoded.contains('player stacks:')
+    events = np.where(in_hand & ~is_stacks, classify_events(encoded), NO_EVENT)
+
+    # The "starting hand" row is read twice (see read_log), so a hand is left to the
+    # kernels only if that row is inert and the hand has a single "Player stacks" row
+    stacks_rows = np.flatnonzero(is_stacks)
+    stacks_count = np.bincount(hand_of_row[stacks_rows], minlength=hands)
+    fallback = accepted & ((stacks_count != 1) | (events[hand_starts] != NO_EVENT) | is_stacks[hand_starts])
+    vectorized = accepted & ~fallback
+
+    # Seats, from the "Player stacks" rows in play order
+    player_name = _PlayerNames(analyzer)
+    players: Dict[str, int] = {}
+    seat_hands = []
+    seat_players = []
+    table_sizes = np.zeros(hands, dtype=np.int64)
+    stacks_row_of_hand = np.full(hands, row_count)
+    for row in stacks_rows.tolist():
+        hand = hand_of_row[row]
+        stacks = entries[row].strip().lower().split("player stacks:")[1].split('|')
+        seated = [name for name in map(player_name, stacks) if name]
+        for name in seated:
+            players.setdefault(name, len(players))
+        if vectorized[hand]:
+            table_sizes[hand] = len(seated)
+            stacks_row_of_hand[hand] = row
+            for name in dict.fromkeys(seated):
+                seat_hands.append(hand)
+                seat_players.append(players[name])
+
+    # Players are created in the order the loop engine first seats them
+    for name in players:
+        if name not in analyzer.players:
+            analyzer.players[name] = PlayerStats()
+
+    for hand in np.flatnonzero(fallback).tolist():
+        lines = [entries[hand_starts[hand]]] + entries[hand_starts[hand]:hand_ends[hand] + 1]
+        try:
+            analyzer.process_hand(lines)
+        except Exception as e:
+            accepted[hand] = False
+            rejected.append((span(hand_starts[hand], hand_ends[hand]), f"{type(e).__name__}: {e}", lines[0]))
+
+    # Street of each row: the last street event of its hand before it, or preflop
+    is_street = np.isin(events, STREET_CODES)
+    street_source = np.maximum.accumulate(np.where(is_street | is_start, positions, -1))
+    street = np.where((street_source >= 0) & is_street[street_source], events[street_source], PREFLOP)
+
+    # Actions of seated players, after the hand's "Player stacks" row
+    action_rows = np.flatnonzero((events >= SHOWS) & in_hand)
+    action_rows = action_rows[vectorized[hand_of_row[action_rows]]]
+    action_rows = action_rows[action_rows > stacks_row_of_hand[hand_of_row[action_rows]]]
+    codes, inverse = np.unique(encoded.player_codes[action_rows], return_inverse=True)
+    code_players = np.array(
+        [players.get(player_name(part.decode()), -1) for part in encoded.player_parts[codes].tolist()], dtype=np.int64
+    )
+    action_players = code_players[inverse.reshape(-1)]
+
+    player_count = max(len(players), 1)
+    seat_keys = np.array(seat_hands, dtype=np.int64) * player_count + np.array(seat_players, dtype=np.int64)
+    action_keys = hand_of_row[action_rows] * player_count + action_players
+    seated_action = (action_players >= 0) & np.isin(action_keys, seat_keys)
+    action_rows = action_rows[seated_action]
+    action_keys = action_keys[seated_action]
+    action_events = events[action_rows]
+    preflop = street[action_rows] == PREFLOP
+
+    # Counter increments of every (hand, player) key, one entry per increment
+    delta_keys = [seat_keys]
+    delta_fields = [np.full(len(seat_keys), FIELD_INDEX['total_hands'])]
+
+    def count(keys: np.ndarray, counter: str) -> None:
+        delta_keys.append(keys)
+        delta_fields.append(np.full(len(keys), FIELD_INDEX[counter]))
+
+    def mark(keys: np.ndarray, counter: str) -> None:
+        count(np.unique(keys), counter)
+
+    count(action_keys[action_events == BET], 'total_bets')
+    count(action_keys[action_events == RAISE], 'total_raises')
+    count(action_keys[action_events == CALL], 'total_calls')
+    count(action_keys[action_events == SHOWS], 'showdown_hands')
+
+    preflop_raise = preflop & (action_events == RAISE)
+    raise_keys = action_keys[preflop_raise]
+    raise_hands = raise_keys // player_count
+    raise_order = np.arange(len(raise_hands)) - np.searchsorted(raise_hands, raise_hands)  # Earlier raises in the hand
+    mark(raise_keys, 'preflop_raise_hands')
+    mark(raise_keys[raise_order == 1], 'three_bet_hands')
+    mark(raise_keys[raise_order == 2], 'four_bet_hands')
+    mark(raise_keys[raise_order >= 3], 'five_bet_hands')
+
+    # A player played the hand if their last preflop action (shows aside) wasn't a fold
+    entered = preflop & (action_events != SHOWS)
+    entered_keys = action_keys[entered][::-1]
+    last = _first_per_key(entered_keys)
+    last_actions = action_events[entered][::-1][last]
+    entered_keys = entered_keys[last]
+    mark(entered_keys[last_actions != FOLD], 'hands_played')
+
+    # Players who saw the flop: entered preflop and never folded, in hands with a flop
+    folded_keys = action_keys[preflop & (action_events == FOLD)]
+    has_flop = np.zeros(hands, dtype=bool)
+    has_flop[hand_of_row[events == FLOP]] = True
+    mark(entered_keys[~np.isin(entered_keys, folded_keys) & has_flop[entered_keys // player_count]], 'flop_hands')
+
+    # Sum the increments per (player, context)
+    variants = detect_game_types([entries[start] for start in hand_starts.tolist()])
+    hand_contexts = [
+        f"{GAME_VARIANTS[variant].name}_{size}h" for variant, size in zip(variants.tolist(), table_sizes.tolist())
+    ]
+    contexts = sorted(set(hand_contexts))
+    context_index = {context: i for i, context in enumerate(contexts)}
+    hand_context = np.array([context_index[context] for context in hand_contexts], dtype=np.int64)
+    context_count = max(len(contexts), 1)
+
+    keys = np.concatenate(delta_keys)
+    fields = np.concatenate(delta_fields)
+    groups = (keys % player_count) * context_count + hand_context[keys // player_count]
+    group_ids, group_inverse = np.unique(groups, return_inverse=True)
+    counters = np.zeros((len(group_ids), len(STAT_FIELDS)), dtype=np.int64)
+    np.add.at(counters, (group_inverse.reshape(-1), fields), 1)
+
+    names = list(players)
+    for group, counts in zip(group_ids.tolist(), counters.tolist()):
+        player, context = divmod(group, context_count)
+        game_type, table_info = contexts[context].rsplit('_', 1)
+        analyzer.players[names[player]].add_context_counts(game_type, int(table_info[:-1]), dict(zip(STAT_FIELDS, counts)))
+
+    # Hands per (player, context, profile), from the counters of every (hand, player) key
+    hand_keys, key_inverse = np.unique(keys, return_inverse=True)
+    hand_counters = np.zeros((len(hand_keys), len(STAT_FIELDS)), dtype=np.int64)
+    np.add.at(hand_counters, (key_inverse.reshape(-1), fields), 1)
+    profile_rows = np.column_stack([
+        hand_keys % player_count,
+        hand_context[hand_keys // player_count],
+        hand_counters[:, [FIELD_INDEX[name] for name in PROFILE_FIELDS]]
+    ])
+    if len(profile_rows):
+        profile_rows, profile_hands = np.unique(profile_rows, axis=0, return_counts=True)
+        for (player, context, *profile), hands_seen in zip(profile_rows.tolist(), profile_hands.tolist()):
+            game_type, table_info = contexts[context].rsplit('_', 1)
+            analyzer.players[names[player]].add_hand_profiles(game_type, int(table_info[:-1]), {tuple(profile): hands_seen})
+
+    dealt = np.unique(np.array(seat_hands, dtype=np.int64))
+    for context, hands_dealt in zip(*np.unique(hand_context[dealt], return_counts=True)):
+        context = contexts[context]
+        analyzer.context_hands[context] = analyzer.context_hands.get(context, 0) + int(hands_dealt)
+
+    parsed = np.flatnonzero(accepted)
+    if len(parsed):
+        analyzer.start_time = row_timestamp(rows[hand_starts[parsed[0]]])
+        analyzer.end_time = row_timestamp(rows[hand_ends[parsed[-1]]])
+
+    if progress:
+        progress(hands, hands)
+
+    report = ParseReport(log_name(filename), row_count, len(starts))
+    for _, reason, _ in rejected:
+        report.rejected[reason] = report.rejected.get(reason, 0) + 1
+    if rejected and quarantine:
+        write_quarantine(filename, rejected, quarantine)
+    report.seconds = time.perf_counter() - started
+    return report